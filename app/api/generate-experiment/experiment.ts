@@ -0,0 +1,102 @@
+// Shared by the blocking and the streaming generate-experiment routes
+
+// Python FastAPI server for create experiment
+export const EXPERIMENT_SERVER_URL = process.env.EXPERIMENT_SERVER_URL || "http://localhost:8001"
+// Total time we wait for an experiment; the Python server is told how much of
+// it is left so its own model retries stop before we give up
+export const EXPERIMENT_TIMEOUT_MS = Number(process.env.EXPERIMENT_TIMEOUT_MS || 120000)
+
+// Build prompt from title, description, and files
+// Python expects: { prompt: str, template_hint?: str }
+// Combine title and description into a natural language prompt
+export function buildPrompt(title?: string, description?: string, files?: any[]): string {
+  let prompt = ""
+
+  if (title && description) {
+    // If both are provided, create a comprehensive prompt
+    prompt = `${title}. ${description}`
+  } else if (title) {
+    // If only title, use it as the main prompt
+    prompt = title
+  } else if (description) {
+    // If only description, use it as the prompt
+    prompt = description
+  }
+
+  // Add files as additional context
+  if (files && files.length > 0) {
+    prompt += "\n\nAdditional context from uploaded files:\n"
+    files.forEach((file: any) => {
+      prompt += `File: ${file.name}\nType: ${file.type}\nContent: ${file.content || "[File content]"}\n\n`
+    })
+  }
+
+  return prompt.trim()
+}
+
+// Python returns: { success: bool, config?: dict, html_code?: str, experiment_id?: str, preview_url?: str, error?: str }
+// Frontend expects: { id, title, description, code, parameters, instructions }
+export function toExperimentData(pythonResponse: any, title?: string, description?: string): any {
+  // Transform Python response to frontend format
+  const experimentData: any = {
+    id: `custom-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`,
+    title: title || pythonResponse.config?.title || "Custom Experiment",
+    description: description || pythonResponse.config?.description || "AI-generated experiment",
+    code: pythonResponse.html_code || "",
+    experimentId: pythonResponse.experiment_id,
+    // Stored copy with ETag/immutable caching, relayed by ./preview/[experimentId]
+    // because EXPERIMENT_SERVER_URL is not reachable from the browser
+    previewUrl: pythonResponse.experiment_id
+      ? `/api/generate-experiment/preview/${encodeURIComponent(pythonResponse.experiment_id)}`
+      : undefined,
+    parameters: [],
+    instructions: [],
+  }
+
+  // Extract parameters from config if available
+  if (pythonResponse.config) {
+    // Try to extract parameters from config
+    if (pythonResponse.config.parameters) {
+      experimentData.parameters = pythonResponse.config.parameters
+    } else if (pythonResponse.config.params) {
+      // Convert params to parameters format
+      experimentData.parameters = Object.entries(pythonResponse.config.params).map(([name, value]: [string, any]) => ({
+        name,
+        label: name.charAt(0).toUpperCase() + name.slice(1).replace(/_/g, " "),
+        type: typeof value === "number" ? "number" : typeof value === "boolean" ? "boolean" : "select",
+        default: value,
+      }))
+    }
+
+    // Extract instructions if available
+    if (pythonResponse.config.instructions) {
+      experimentData.instructions = pythonResponse.config.instructions
+    } else {
+      experimentData.instructions = [
+        "Review the generated experiment code",
+        "Adjust parameters to see different behaviors",
+        "Explore the interactive features",
+      ]
+    }
+  } else {
+    // Default parameters if no config
+    experimentData.parameters = [
+      {
+        name: "speed",
+        label: "Animation Speed",
+        type: "number",
+        min: 0.1,
+        max: 5,
+        default: 1,
+        step: 0.1,
+      },
+    ]
+    experimentData.instructions = [
+      "Review the generated experiment",
+      "Interact with the controls",
+      "Observe the simulation behavior",
+    ]
+  }
+
+  return experimentData
+}
@@ -0,0 +1,48 @@
+import type { NextRequest } from "next/server"
+import { EXPERIMENT_SERVER_URL } from "../../experiment"
+
+// Relays a stored experiment from the Python server's /preview/{id}, which
+// the browser cannot reach itself (EXPERIMENT_SERVER_URL is a server-side
+// address). The document never changes for an id, so its ETag and immutable
+// Cache-Control are passed through and revalidation still costs no body.
+// Linked-mode previews load shared assets from EXPERIMENT_ASSET_BASE_URL,
+// which must then be a URL the browser can reach.
+
+const RELAYED_HEADERS = ["etag", "cache-control", "content-type"]
+
+export async function GET(request: NextRequest, { params }: { params: Promise<{ experimentId: string }> }) {
+  const { experimentId } = await params
+  const headers: Record<string, string> = {}
+  const ifNoneMatch = request.headers.get("if-none-match")
+  if (ifNoneMatch) {
+    headers["If-None-Match"] = ifNoneMatch
+  }
+
+  try {
+    // fetch negotiates and decodes br/gzip itself; the body relayed here is plain
+    const response = await fetch(`${EXPERIMENT_SERVER_URL}/preview/${encodeURIComponent(experimentId)}`, {
+      headers,
+      signal: request.signal,
+    })
+
+    const relayed = new Headers()
+    for (const name of RELAYED_HEADERS) {
+      const value = response.headers.get(name)
+      if (value) {
+        relayed.set(name, value)
+      }
+    }
+    if (response.status === 304) {
+      return new Response(null, { status: 304, headers: relayed })
+    }
+    return new Response(response.body, { status: response.status, headers: relayed })
+  } catch (error) {
+    console.error("Experiment Preview Error:", error)
+
+    if (error instanceof Error && error.name === "AbortError") {
+      return new Response(null, { status: 499 })
+    }
+
+    return new Response("Experiment service is unavailable", { status: 503 })
+  }
+}
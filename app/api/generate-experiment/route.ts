@@ -1,8 +1,6 @@
 
 import { type NextRequest, NextResponse } from "next/server"
-
-// Python FastAPI server for create experiment
-const EXPERIMENT_SERVER_URL = process.env.EXPERIMENT_SERVER_URL || "http://localhost:8001"
+import { EXPERIMENT_SERVER_URL, EXPERIMENT_TIMEOUT_MS, buildPrompt, toExperimentData } from "./experiment"
 
 async function retryWithBackoff(fn: () => Promise<Response>, maxRetries = 3): Promise<Response> {
   for (let i = 0; i < maxRetries; i++) {
@@ -35,47 +33,26 @@ export async function POST(request: NextRequest) {
 
     console.log(`[Experiment API] Forwarding request to Python server at ${EXPERIMENT_SERVER_URL}`)
 
-    // Build prompt from title, description, and files
-    // Python expects: { prompt: str, template_hint?: str }
-    // Combine title and description into a natural language prompt
-    let prompt = ""
-    
-    if (title && description) {
-      // If both are provided, create a comprehensive prompt
-      prompt = `${title}. ${description}`
-    } else if (title) {
-      // If only title, use it as the main prompt
-      prompt = title
-      if (description) {
-        prompt += `. ${description}`
-      }
-    } else if (description) {
-      // If only description, use it as the prompt
-      prompt = description
-    }
-    
-    // Add files as additional context
-    if (files && files.length > 0) {
-      prompt += "\n\nAdditional context from uploaded files:\n"
-      files.forEach((file: any) => {
-        prompt += `File: ${file.name}\nType: ${file.type}\nContent: ${file.content || "[File content]"}\n\n`
-      })
-    }
+    const prompt = buildPrompt(title, description, files)
 
     // Forward request to Python FastAPI server
     // Python endpoint is /generate, not /generate-experiment
-    const response = await retryWithBackoff(() =>
-      fetch(`${EXPERIMENT_SERVER_URL}/generate`, {
+    const deadline = Date.now() + EXPERIMENT_TIMEOUT_MS
+    const response = await retryWithBackoff(() => {
+      const remainingMs = Math.max(0, deadline - Date.now())
+      return fetch(`${EXPERIMENT_SERVER_URL}/generate`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          "X-Request-Timeout": (remainingMs / 1000).toFixed(1),
         },
+        signal: AbortSignal.timeout(remainingMs),
         body: JSON.stringify({
-          prompt: prompt.trim(),
+          prompt,
           template_hint: null, // Can be enhanced later
         }),
-      }),
-    )
+      })
+    })
 
     if (!response.ok) {
       const errorData = await response.text()
@@ -103,9 +80,6 @@ export async function POST(request: NextRequest) {
 
     const pythonResponse = await response.json()
 
-    // Python returns: { success: bool, config?: dict, html_code?: str, error?: str }
-    // Frontend expects: { id, title, description, code, parameters, instructions }
-    
     if (!pythonResponse.success) {
       return NextResponse.json(
         { error: pythonResponse.error || "Failed to generate experiment" },
@@ -113,65 +87,16 @@ export async function POST(request: NextRequest) {
       )
     }
 
-    // Transform Python response to frontend format
-    const experimentData: any = {
-      id: `custom-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`,
-      title: title || pythonResponse.config?.title || "Custom Experiment",
-      description: description || pythonResponse.config?.description || "AI-generated experiment",
-      code: pythonResponse.html_code || "",
-      parameters: [],
-      instructions: [],
-    }
-
-    // Extract parameters from config if available
-    if (pythonResponse.config) {
-      // Try to extract parameters from config
-      if (pythonResponse.config.parameters) {
-        experimentData.parameters = pythonResponse.config.parameters
-      } else if (pythonResponse.config.params) {
-        // Convert params to parameters format
-        experimentData.parameters = Object.entries(pythonResponse.config.params).map(([name, value]: [string, any]) => ({
-          name,
-          label: name.charAt(0).toUpperCase() + name.slice(1).replace(/_/g, " "),
-          type: typeof value === "number" ? "number" : typeof value === "boolean" ? "boolean" : "select",
-          default: value,
-        }))
-      }
-
-      // Extract instructions if available
-      if (pythonResponse.config.instructions) {
-        experimentData.instructions = pythonResponse.config.instructions
-      } else {
-        experimentData.instructions = [
-          "Review the generated experiment code",
-          "Adjust parameters to see different behaviors",
-          "Explore the interactive features",
-        ]
-      }
-    } else {
-      // Default parameters if no config
-      experimentData.parameters = [
-        {
-          name: "speed",
-          label: "Animation Speed",
-          type: "number",
-          min: 0.1,
-          max: 5,
-          default: 1,
-          step: 0.1,
-        },
-      ]
-      experimentData.instructions = [
-        "Review the generated experiment",
-        "Interact with the controls",
-        "Observe the simulation behavior",
-      ]
-    }
+    const experimentData = toExperimentData(pythonResponse, title, description)
 
     return NextResponse.json(experimentData)
   } catch (error) {
     console.error("Generate Experiment Error:", error)
 
+    if (error instanceof Error && error.name === "TimeoutError") {
+      return NextResponse.json({ error: "Experiment generation timed out. Please try again." }, { status: 504 })
+    }
+
     if (error instanceof Error && error.message.includes("429")) {
       return NextResponse.json(
         {
@@ -0,0 +1,105 @@
+import { type NextRequest, NextResponse } from "next/server"
+import { EXPERIMENT_SERVER_URL, EXPERIMENT_TIMEOUT_MS, buildPrompt, toExperimentData } from "../experiment"
+
+// Streaming variant of /api/generate-experiment: relays the Python server's
+// Server-Sent Events (prompt_built, token, parsed, validated, rendered, ...)
+// as they happen. The final result event is converted to the frontend's
+// experiment format, or replaced by an error event if generation failed.
+// Closing the connection cancels the generation, Ollama request included.
+
+// One SSE block ("event: ...\ndata: ...") from the Python server
+function rewriteEvent(block: string, title?: string, description?: string): string {
+  const event = block.match(/^event: (.*)$/m)?.[1]
+  const data = block.match(/^data: (.*)$/m)?.[1]
+  if (event !== "result" || !data) {
+    return block
+  }
+
+  const pythonResponse = JSON.parse(data)
+  if (!pythonResponse.success) {
+    const error = {
+      error: pythonResponse.error || "Failed to generate experiment",
+      suggestions: pythonResponse.suggestions || [],
+    }
+    return `event: error\ndata: ${JSON.stringify(error)}`
+  }
+  return `event: result\ndata: ${JSON.stringify(toExperimentData(pythonResponse, title, description))}`
+}
+
+export async function POST(request: NextRequest) {
+  try {
+    const { title, description, files } = await request.json()
+
+    if (!title && !description && (!files || files.length === 0)) {
+      return NextResponse.json({ error: "Please provide a title, description, or files" }, { status: 400 })
+    }
+
+    console.log(`[Experiment API] Streaming request from Python server at ${EXPERIMENT_SERVER_URL}`)
+
+    // No retries here: events may already have reached the client. The Python
+    // server retries model calls itself within the X-Request-Timeout budget.
+    const response = await fetch(`${EXPERIMENT_SERVER_URL}/generate/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-Request-Timeout": (EXPERIMENT_TIMEOUT_MS / 1000).toFixed(1),
+      },
+      // Client went away: drop the upstream connection so the server cancels
+      signal: request.signal,
+      body: JSON.stringify({
+        prompt: buildPrompt(title, description, files),
+        template_hint: null,
+      }),
+    })
+
+    if (!response.ok || !response.body) {
+      const errorData = await response.text()
+      console.error(`[Experiment API] Server error (${response.status}):`, errorData)
+
+      if (response.status === 503) {
+        return NextResponse.json(
+          { error: "Experiment service is unavailable. Please ensure the Python server is running on port 8001." },
+          { status: 503 },
+        )
+      }
+
+      return NextResponse.json({ error: "Failed to generate experiment" }, { status: response.status || 500 })
+    }
+
+    const decoder = new TextDecoder()
+    const encoder = new TextEncoder()
+    let buffer = ""
+    const events = new TransformStream<Uint8Array, Uint8Array>({
+      transform(chunk, controller) {
+        buffer += decoder.decode(chunk, { stream: true })
+        const blocks = buffer.split("\n\n")
+        // The last piece is an incomplete event (or empty)
+        buffer = blocks.pop() || ""
+        for (const block of blocks) {
+          controller.enqueue(encoder.encode(`${rewriteEvent(block, title, description)}\n\n`))
+        }
+      },
+      flush(controller) {
+        if (buffer) {
+          controller.enqueue(encoder.encode(buffer))
+        }
+      },
+    })
+
+    return new Response(response.body.pipeThrough(events), {
+      headers: {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+      },
+    })
+  } catch (error) {
+    console.error("Generate Experiment Stream Error:", error)
+
+    if (error instanceof Error && error.name === "AbortError") {
+      return new Response(null, { status: 499 })
+    }
+
+    return NextResponse.json({ error: "Internal server error" }, { status: 500 })
+  }
+}
@@ -0,0 +1,89 @@
+"""
+Early-stop benchmark - Compares a full non-streamed generation against a
+streamed one that stops once the JSON config is complete, over the example
+prompts of every template.
+
+Uses the configured backend (LLM_BACKEND / OLLAMA_BASE_URL), e.g.:
+
+    cd backend
+    python -m benchmarks.bench_early_stop --out early_stop.json
+    LLM_BACKEND=stub python -m benchmarks.bench_early_stop
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_utils import save_results, summarize_latencies
+from create_experiment.ollama_client import OllamaClient
+from create_experiment.prompt_engine import PromptEngine
+
+
+def example_prompts(engine: PromptEngine):
+    for template_id, info in engine.get_all_templates().items():
+        for example in info["examples"]:
+            yield template_id, example
+
+
+async def run(args):
+    engine = PromptEngine()
+    client = OllamaClient()
+    rows = []
+
+    for template_id, prompt_text in example_prompts(engine):
+        ai_prompt = engine.build_prompt(prompt_text)
+        kwargs = {"temperature": args.temperature}
+        if args.structured:
+            output_format, max_tokens = engine.build_output_format(prompt_text)
+            kwargs.update(format=output_format, max_tokens=max_tokens)
+        options = client.sampling_options(kwargs["temperature"], kwargs.get("max_tokens", 2000))
+
+        start = time.perf_counter()
+        full = await client.backend.generate(ai_prompt, options, format=kwargs.get("format"))
+        full_ms = (time.perf_counter() - start) * 1000
+
+        streamed = await client.generate_until_json(ai_prompt, **kwargs)
+
+        row = {
+            "template": template_id,
+            "prompt": prompt_text,
+            "full_tokens": full.completion_tokens,
+            "full_ms": full_ms,
+            "full_parsed": engine.extract_json(full.text) is not None,
+            "stream_tokens": streamed.tokens,
+            "stream_ms": streamed.elapsed_ms,
+            "stopped_early": streamed.stopped_early,
+        }
+        rows.append(row)
+        print(f"{prompt_text[:45]:<45} tokens {row['full_tokens']:>5} -> {row['stream_tokens']:>5}  "
+              f"latency {full_ms:8.0f} -> {streamed.elapsed_ms:8.0f} ms")
+
+    full_tokens = sum(r["full_tokens"] for r in rows)
+    stream_tokens = sum(r["stream_tokens"] for r in rows)
+    summary = {
+        "prompts": len(rows),
+        "full_tokens_total": full_tokens,
+        "stream_tokens_total": stream_tokens,
+        "tokens_saved_pct": (1 - stream_tokens / full_tokens) * 100 if full_tokens else 0.0,
+        "stopped_early": sum(1 for r in rows if r["stopped_early"]),
+        "full_latency": summarize_latencies([r["full_ms"] for r in rows]),
+        "stream_latency": summarize_latencies([r["stream_ms"] for r in rows]),
+    }
+    print(f"\nTokens: {full_tokens} -> {stream_tokens} ({summary['tokens_saved_pct']:.1f}% saved)")
+    print(f"p50 latency: {summary['full_latency']['p50_ms']:.0f} -> {summary['stream_latency']['p50_ms']:.0f} ms")
+    return {"config": vars(args), "summary": summary, "results": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure tokens and latency saved by JSON early stop")
+    parser.add_argument("--structured", action="store_true", help="also constrain output with the JSON schema")
+    parser.add_argument("--temperature", type=float, default=0.0)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+JSON extraction benchmark - PromptEngine.extract_json against the previous
+nested-regex extractor on a corpus of model response shapes
+(data/model_outputs.json) and on large adversarial responses: long prose
+full of unbalanced braces, deep nesting, customCode with many braces.
+
+Reports how many corpus responses each extractor gets right and the time
+per response as inputs grow:
+
+    cd backend
+    python -m benchmarks.bench_extract_json --sizes 1000 10000 100000 --out extract_json.json
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.bench_utils import DATA_DIR, save_results, summarize_latencies
+from create_experiment.prompt_engine import PromptEngine
+
+CORPUS_PATH = os.path.join(DATA_DIR, "model_outputs.json")
+
+_CONFIG = '{"template": "network", "params": {"nodeCount": 8, "packetRate": 2}, "title": "Net", "description": "A small network"}'
+
+
+def legacy_extract_json(response: str) -> Optional[Dict[str, Any]]:
+    """The previous extract_json: two-level brace regex, whole text, then a fence"""
+    json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(0))
+        except json.JSONDecodeError:
+            pass
+    try:
+        return json.loads(response.strip())
+    except json.JSONDecodeError:
+        pass
+    code_block_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
+    if code_block_match:
+        try:
+            return json.loads(code_block_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def adversarial(size: int) -> Dict[str, str]:
+    """Responses of roughly `size` characters that stress brace matching"""
+    return {
+        # Brace-opening prose that never closes, config at the end
+        "unclosed_prose": "{ see " * (size // 6) + _CONFIG,
+        # Many small balanced non-JSON spans before the config
+        "brace_noise": "{x} " * (size // 4) + _CONFIG,
+        # Spans that look like JSON objects until their second token
+        "json_like_noise": '{"a" x} ' * (size // 8) + _CONFIG,
+        # An unterminated fence full of braces, config at the end
+        "open_fence": "```json\n" + "{x} " * (size // 4) + _CONFIG,
+        # Config whose params hold many objects nested four levels deep
+        "deep_nesting": '{"template": "generic", "params": {"graph": ['
+                        + ", ".join(['{"a": {"b": {"c": {"d": 1}}}}'] * (size // 30))
+                        + ']}, "title": "Deep", "description": "Deeply nested"}',
+        # customCode string full of braces and quotes
+        "custom_code": '{"template": "generic", "params": {"customCode": "'
+                       + "function f() { if (a) { g(\\\"}\\\"); } } " * (size // 40)
+                       + '"}, "title": "Code", "description": "Lots of code"}',
+        # Nested spans that each fail to decode right after they open
+        "nested_invalid": '{"a": 1 x ' * (size // 10) + "}" * (size // 10),
+        # Opening braces with no closing brace at all
+        "no_close": "{" * size,
+    }
+
+
+def found_config(result: Optional[Dict[str, Any]]) -> bool:
+    return isinstance(result, dict) and "template" in result
+
+
+def time_calls(func: Callable[[str], Any], text: str, iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(args) -> Dict[str, Any]:
+    logging.getLogger("create_experiment.prompt_engine").setLevel(logging.CRITICAL)
+    engine = PromptEngine()
+    extractors = {"legacy": legacy_extract_json, "scanner": engine.extract_json}
+
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)["responses"]
+    accuracy = {}
+    for name, extract in extractors.items():
+        wrong = [e["name"] for e in corpus if extract(e["response"]) != e["expected"]]
+        accuracy[name] = {"correct": len(corpus) - len(wrong), "total": len(corpus), "wrong": wrong}
+        print(f"{name:<8} corpus {len(corpus) - len(wrong)}/{len(corpus)} correct"
+              + (f"  (wrong: {', '.join(wrong)})" if wrong else ""))
+
+    corpus_ms = {
+        name: summarize_latencies([t for e in corpus for t in time_calls(extract, e["response"], args.iterations)])
+        for name, extract in extractors.items()
+    }
+    print(f"corpus p50: legacy {corpus_ms['legacy']['p50_ms'] * 1000:.1f} us, "
+          f"scanner {corpus_ms['scanner']['p50_ms'] * 1000:.1f} us\n")
+
+    print(f"{'case':<16} {'chars':>8} {'legacy':>12} {'scanner':>12} {'legacy cfg':>10} {'scanner cfg':>11}")
+    rows = []
+    for size in args.sizes:
+        for case, text in adversarial(size).items():
+            row = {"case": case, "chars": len(text)}
+            for name, extract in extractors.items():
+                iterations = args.iterations if size <= 10000 else max(1, args.iterations // 10)
+                row[name] = summarize_latencies(time_calls(extract, text, iterations))
+                row[f"{name}_found"] = found_config(extract(text))
+            rows.append(row)
+            print(f"{case:<16} {len(text):>8} {row['legacy']['p50_ms']:>10.2f}ms {row['scanner']['p50_ms']:>10.2f}ms "
+                  f"{str(row['legacy_found']):>10} {str(row['scanner_found']):>11}")
+
+    return {"config": vars(args), "accuracy": accuracy, "corpus": corpus_ms, "adversarial": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction from model responses")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
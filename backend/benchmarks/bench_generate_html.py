@@ -0,0 +1,82 @@
+"""
+HTML rendering benchmark - Time of CodeGenerator.generate_html per template,
+rendering from scratch (cache disabled) versus served from the render cache.
+
+    cd backend
+    python -m benchmarks.bench_generate_html --iterations 2000 --out render.json
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+
+from benchmarks.bench_utils import save_results, summarize_latencies
+from create_experiment.code_generator import CodeGenerator
+from create_experiment.validator import ConfigValidator
+
+
+def sample_configs() -> Dict[str, Dict[str, Any]]:
+    """One default config per template, plus the generic variants"""
+    validator = ConfigValidator()
+    configs = {}
+    for template_id in ("network", "particles", "flocking", "waves", "generic"):
+        configs[template_id] = {
+            "template": template_id,
+            "params": validator.get_defaults(template_id),
+            "title": f"Benchmark {template_id}",
+            "description": f"Rendering benchmark for the {template_id} template",
+        }
+    configs["generic:sorting"] = {
+        **configs["generic"], "params": {"experimentType": "bubble-sort", "arraySize": 30},
+    }
+    configs["generic:graph"] = {
+        **configs["generic"], "params": {"experimentType": "graph-traversal", "nodeCount": 12},
+    }
+    return configs
+
+
+def time_renders(generator: CodeGenerator, config: Dict[str, Any], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        generator.generate_html(config)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(args) -> Dict[str, Any]:
+    uncached = CodeGenerator(cache_size=0)
+    cached = CodeGenerator(cache_size=64)
+    results = {}
+
+    print(f"{'template':<18} {'bytes':>8} {'render p50':>12} {'cached p50':>12} {'speedup':>8}")
+    for name, config in sample_configs().items():
+        html = uncached.generate_html(config)
+        cold = time_renders(uncached, config, args.iterations)
+        cached.generate_html(config)
+        warm = time_renders(cached, config, args.iterations)
+
+        results[name] = {
+            "bytes": len(html.encode("utf-8")),
+            "render": summarize_latencies(cold),
+            "cached": summarize_latencies(warm),
+        }
+        cold_p50, warm_p50 = results[name]["render"]["p50_ms"], results[name]["cached"]["p50_ms"]
+        print(f"{name:<18} {results[name]['bytes']:>8} {cold_p50 * 1000:>10.1f}us {warm_p50 * 1000:>10.1f}us "
+              f"{cold_p50 / warm_p50 if warm_p50 else float('inf'):>7.1f}x")
+
+    return {"config": vars(args), "results": results, "cache": cached.cache_stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_html with and without the render cache")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
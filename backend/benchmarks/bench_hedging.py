@@ -0,0 +1,122 @@
+"""
+Hedging benchmark - Latency percentiles and valid-config rate of /generate's
+model call with hedging off and on, against the stub backend with injected
+faults: a share of generations runs slow_factor times longer and another
+share is cut off halfway (no valid config).
+
+Each mode runs the same requests; a request is valid when its returned
+response parses and validates like /generate would accept it:
+
+    cd backend
+    python -m benchmarks.bench_hedging --requests 200 --slow-rate 0.1 --invalid-rate 0.1 --out hedging.json
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.bench_utils import load_data, save_results, summarize_latencies
+from create_experiment.ollama_client import OllamaClient
+from create_experiment.prompt_engine import PromptEngine
+from create_experiment.validator import ConfigValidator
+from llm.stub_backend import StubBackend
+
+
+def parse_modes(specs: List[str]) -> Dict[str, Dict[str, float]]:
+    """"1" -> no hedging, "2@0.5" -> 2 attempts with a 0.5 s hedge delay"""
+    modes = {}
+    for spec in specs:
+        attempts, _, delay = spec.partition("@")
+        name = "off" if attempts == "1" else f"{attempts} attempts, {delay or 0}s delay"
+        modes[name] = {"attempts": int(attempts), "delay_s": float(delay or 0)}
+    return modes
+
+
+async def run_mode(client: OllamaClient, prompts: List[str], accept, mode: Dict[str, float], args) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, valid, launched = [], 0, 0
+
+    async def one(prompt: str):
+        nonlocal valid, launched
+        async with semaphore:
+            start = time.perf_counter()
+            result = await client.generate_hedged(
+                prompt, accept,
+                attempts=int(mode["attempts"]),
+                delay_s=mode["delay_s"],
+                stream=args.stream,
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            valid += result.value is not None
+            launched += result.launched
+
+    await asyncio.gather(*(one(p) for p in prompts))
+    return {
+        "latency": summarize_latencies(latencies),
+        "valid_rate": valid / len(prompts),
+        "generations_per_request": launched / len(prompts),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    engine = PromptEngine()
+    validator = ConfigValidator()
+    backend = StubBackend(
+        model="stub",
+        latency_ms=args.latency_ms,
+        tokens_per_s=args.tokens_per_s,
+        slow_rate=args.slow_rate,
+        slow_factor=args.slow_factor,
+        invalid_rate=args.invalid_rate,
+        # One shared "last prompt" would make whichever request ran last look
+        # faster and mostly measure interleaving
+        prefix_cache=False,
+    )
+    client = OllamaClient(backend=backend)
+
+    def accept(text: str) -> Optional[Dict[str, Any]]:
+        config = engine.extract_json(text)
+        return config if config and validator.validate(config)[0] else None
+
+    user_prompts = load_data("prompts.json")["generate"]
+    prompts = [engine.build_prompt(user_prompts[i % len(user_prompts)]) for i in range(args.requests)]
+
+    results = {}
+    print(f"{'mode':<26} {'p50':>8} {'p95':>8} {'p99':>8} {'valid':>7} {'gens/req':>9}")
+    for name, mode in parse_modes(args.modes).items():
+        # Same fault draws for every mode's first attempts
+        random.seed(args.seed)
+        row = await run_mode(client, prompts, accept, mode, args)
+        results[name] = {**mode, **row}
+        latency = row["latency"]
+        print(f"{name:<26} {latency['p50_ms']:>6.0f}ms {latency['p95_ms']:>6.0f}ms {latency['p99_ms']:>6.0f}ms "
+              f"{row['valid_rate'] * 100:>6.1f}% {row['generations_per_request']:>9.2f}")
+    return {"config": vars(args), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged generations against a faulty stub backend")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", default=["1", "2@0.6", "2@0", "3@0.4"],
+                        help="attempts[@hedge delay in seconds]; 1 = hedging off")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-s", type=float, default=400.0)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--slow-factor", type=float, default=5.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.1)
+    parser.add_argument("--stream", action="store_true", help="stream each attempt (generate_until_json)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(run(args))
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Minification/compression benchmark - Bytes saved per template by the
+CodeGenerator minify stage and by response compression, and the CPU each
+step adds on top of rendering.
+
+    cd backend
+    python -m benchmarks.bench_minify --iterations 500 --out minify.json
+"""
+import argparse
+import gzip
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.bench_generate_html import sample_configs
+from benchmarks.bench_utils import save_results, summarize_latencies
+from compression import brotli, compress
+from create_experiment.code_generator import CodeGenerator
+from create_experiment.minifier import minify_html
+
+
+def time_calls(func: Callable[[], Any], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def payload(html: str) -> bytes:
+    """/generate response body the HTML travels in"""
+    return json.dumps({"success": True, "html_code": html}).encode("utf-8")
+
+
+def run(args) -> Dict[str, Any]:
+    generator = CodeGenerator(cache_size=0)
+    encodings = ["gzip"] + (["br"] if brotli else [])
+    results = {}
+
+    header = f"{'template':<18} {'raw':>7} {'min':>7} {'saved':>6} " + " ".join(
+        f"{e + ' raw':>8} {e + ' min':>8}" for e in encodings
+    ) + f" {'render':>9} {'minify':>9} {'gzip':>9}"
+    print(header)
+    for name, config in sample_configs().items():
+        html = generator.generate_html(config)
+        minified = minify_html(html)
+        raw_payload, min_payload = payload(html), payload(minified)
+
+        row = {
+            "html_bytes": len(html.encode("utf-8")),
+            "minified_bytes": len(minified.encode("utf-8")),
+            "payload_bytes": len(raw_payload),
+            "minified_payload_bytes": len(min_payload),
+            "compressed": {
+                encoding: {"raw": len(compress(raw_payload, encoding)), "minified": len(compress(min_payload, encoding))}
+                for encoding in encodings
+            },
+            "render": summarize_latencies(time_calls(lambda: generator.generate_html(config), args.iterations)),
+            "minify": summarize_latencies(time_calls(lambda: minify_html(html), args.iterations)),
+            "gzip": summarize_latencies(time_calls(lambda: gzip.compress(min_payload, 6), args.iterations)),
+        }
+        row["saved_pct"] = (1 - row["minified_bytes"] / row["html_bytes"]) * 100
+        results[name] = row
+
+        sizes = " ".join(
+            f"{row['compressed'][e]['raw']:>8} {row['compressed'][e]['minified']:>8}" for e in encodings
+        )
+        print(f"{name:<18} {row['html_bytes']:>7} {row['minified_bytes']:>7} {row['saved_pct']:>5.1f}% {sizes} "
+              f"{row['render']['p50_ms'] * 1000:>7.1f}us {row['minify']['p50_ms'] * 1000:>7.1f}us "
+              f"{row['gzip']['p50_ms'] * 1000:>7.1f}us")
+
+    total_raw = sum(r["payload_bytes"] for r in results.values())
+    total_wire = sum(r["compressed"]["gzip"]["minified"] for r in results.values())
+    summary = {
+        "payload_bytes": total_raw,
+        "minified_gzip_bytes": total_wire,
+        "wire_saved_pct": (1 - total_wire / total_raw) * 100 if total_raw else 0.0,
+    }
+    print(f"\n/generate payloads: {total_raw} -> {total_wire} bytes on the wire "
+          f"with minify + gzip ({summary['wire_saved_pct']:.1f}% saved)")
+    return {"config": vars(args), "summary": summary, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes saved and CPU spent by minification and compression")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Prompt prefix benchmark - Prompt-eval time per /generate prompt with the
+request placed in the middle of the prompt (the old layout) versus the
+static prefix + per-request suffix layout, whose prefix the model server can
+keep cached between requests.
+
+Runs every template example back to back against the configured backend
+(LLM_BACKEND / OLLAMA_BASE_URL), generating a single token per call:
+
+    cd backend
+    python -m benchmarks.bench_prompt_prefix --rounds 3 --out prefix.json
+    LLM_BACKEND=stub python -m benchmarks.bench_prompt_prefix
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from benchmarks.bench_utils import save_results, summarize_latencies
+from create_experiment.ollama_client import OllamaClient
+from create_experiment.prompt_engine import PromptEngine
+
+
+def legacy_prompt(engine: PromptEngine, user_prompt: str) -> str:
+    """The pre-prefix layout: user request right before the instructions"""
+    request_line = engine.build_prompt_suffix(user_prompt).split("\n", 1)[0]
+    return engine.prompt_prefix.replace("Instructions:", f"{request_line}\n\nInstructions:", 1)
+
+
+async def measure(client: OllamaClient, prompts: List[str], rounds: int) -> Dict[str, Any]:
+    eval_ms: List[float] = []
+    eval_tokens: List[int] = []
+    for _ in range(rounds):
+        for prompt in prompts:
+            result = await client.generate_response(prompt, temperature=0.0, max_tokens=1)
+            eval_ms.append(result.prompt_eval_ms)
+            eval_tokens.append(result.prompt_tokens)
+    return {
+        "prompt_eval": summarize_latencies(eval_ms),
+        "prompt_tokens_mean": sum(eval_tokens) / len(eval_tokens) if eval_tokens else 0,
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    # Full prompt for every request, so only the layout differs
+    engine = PromptEngine(few_shot="all")
+    client = OllamaClient()
+    await client.start()
+    try:
+        examples = [e for info in engine.get_all_templates().values() for e in info["examples"]]
+        layouts = {
+            "request_in_middle": [legacy_prompt(engine, e) for e in examples],
+            "static_prefix": [engine.build_prompt(e) for e in examples],
+        }
+        results = {}
+        for name, prompts in layouts.items():
+            # One unmeasured call so both layouts start with the model loaded
+            await client.generate_response(prompts[0], temperature=0.0, max_tokens=1)
+            results[name] = await measure(client, prompts, args.rounds)
+            stats = results[name]["prompt_eval"]
+            print(f"{name:<18} prompt eval p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  "
+                  f"evaluated tokens {results[name]['prompt_tokens_mean']:7.0f}")
+    finally:
+        await client.close()
+    return {"config": vars(args), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt-eval time of both prompt layouts")
+    parser.add_argument("--rounds", type=int, default=2, help="passes over the example prompts")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Refinement benchmark - Prompt and completion tokens of a /refine call
+(current config + change request -> params patch) against regenerating the
+experiment with a full /generate prompt, for every few-shot example config
+and a set of typical change requests.
+
+Tokens use PromptEngine.estimate_tokens; the model time column applies the
+stub backend's prompt-eval and generation rates (no prefix cache) to them:
+
+    cd backend
+    python -m benchmarks.bench_refine --out refine.json
+"""
+import argparse
+import json
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.bench_utils import save_results
+from create_experiment.prompt_engine import PromptEngine
+from create_experiment.schema import TEMPLATE_PARAMS
+from llm.stub_backend import StubBackend
+
+CHANGES = ["more of them", "make it slower", "use different colors"]
+
+
+def example_patch(config: Dict[str, Any]) -> Dict[str, Any]:
+    """A typical one-param answer to a change request"""
+    for name, spec in TEMPLATE_PARAMS[config["template"]].items():
+        if spec["type"] in ("int", "float") and name in config["params"]:
+            return {"params": {name: spec["max"]}}
+        if spec["type"] == "select" and name in config["params"]:
+            return {"params": {name: spec["options"][-1]}}
+    return {"params": {}}
+
+
+def model_seconds(stub: StubBackend, prompt: str, completion_tokens: int) -> float:
+    return stub.prompt_eval_seconds(prompt) + completion_tokens / stub.tokens_per_s
+
+
+def compare(engine: PromptEngine, stub: StubBackend, example: Dict[str, Any], change: str) -> Dict[str, Any]:
+    config = example["config"]
+    full_prompt = engine.build_prompt(f"{example['prompt']}, {change}")
+    full_completion = json.dumps(config, indent=2)
+    refine_prompt = engine.build_refinement_prompt(config, change)
+    refine_completion = json.dumps(example_patch(config))
+
+    row = {"template": config["template"], "prompt": example["prompt"], "change": change}
+    for mode, prompt, completion in (("generate", full_prompt, full_completion),
+                                     ("refine", refine_prompt, refine_completion)):
+        completion_tokens = engine.estimate_tokens(completion)
+        row[mode] = {
+            "prompt_tokens": engine.estimate_tokens(prompt),
+            "completion_tokens": completion_tokens,
+            "model_s": model_seconds(stub, prompt, completion_tokens),
+        }
+    return row
+
+
+def totals(rows: List[Dict[str, Any]], mode: str) -> Tuple[int, int, float]:
+    return (
+        sum(r[mode]["prompt_tokens"] for r in rows),
+        sum(r[mode]["completion_tokens"] for r in rows),
+        sum(r[mode]["model_s"] for r in rows),
+    )
+
+
+def run(args) -> Dict[str, Any]:
+    engine = PromptEngine()
+    stub = StubBackend(model="stub", prefix_cache=False)
+    rows = [compare(engine, stub, example, change) for example in engine.few_shot_examples for change in CHANGES]
+
+    print(f"{'template':<10} {'generate prompt/completion':>27} {'refine prompt/completion':>25} {'model time':>16}")
+    for template_id in TEMPLATE_PARAMS:
+        subset = [r for r in rows if r["template"] == template_id]
+        if not subset:
+            continue
+        gp, gc, gs = totals(subset, "generate")
+        rp, rc, rs = totals(subset, "refine")
+        n = len(subset)
+        print(f"{template_id:<10} {gp / n:>16.0f} / {gc / n:<8.0f} {rp / n:>14.0f} / {rc / n:<8.0f} "
+              f"{gs / n:>6.2f}s -> {rs / n:.2f}s")
+
+    gp, gc, gs = totals(rows, "generate")
+    rp, rc, rs = totals(rows, "refine")
+    summary = {
+        "requests": len(rows),
+        "prompt_tokens_saved_pct": (1 - rp / gp) * 100,
+        "completion_tokens_saved_pct": (1 - rc / gc) * 100,
+        "model_time_saved_pct": (1 - rs / gs) * 100,
+    }
+    print(f"\n{len(rows)} refinements: prompt tokens -{summary['prompt_tokens_saved_pct']:.0f}%, "
+          f"completion tokens -{summary['completion_tokens_saved_pct']:.0f}%, "
+          f"model time -{summary['model_time_saved_pct']:.0f}%")
+    return {"config": vars(args), "summary": summary, "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare /refine and /generate token costs")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
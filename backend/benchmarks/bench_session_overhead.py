@@ -0,0 +1,110 @@
+"""
+Session overhead benchmark - Per-call cost of talking to Ollama through a new
+aiohttp session per request versus the long-lived pooled session opened by
+OllamaBackend.start().
+
+A tiny in-process fake of /api/generate answers instantly, so the numbers are
+pure client/connection overhead (session setup, TCP connect, DNS):
+
+    cd backend
+    python -m benchmarks.bench_session_overhead --calls 500 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+from benchmarks.bench_utils import save_results, summarize_latencies
+from llm.ollama_backend import OllamaBackend
+
+
+async def _fake_generate(request: web.Request) -> web.Response:
+    await request.read()
+    return web.json_response({
+        "response": "{}",
+        "done": True,
+        "prompt_eval_count": 1,
+        "eval_count": 1,
+    })
+
+
+async def _start_fake_server(port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post("/api/generate", _fake_generate)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def _measure(backend: OllamaBackend, calls: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    remaining = iter(range(calls))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await backend.generate("ping")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - start
+    return {
+        "calls": calls,
+        "concurrency": concurrency,
+        "wall_s": wall_s,
+        "calls_per_s": calls / wall_s if wall_s else 0.0,
+        "latency": summarize_latencies(latencies),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    runner = await _start_fake_server(args.port)
+    base_url = f"http://{args.host}:{args.port}"
+    results = {}
+    try:
+        for concurrency in (1, args.concurrency):
+            # Before: no start(), so every call opens and tears down its own session
+            per_call = OllamaBackend("bench", base_url=base_url)
+            await _measure(per_call, args.warmup, concurrency)
+            before = await _measure(per_call, args.calls, concurrency)
+
+            # After: one pooled keep-alive session for all calls
+            pooled = OllamaBackend("bench", base_url=base_url, pool_limit=max(concurrency, 1))
+            await pooled.start()
+            try:
+                await _measure(pooled, args.warmup, concurrency)
+                after = await _measure(pooled, args.calls, concurrency)
+            finally:
+                await pooled.close()
+
+            results[f"c{concurrency}"] = {"per_call_session": before, "pooled_session": after}
+            print(f"concurrency {concurrency:>3}: "
+                  f"p50 {before['latency']['p50_ms']:6.2f} -> {after['latency']['p50_ms']:6.2f} ms  "
+                  f"p99 {before['latency']['p99_ms']:6.2f} -> {after['latency']['p99_ms']:6.2f} ms  "
+                  f"{before['calls_per_s']:7.0f} -> {after['calls_per_s']:7.0f} calls/s")
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-call vs pooled aiohttp sessions")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--host", default="localhost", help="use a hostname to include DNS lookups")
+    parser.add_argument("--port", type=int, default=11499)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.out:
+        save_results(args.out, {"config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Template detection benchmark - The compiled keyword matcher behind
+PromptEngine.select_template against the previous substring loops: time per
+prompt over a large synthetic corpus, and an accuracy table on labelled
+prompts (data/few_shot_eval.json plus the substring traps in
+data/template_detection.json, e.g. "street", "resort", "graphene").
+
+    cd backend
+    python -m benchmarks.bench_template_detection --corpus 10000 --out detection.json
+"""
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.bench_utils import load_data, save_results, summarize_latencies
+from create_experiment.prompt_engine import PromptEngine
+
+FILLER = ("please", "show", "me", "a", "simple", "colorful", "interactive", "demo", "of", "with",
+          "the", "that", "looks", "nice", "on", "screen", "and", "some", "controls", "for", "students")
+
+
+def legacy_select_template(engine: PromptEngine, user_prompt: str) -> Optional[str]:
+    """The previous select_template: substring checks over the keyword lists"""
+    prompt_lower = user_prompt.lower()
+    if any(keyword in prompt_lower for keyword in engine.generic_keywords):
+        return "generic"
+    scores = sorted(
+        (sum(1 for keyword in info["keywords"] if keyword in prompt_lower), template_id)
+        for template_id, info in engine.templates.items()
+    )
+    (second, _), (best, best_id) = scores[-2], scores[-1]
+    if best == 0 or best == second:
+        return None
+    return best_id
+
+
+def synthetic_corpus(prompts: List[str], size: int, seed: int) -> List[str]:
+    """Labelled and load-test prompts padded with filler to 5-60 words"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        words = prompts[i % len(prompts)].split()
+        for _ in range(rng.randint(0, 50)):
+            words.insert(rng.randint(0, len(words)), rng.choice(FILLER))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def accuracy_table(detectors: Dict[str, Callable[[str], Optional[str]]], labelled: List[Dict[str, Any]]) -> Dict[str, Any]:
+    labels = sorted({str(item["template"]) for item in labelled})
+    table = {}
+    for name, detect in detectors.items():
+        hits = {label: [0, 0] for label in labels}
+        for item in labelled:
+            label = str(item["template"])
+            hits[label][1] += 1
+            hits[label][0] += detect(item["prompt"]) == item["template"]
+        table[name] = {label: {"correct": c, "total": t} for label, (c, t) in hits.items()}
+        table[name]["all"] = {"correct": sum(c for c, _ in hits.values()), "total": len(labelled)}
+    return table
+
+
+def time_per_prompt(detect: Callable[[str], Any], corpus: List[str], rounds: int) -> List[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for prompt in corpus:
+            detect(prompt)
+        timings.append((time.perf_counter() - start) * 1000 / len(corpus))
+    return timings
+
+
+def run(args) -> Dict[str, Any]:
+    engine = PromptEngine()
+    detectors = {
+        "substring": lambda prompt: legacy_select_template(engine, prompt),
+        "compiled": engine.select_template,
+    }
+
+    labelled = load_data("few_shot_eval.json") + load_data("template_detection.json")
+    table = accuracy_table(detectors, labelled)
+    labels = [label for label in table["compiled"] if label != "all"] + ["all"]
+    print(f"{'expected':<10} " + " ".join(f"{name:>10}" for name in detectors))
+    for label in labels:
+        cells = " ".join(f"{table[n][label]['correct']:>6}/{table[n][label]['total']:<3}" for n in detectors)
+        print(f"{label:<10} {cells}")
+    disagreements = [
+        {"prompt": item["prompt"], "expected": item["template"],
+         **{name: detect(item["prompt"]) for name, detect in detectors.items()}}
+        for item in labelled
+        if len({detect(item["prompt"]) for detect in detectors.values()}) > 1
+    ]
+    for row in disagreements:
+        print(f"  {row['prompt']!r}: expected {row['expected']}, "
+              + ", ".join(f"{name} {row[name]}" for name in detectors))
+
+    prompts = [item["prompt"] for item in labelled] + load_data("prompts.json")["generate"]
+    corpus = synthetic_corpus(prompts, args.corpus, args.seed)
+    timings = {name: summarize_latencies(time_per_prompt(detect, corpus, args.rounds)) for name, detect in detectors.items()}
+    print(f"\n{len(corpus)} prompts, {sum(len(p) for p in corpus) / len(corpus):.0f} chars on average")
+    for name, stats in timings.items():
+        print(f"{name:<10} p50 {stats['p50_ms'] * 1000:6.2f} us/prompt")
+
+    return {"config": vars(args), "accuracy": table, "disagreements": disagreements, "timings": timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword template detection")
+    parser.add_argument("--corpus", type=int, default=10000, help="synthetic prompts to time")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark helpers - Latency summaries and result files shared by the scripts
+in this folder
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Dict, List, Optional
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, Any]:
+    """p50/p95/p99 and friends for a list of latencies in milliseconds"""
+    if not latencies_ms:
+        return {"count": 0}
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": statistics.fmean(latencies_ms),
+        "min_ms": min(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": max(latencies_ms),
+    }
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Enough context to tell two result files apart"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(path: str, results: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": run_metadata(), **results}, f, indent=2)
+    print(f"Results saved to {path}")
+
+
+def load_data(name: str) -> Any:
+    with open(os.path.join(DATA_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
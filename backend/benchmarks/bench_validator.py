@@ -0,0 +1,187 @@
+"""
+Validator benchmark - Time per config for the compiled ConfigValidator
+versus the previous rule-interpreting validator (first error only), plus
+how many errors each reports and how many invalid configs sanitize repairs.
+
+The corpus is every few-shot example config, the template defaults and
+mutated copies of them (out of range, wrong type, unknown option, missing
+fields, several problems at once):
+
+    cd backend
+    python -m benchmarks.bench_validator --iterations 2000 --out validator.json
+"""
+import argparse
+import copy
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.bench_utils import save_results, summarize_latencies
+from create_experiment.prompt_engine import PromptEngine
+from create_experiment.schema import TEMPLATE_PARAMS
+from create_experiment.validator import ConfigValidator
+
+_LEGACY_TYPES = {"int": int, "float": (int, float), "select": str, "string": str}
+
+
+def legacy_schemas() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """The specs in the old validator's format (python types, "allowed")"""
+    schemas = {}
+    for template_id, params in TEMPLATE_PARAMS.items():
+        schemas[template_id] = {}
+        for name, spec in params.items():
+            rules = {"type": _LEGACY_TYPES[spec["type"]]}
+            rules.update({key: spec[key] for key in ("min", "max", "optional") if key in spec})
+            if "options" in spec:
+                rules["allowed"] = spec["options"]
+            schemas[template_id][name] = rules
+    return schemas
+
+
+def legacy_validate(schemas, config: Dict[str, Any]) -> Tuple[bool, str]:
+    """The previous ConfigValidator.validate: dict rules read per call, first error wins"""
+    for field in ("template", "params", "title", "description"):
+        if field not in config:
+            return False, f"Missing required field: {field}"
+    template = config["template"].lower()
+    if template not in schemas:
+        template = "generic"
+    params = config["params"]
+    if not isinstance(params, dict):
+        return False, "params must be a dictionary"
+    schema = schemas[template]
+    for name, value in params.items():
+        if name not in schema:
+            continue
+        rules = schema[name]
+        if rules.get("optional", False) and value is None:
+            continue
+        if not isinstance(value, rules["type"]):
+            return False, f"Parameter '{name}' must be of type {rules['type']}"
+        if "min" in rules and value < rules["min"]:
+            return False, f"Parameter '{name}' must be >= {rules['min']}"
+        if "max" in rules and value > rules["max"]:
+            return False, f"Parameter '{name}' must be <= {rules['max']}"
+        if "allowed" in rules and value not in rules["allowed"]:
+            return False, f"Parameter '{name}' must be one of {rules['allowed']}"
+    title, description = config.get("title", ""), config.get("description", "")
+    if not isinstance(title, str) or len(title) < 3:
+        return False, "Title must be a string with at least 3 characters"
+    if not isinstance(description, str) or len(description) < 10:
+        return False, "Description must be a string with at least 10 characters"
+    if len(title) > 100:
+        return False, "Title must be less than 100 characters"
+    if len(description) > 500:
+        return False, "Description must be less than 500 characters"
+    return True, ""
+
+
+def mutations(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Invalid variants of a valid config"""
+    specs = TEMPLATE_PARAMS[config["template"]]
+    numeric = [n for n, s in specs.items() if s["type"] in ("int", "float") and n in config["params"]]
+    selects = [n for n, s in specs.items() if s["type"] == "select" and n in config["params"]]
+    variants = []
+
+    def variant(**changes):
+        mutated = copy.deepcopy(config)
+        for name, value in changes.items():
+            if name in ("title", "description"):
+                mutated[name] = value
+            else:
+                mutated["params"][name] = value
+        variants.append(mutated)
+
+    for name in numeric:
+        variant(**{name: specs[name]["max"] * 10})
+        variant(**{name: str(specs[name]["min"])})
+    for name in selects:
+        variant(**{name: "unknown"})
+    variant(title=None)
+    variant(description=None)
+    if numeric and selects:
+        variant(**{numeric[0]: -1, selects[0]: "unknown", "title": "x"})
+    missing = copy.deepcopy(config)
+    del missing["description"]
+    variants.append(missing)
+    return variants
+
+
+def corpus() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    engine = PromptEngine()
+    validator = ConfigValidator()
+    valid = [copy.deepcopy(e["config"]) for e in engine.few_shot_examples]
+    for template_id in TEMPLATE_PARAMS:
+        valid.append({
+            "template": template_id,
+            "params": validator.get_defaults(template_id),
+            "title": f"Default {template_id}",
+            "description": f"Default configuration of the {template_id} template",
+        })
+    invalid = [m for config in valid if config["template"] != "generic" for m in mutations(config)]
+    return valid, invalid
+
+
+def time_per_config(func, configs: List[Dict[str, Any]], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for config in configs:
+            func(config)
+        timings.append((time.perf_counter() - start) * 1000 / len(configs))
+    return timings
+
+
+def run(args) -> Dict[str, Any]:
+    validator = ConfigValidator()
+    schemas = legacy_schemas()
+    valid, invalid = corpus()
+    everything = valid + invalid
+
+    legacy_ms = time_per_config(lambda c: legacy_validate(schemas, c), everything, args.iterations)
+    compiled_ms = time_per_config(validator.validate, everything, args.iterations)
+    batch_ms = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        validator.validate_batch(everything)
+        batch_ms.append((time.perf_counter() - start) * 1000 / len(everything))
+
+    agree = sum(1 for c in everything if legacy_validate(schemas, copy.deepcopy(c))[0] == validator.validate(copy.deepcopy(c))[0])
+    error_counts = [len(validator.validate_all(copy.deepcopy(c)).errors) for c in invalid]
+    repaired = sum(1 for c in invalid if validator.validate(validator.sanitize(copy.deepcopy(c)))[0])
+
+    summary = {
+        "configs": {"valid": len(valid), "invalid": len(invalid)},
+        "legacy": summarize_latencies(legacy_ms),
+        "compiled": summarize_latencies(compiled_ms),
+        "compiled_batch": summarize_latencies(batch_ms),
+        "verdicts_agree": agree,
+        "errors_per_invalid_config": {
+            "legacy": 1.0,
+            "compiled": sum(error_counts) / len(error_counts) if error_counts else 0.0,
+            "max": max(error_counts, default=0),
+        },
+        "sanitize_repaired": repaired,
+    }
+    print(f"{len(valid)} valid + {len(invalid)} invalid configs, verdicts agree on {agree}/{len(everything)}")
+    for name in ("legacy", "compiled", "compiled_batch"):
+        stats = summary[name]
+        print(f"{name:<15} p50 {stats['p50_ms'] * 1000:7.2f} us/config  p95 {stats['p95_ms'] * 1000:7.2f} us/config")
+    print(f"errors reported per invalid config: legacy 1, compiled "
+          f"{summary['errors_per_invalid_config']['compiled']:.2f} (max {summary['errors_per_invalid_config']['max']})")
+    print(f"sanitize repaired {repaired}/{len(invalid)} invalid configs")
+    return {"config": vars(args), "summary": summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled vs interpreted config validation")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
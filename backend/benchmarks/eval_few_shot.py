@@ -0,0 +1,111 @@
+"""
+Few-shot selection eval - Prompt size and config validity of the compact
+prompt (detected template + closest examples) against the full prompt
+(every template and all core examples).
+
+Prompts and expected templates come from benchmarks/data/few_shot_eval.json.
+Uses the configured backend (LLM_BACKEND / OLLAMA_BASE_URL):
+
+    cd backend
+    python -m benchmarks.eval_few_shot --out few_shot.json
+    python -m benchmarks.eval_few_shot --no-llm          # prompt sizes only
+    python -m benchmarks.eval_few_shot --budget 150      # tighter example budget
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from benchmarks.bench_utils import load_data, save_results
+from create_experiment.ollama_client import OllamaClient
+from create_experiment.prompt_engine import PromptEngine
+from create_experiment.validator import ConfigValidator
+
+
+async def score(client: OllamaClient, engine: PromptEngine, validator: ConfigValidator,
+                prompt: str, structured: bool) -> Dict[str, Any]:
+    kwargs = {"temperature": 0.0}
+    if structured:
+        output_format, max_tokens = engine.build_output_format(prompt)
+        kwargs.update(format=output_format, max_tokens=max_tokens)
+    result = await client.generate_response(engine.build_prompt(prompt), **kwargs)
+
+    config = engine.extract_json(result.text)
+    valid = False
+    if config:
+        valid, _ = validator.validate(config)
+    return {
+        "valid": valid,
+        "template": config.get("template") if config else None,
+        "prompt_tokens": result.prompt_tokens,
+        "prompt_eval_ms": result.prompt_eval_ms,
+    }
+
+
+def summarize(rows: List[Dict[str, Any]], mode: str) -> Dict[str, Any]:
+    scored = [r[mode] for r in rows if mode in r]
+    labelled = [(r["expected"], r[mode]["template"]) for r in rows if mode in r and r["expected"]]
+    return {
+        "prompt_tokens_est_mean": sum(r[f"{mode}_tokens_est"] for r in rows) / len(rows),
+        "validity_rate": sum(s["valid"] for s in scored) / len(scored) if scored else None,
+        "template_accuracy": sum(e == t for e, t in labelled) / len(labelled) if labelled else None,
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    engines = {
+        "full": PromptEngine(few_shot="all"),
+        "relevant": PromptEngine(few_shot="relevant", example_token_budget=args.budget,
+                                 max_examples=args.max_examples),
+    }
+    validator = ConfigValidator()
+    client = None if args.no_llm else OllamaClient()
+    if client:
+        await client.start()
+
+    rows = []
+    try:
+        for item in load_data("few_shot_eval.json"):
+            prompt = item["prompt"]
+            row = {"prompt": prompt, "expected": item["template"]}
+            for mode, engine in engines.items():
+                row[f"{mode}_tokens_est"] = engine.estimate_tokens(engine.build_prompt(prompt))
+                if client:
+                    row[mode] = await score(client, engine, validator, prompt, args.structured)
+            rows.append(row)
+
+            line = f"{prompt[:45]:<45} tokens {row['full_tokens_est']:>5} -> {row['relevant_tokens_est']:>5}"
+            if client:
+                line += f"  valid {row['full']['valid']!s:<5} -> {row['relevant']['valid']!s:<5}"
+            print(line)
+    finally:
+        if client:
+            await client.close()
+
+    summary = {mode: summarize(rows, mode) for mode in engines}
+    full, relevant = summary["full"], summary["relevant"]
+    reduction = 1 - relevant["prompt_tokens_est_mean"] / full["prompt_tokens_est_mean"]
+    summary["prompt_token_reduction_pct"] = reduction * 100
+    print(f"\nPrompt tokens (est.): {full['prompt_tokens_est_mean']:.0f} -> "
+          f"{relevant['prompt_tokens_est_mean']:.0f} ({reduction * 100:.1f}% smaller)")
+    if client:
+        print(f"Validity: {full['validity_rate']:.0%} -> {relevant['validity_rate']:.0%}   "
+              f"template accuracy: {full['template_accuracy']:.0%} -> {relevant['template_accuracy']:.0%}")
+    return {"config": vars(args), "summary": summary, "results": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full vs relevance-selected few-shot prompts")
+    parser.add_argument("--budget", type=int, default=300, help="example token budget of the compact prompt")
+    parser.add_argument("--max-examples", type=int, default=2)
+    parser.add_argument("--structured", action="store_true", help="also constrain output with the JSON schema")
+    parser.add_argument("--no-llm", action="store_true", help="only compare prompt sizes")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.out:
+        save_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
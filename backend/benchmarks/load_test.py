@@ -0,0 +1,285 @@
+"""
+Load test - Drives /chat, /generate and /upload-pdf with configurable
+concurrency and reports throughput and p50/p95/p99 latency per endpoint.
+
+By default it spawns the stub LLM server plus both FastAPI apps in a scratch
+directory, so runs are reproducible offline and never touch the real index:
+
+    cd backend
+    python -m benchmarks.load_test --concurrency 16 --requests 200 --out run.json
+    python -m benchmarks.load_test --compare baseline.json run.json
+
+Use --ce-url / --cn-url to target servers that are already running instead.
+Prompts and sample PDFs come from benchmarks/data.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.bench_utils import (
+    BACKEND_DIR, DATA_DIR, load_data, save_results, summarize_latencies,
+)
+
+
+ENDPOINTS = ("generate", "chat", "upload-pdf")
+
+
+# ================= SERVER MANAGEMENT =================
+def _spawn(args: List[str], cwd: str, env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    with open(log_path, "w") as log:
+        return subprocess.Popen(args, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def _wait_ready(url: str, timeout_s: float = 60.0):
+    deadline = time.monotonic() + timeout_s
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout_s:.0f}s")
+
+
+@contextmanager
+def spawned_servers(args):
+    """Start stub LLM + both apps in a scratch dir; yields (ce_url, cn_url, stub_url)"""
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{args.stub_port}",
+        "LLM_BACKEND": "ollama",
+        "STUB_PORT": str(args.stub_port),
+        "STUB_LATENCY_MS": str(args.stub_latency_ms),
+        "STUB_TOKENS_PER_S": str(args.stub_tokens_per_s),
+    }
+    uvicorn = [sys.executable, "-m", "uvicorn", "--host", "127.0.0.1", "--log-level", "warning"]
+    procs = [
+        _spawn([sys.executable, "-m", "llm.stub_server"], workdir, env, os.path.join(workdir, "stub.log")),
+        _spawn(uvicorn + ["main_ce:app", "--port", str(args.ce_port)], workdir, env,
+               os.path.join(workdir, "ce.log")),
+        _spawn(uvicorn + ["main_cn:app", "--port", str(args.cn_port)], workdir, env,
+               os.path.join(workdir, "cn.log")),
+    ]
+    print(f"Spawned stub LLM and servers in {workdir}")
+    try:
+        yield (
+            f"http://127.0.0.1:{args.ce_port}",
+            f"http://127.0.0.1:{args.cn_port}",
+            f"http://127.0.0.1:{args.stub_port}",
+        )
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if args.keep_workdir:
+            print(f"Server logs kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ================= REQUEST BUILDERS =================
+def generate_requests(ce_url: str, prompts: Dict[str, Any]):
+    for prompt in itertools.cycle(prompts["generate"]):
+        yield lambda s, p=prompt: s.post(f"{ce_url}/generate", json={"prompt": p})
+
+
+def chat_requests(cn_url: str, prompts: Dict[str, Any]):
+    for item in itertools.cycle(prompts["chat"]):
+        yield lambda s, i=item: s.post(f"{cn_url}/chat", json=i)
+
+
+def upload_requests(cn_url: str, prompts: Dict[str, Any]):
+    pdfs = []
+    for name in prompts["upload"]:
+        with open(os.path.join(DATA_DIR, name), "rb") as f:
+            pdfs.append((name, f.read()))
+
+    def make(name, content):
+        def send(session):
+            form = aiohttp.FormData()
+            form.add_field("file", content, filename=name, content_type="application/pdf")
+            return session.post(f"{cn_url}/upload-pdf", data=form)
+        return send
+
+    for name, content in itertools.cycle(pdfs):
+        yield make(name, content)
+
+
+def _is_error(status: int, body: Any) -> bool:
+    # The apps report most failures as 200 with an error / success=false body
+    if status >= 400:
+        return True
+    if isinstance(body, dict):
+        return bool(body.get("error")) or body.get("success") is False
+    return False
+
+
+# ================= DRIVER =================
+async def run_endpoint(name: str, requests_iter, total: int, concurrency: int, timeout_s: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    issued = itertools.count()
+
+    async def worker(session: aiohttp.ClientSession):
+        while next(issued) < total:
+            send: Callable = next(requests_iter)
+            start = time.perf_counter()
+            try:
+                async with send(session) as response:
+                    body = await response.json(content_type=None)
+                    failed = _is_error(response.status, body)
+                    reason = f"http_{response.status}" if response.status >= 400 else "app_error"
+            except Exception as e:
+                failed, reason = True, type(e).__name__
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if failed:
+                errors[reason] = errors.get(reason, 0) + 1
+            else:
+                latencies.append(elapsed_ms)
+
+    timeout = aiohttp.ClientTimeout(total=timeout_s)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        wall_s = time.perf_counter() - start
+
+    result = {
+        "endpoint": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_s": wall_s,
+        "throughput_rps": len(latencies) / wall_s if wall_s else 0.0,
+        "latency": summarize_latencies(latencies),
+    }
+    _print_result(result)
+    return result
+
+
+def _print_result(result: Dict[str, Any]):
+    lat = result["latency"]
+    line = f"{result['endpoint']:<12} ok={result['ok']:<5} err={sum(result['errors'].values()):<4} " \
+           f"rps={result['throughput_rps']:8.2f}"
+    if lat.get("count"):
+        line += f"  p50={lat['p50_ms']:8.1f}ms p95={lat['p95_ms']:8.1f}ms p99={lat['p99_ms']:8.1f}ms"
+    print(line)
+
+
+async def run(args, ce_url: str, cn_url: str, stub_url: Optional[str] = None) -> Dict[str, Any]:
+    prompts = load_data("prompts.json")
+    if stub_url:
+        await _wait_ready(f"{stub_url}/api/tags")
+    await _wait_ready(f"{ce_url}/")
+    await _wait_ready(f"{cn_url}/")
+
+    builders = {
+        "generate": lambda: generate_requests(ce_url, prompts),
+        "chat": lambda: chat_requests(cn_url, prompts),
+        "upload-pdf": lambda: upload_requests(cn_url, prompts),
+    }
+
+    # /chat with use_pdf needs an index; build one from the first sample PDF
+    if "chat" in args.endpoints and any(c["use_pdf"] for c in prompts["chat"]):
+        print("Priming PDF index...")
+        await run_endpoint("prime", upload_requests(cn_url, prompts), 1, 1, args.timeout)
+
+    results = {}
+    for name in args.endpoints:
+        total = args.upload_requests if name == "upload-pdf" else args.requests
+        concurrency = min(args.concurrency, total)
+        if args.warmup:
+            await run_endpoint(f"{name}:warmup", builders[name](), args.warmup, concurrency, args.timeout)
+        results[name] = await run_endpoint(name, builders[name](), total, concurrency, args.timeout)
+    return results
+
+
+# ================= COMPARE =================
+def compare(old_path: str, new_path: str):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{'endpoint':<12} {'metric':<16} {'old':>10} {'new':>10} {'change':>9}")
+    for name, new_result in new["results"].items():
+        old_result = old["results"].get(name)
+        if not old_result:
+            continue
+        rows = [("throughput_rps", old_result["throughput_rps"], new_result["throughput_rps"])]
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if key in old_result["latency"] and key in new_result["latency"]:
+                rows.append((key, old_result["latency"][key], new_result["latency"][key]))
+        for metric, before, after in rows:
+            change = (after - before) / before * 100 if before else float("nan")
+            print(f"{name:<12} {metric:<16} {before:>10.2f} {after:>10.2f} {change:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the experiment and chat servers")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help="comma-separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--upload-requests", type=int, default=4, help="uploads are slow; run fewer")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests per endpoint")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout (s)")
+    parser.add_argument("--ce-url", help="use a running experiment server instead of spawning")
+    parser.add_argument("--cn-url", help="use a running chat server instead of spawning")
+    parser.add_argument("--ce-port", type=int, default=18000)
+    parser.add_argument("--cn-port", type=int, default=18001)
+    parser.add_argument("--stub-port", type=int, default=11435)
+    parser.add_argument("--stub-latency-ms", type=float, default=200.0)
+    parser.add_argument("--stub-tokens-per-s", type=float, default=50.0)
+    parser.add_argument("--keep-workdir", action="store_true", help="keep spawned servers' logs")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    args.endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    if args.ce_url or args.cn_url:
+        if not (args.ce_url and args.cn_url):
+            parser.error("--ce-url and --cn-url must be given together")
+        results = asyncio.run(run(args, args.ce_url.rstrip("/"), args.cn_url.rstrip("/")))
+        spawned = False
+    else:
+        with spawned_servers(args) as (ce_url, cn_url, stub_url):
+            results = asyncio.run(run(args, ce_url, cn_url, stub_url))
+        spawned = True
+
+    if args.out:
+        config = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+        save_results(args.out, {"config": {**config, "spawned": spawned}, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import os
 import re
 import json
+import tempfile
+import threading
 import uuid
 import faiss
 import torch
 import numpy as np
+from contextlib import nullcontext
 from typing import List, Dict, Any
 
 from docling.document_converter import DocumentConverter, FormatOption
@@ -26,6 +29,10 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 FAISS_INDEX_PATH = f"{OUTPUT_DIR}/faiss.index"
 METADATA_PATH = f"{OUTPUT_DIR}/metadata.json"
 CHUNKS_TEXT_PATH = f"{OUTPUT_DIR}/chunks.txt"
+# Bumped around every index/metadata swap; rag_query reads the pair only
+# while it holds a settled version (one without PUBLISHING_PREFIX)
+INDEX_VERSION_PATH = f"{OUTPUT_DIR}/index.version"
+PUBLISHING_PREFIX = "publishing-"
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
@@ -118,10 +125,10 @@ def embed_chunks(chunks: List[str]) -> np.ndarray:
 
 
 # ================= FAISS =================
-def store_faiss(embeddings: np.ndarray):
+def store_faiss(embeddings: np.ndarray, path: str = FAISS_INDEX_PATH) -> bool:
     if embeddings.size == 0:
         print("⚠️ No embeddings to store")
-        return
+        return False
 
     dim = embeddings.shape[1]
     index = faiss.IndexFlatL2(dim)
@@ -140,13 +147,67 @@ def store_faiss(embeddings: np.ndarray):
     index.add(embeddings)
 
     # ✅ Always write CPU index (portable)
-    faiss.write_index(index, FAISS_INDEX_PATH)
+    faiss.write_index(index, path)
+    return True
+
+
+# ================= PUBLISH =================
+_publish_lock = threading.Lock()
+
+
+def _temp_path(path: str) -> str:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+
+def _write_version(version: str):
+    tmp_path = _temp_path(INDEX_VERSION_PATH)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, INDEX_VERSION_PATH)
+
+
+def publish_index(embeddings: np.ndarray, metadata: List[Dict]) -> bool:
+    """
+    Replace the FAISS index and its metadata as a pair: both are written to
+    temp files first, then renamed into place between a "publishing" and a
+    final version bump, so a reader never keeps one file with the other's
+    previous version
+    """
+    index_tmp, metadata_tmp = _temp_path(FAISS_INDEX_PATH), _temp_path(METADATA_PATH)
+    try:
+        if not store_faiss(embeddings, index_tmp):
+            return False
+        with open(metadata_tmp, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+
+        version = uuid.uuid4().hex
+        with _publish_lock:
+            _write_version(PUBLISHING_PREFIX + version)
+            os.replace(index_tmp, FAISS_INDEX_PATH)
+            os.replace(metadata_tmp, METADATA_PATH)
+            _write_version(version)
+        return True
+    finally:
+        for tmp_path in (index_tmp, metadata_tmp):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
 
 
 # ================= MAIN =================
-def process_pdf(pdf_path: str):
-    extracted = extract_document(pdf_path)
+def _no_track(stage):
+    return nullcontext()
+
+
+def process_pdf(pdf_path: str, track=_no_track):
+    """
+    track(stage) must return a context manager; the server passes one that
+    records latency for the ocr, chunk_embed and index_build stages.
+    """
+    with track("ocr"):
+        extracted = extract_document(pdf_path)
 
     print(f"🔍 Extracted items: {len(extracted)}")
     if not extracted:
@@ -170,15 +231,15 @@ def process_pdf(pdf_path: str):
                 "text": chunk,
             })
 
-    embeddings = embed_chunks(all_chunks)
-    store_faiss(embeddings)
+    with track("chunk_embed"):
+        embeddings = embed_chunks(all_chunks)
 
-    with open(METADATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=2)
+    with track("index_build"):
+        publish_index(embeddings, metadata)
 
-    with open(CHUNKS_TEXT_PATH, "w", encoding="utf-8") as f:
-        for m in metadata:
-            f.write(f"[{m['chunk_id']} | page {m['page']}]\n{m['text']}\n\n")
+        with open(CHUNKS_TEXT_PATH, "w", encoding="utf-8") as f:
+            for m in metadata:
+                f.write(f"[{m['chunk_id']} | page {m['page']}]\n{m['text']}\n\n")
 
     print("\n✅ EXTRACTION COMPLETE")
     print("• OCR ✔")
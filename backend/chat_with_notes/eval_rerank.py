@@ -0,0 +1,166 @@
+"""
+Rerank evaluation - compares dense-only retrieval against dense + cross-encoder
+rerank on a fixed question set built from the bundled notes.
+
+Retrieval quality is scored as hit@N and MRR against the expected passages.
+With --answers, both context sets are also sent to the LLM and each answer is
+scored by the fraction of expected keywords it contains. With --concurrency N,
+the rerank pass is repeated with N questions in flight (as under /chat load)
+to report how often the budget forces the dense fallback.
+
+Usage (from backend/chat_with_notes):
+    python eval_rerank.py [--candidates 20] [--budget-ms 300] [--answers] [--concurrency 4] [--out results.json]
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sentence_transformers import SentenceTransformer
+
+import rag_query as rq
+
+
+EVAL_SET_PATH = "data/eval/rerank_eval.json"
+
+
+def first_hit_rank(chunks, expected):
+    for rank, chunk in enumerate(chunks, start=1):
+        text = chunk["text"]
+        if any(phrase in text for phrase in expected):
+            return rank
+    return None
+
+
+def keyword_score(answer, keywords):
+    answer = answer.lower()
+    return sum(1 for k in keywords if k.lower() in answer) / len(keywords)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(rows, key):
+    ranks = [r[key]["rank"] for r in rows]
+    hits = sum(1 for rank in ranks if rank is not None)
+    mrr = sum(1 / rank for rank in ranks if rank is not None) / len(rows)
+    latencies = [r[key]["latency_ms"] for r in rows]
+    summary = {
+        "hit_at_n": hits / len(rows),
+        "mrr": mrr,
+        "latency_p50_ms": statistics.median(latencies),
+        "latency_p95_ms": percentile(latencies, 95),
+    }
+    if "answer_score" in rows[0][key]:
+        summary["answer_score"] = statistics.mean(r[key]["answer_score"] for r in rows)
+    return summary
+
+
+def concurrent_rerank(eval_set, index, metadata, embedder, reranker, args):
+    """Rerank every question with args.concurrency questions in flight"""
+    def one(item):
+        candidates = rq.retrieve_chunks(item["question"], index, metadata, embedder, top_k=args.candidates)
+        stats = {}
+        rq.rerank_chunks(item["question"], candidates, reranker, args.top_n, args.budget_ms, stats)
+        return stats
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, eval_set))
+    latencies = [stats["latency_ms"] for stats in results]
+    return {
+        "concurrency": args.concurrency,
+        "rerank_workers": rq.RERANK_WORKERS,
+        "fallbacks": sum(1 for stats in results if not stats["reranked"]),
+        "rerank_ms_p50": statistics.median(latencies),
+        "rerank_ms_p95": percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the cross-encoder rerank stage")
+    parser.add_argument("--top-n", type=int, default=rq.TOP_K)
+    parser.add_argument("--candidates", type=int, default=rq.RERANK_CANDIDATES)
+    parser.add_argument("--budget-ms", type=float, default=rq.RERANK_BUDGET_MS)
+    parser.add_argument("--answers", action="store_true", help="also score LLM answers")
+    parser.add_argument("--concurrency", type=int, default=1, help="also rerank with this many questions in flight")
+    parser.add_argument("--out", help="write per-question results and summary as JSON")
+    args = parser.parse_args()
+
+    with open(EVAL_SET_PATH, "r", encoding="utf-8") as f:
+        eval_set = json.load(f)
+
+    index = rq.load_faiss()
+    metadata = rq.load_metadata()
+    embedder = SentenceTransformer(rq.EMBED_MODEL)
+    reranker = rq.load_reranker()
+
+    # Warm both models so the first question does not carry load time
+    rq.embed_query("warm up", embedder)
+    reranker.predict([("warm up", "warm up")])
+
+    rows = []
+    fallbacks = 0
+    for item in eval_set:
+        question = item["question"]
+
+        start = time.perf_counter()
+        dense = rq.retrieve_chunks(question, index, metadata, embedder, top_k=args.top_n)
+        dense_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        candidates = rq.retrieve_chunks(question, index, metadata, embedder, top_k=args.candidates)
+        stats = {}
+        reranked = rq.rerank_chunks(question, candidates, reranker, args.top_n, args.budget_ms, stats)
+        total_ms = (time.perf_counter() - start) * 1000
+        if not stats["reranked"]:
+            fallbacks += 1
+
+        row = {
+            "question": question,
+            "dense": {"rank": first_hit_rank(dense, item["expected"]), "latency_ms": dense_ms},
+            "rerank": {
+                "rank": first_hit_rank(reranked, item["expected"]),
+                "latency_ms": total_ms,
+                "rerank_ms": stats["latency_ms"],
+                "reranked": stats["reranked"],
+            },
+        }
+
+        if args.answers:
+            for key, chunks in (("dense", dense), ("rerank", reranked)):
+                answer = rq.call_ollama(rq.build_prompt(chunks, question))
+                row[key]["answer_score"] = keyword_score(answer, item["answer_keywords"])
+
+        rows.append(row)
+        print(f"{question[:60]:<60} dense={row['dense']['rank']} rerank={row['rerank']['rank']} "
+              f"({stats['latency_ms']:.1f} ms)")
+
+    summary = {
+        "questions": len(rows),
+        "top_n": args.top_n,
+        "candidates": args.candidates,
+        "budget_ms": args.budget_ms,
+        "rerank_fallbacks": fallbacks,
+        "rerank_ms_p50": statistics.median(r["rerank"]["rerank_ms"] for r in rows),
+        "rerank_ms_p95": percentile([r["rerank"]["rerank_ms"] for r in rows], 95),
+        "dense": summarize(rows, "dense"),
+        "rerank": summarize(rows, "rerank"),
+    }
+    if args.concurrency > 1:
+        summary["concurrent"] = concurrent_rerank(eval_set, index, metadata, embedder, reranker, args)
+
+    print("\n" + json.dumps(summary, indent=2))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,55 @@
 import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import nullcontext
+from functools import lru_cache
+
 import faiss
 import numpy as np
 import requests
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, CrossEncoder
 
 # ================= CONFIG =================
 FAISS_INDEX_PATH = "data/extracted_data/faiss.index"
 METADATA_PATH = "data/extracted_data/metadata.json"
+# Written by data_extraction.publish_index around each index/metadata swap
+INDEX_VERSION_PATH = "data/extracted_data/index.version"
+PUBLISHING_PREFIX = "publishing-"
+# A swap in progress (or a torn pair) is waited out this many times
+LOAD_ATTEMPTS = 5
+LOAD_RETRY_DELAY_S = 0.1
 
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "mistral"
+# Any Ollama-compatible server works here, including llm/stub_server.py
+OLLAMA_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/") + "/api/generate"
+OLLAMA_MODEL = os.environ.get("CHAT_MODEL", "mistral")
 
 TOP_K = 5
 
+# Optional rerank stage: pull a wider candidate set from FAISS and let a small
+# CPU cross-encoder pick the best TOP_K. If scoring does not finish within the
+# budget, the dense order is used instead.
+RERANK_ENABLED = os.environ.get("RAG_RERANK", "0") == "1"
+RERANK_MODEL = os.environ.get("RAG_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.environ.get("RAG_RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS = float(os.environ.get("RAG_RERANK_BUDGET_MS", "300"))
+# One scoring thread per query thread (main_cn's CHAT_CPU_WORKERS), so
+# concurrent requests do not queue behind each other's batches
+RERANK_WORKERS = int(os.environ.get("RAG_RERANK_WORKERS", os.environ.get("CHAT_CPU_WORKERS", "4")))
+
+logger = logging.getLogger(__name__)
+
+# Dedicated scoring threads: a timed-out batch keeps running here instead of
+# piling extra CPU work onto the request threads.
+_rerank_executor = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+
+
+def _no_track(stage):
+    return nullcontext()
+
 
 # ================= LOAD =================
 def load_faiss():
@@ -26,6 +62,65 @@ def load_metadata():
         return json.load(f)
 
 
+_resources = {"key": None, "index": None, "metadata": None}
+_resources_lock = threading.Lock()
+
+
+def _resources_key():
+    """The published version, or the files' mtimes if they predate versioning"""
+    try:
+        with open(INDEX_VERSION_PATH, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return (os.path.getmtime(FAISS_INDEX_PATH), os.path.getmtime(METADATA_PATH))
+
+
+def load_resources():
+    """
+    Return (index, metadata), re-reading them only when the files change
+    (e.g. after a new PDF has been processed)
+
+    A pair is only cached if the version did not change while it was read
+    and every vector has its metadata entry; during a swap the previous
+    pair is served.
+    """
+    if not os.path.exists(FAISS_INDEX_PATH):
+        raise FileNotFoundError(f"FAISS index not found at {FAISS_INDEX_PATH}. Please upload a PDF first.")
+
+    if not os.path.exists(METADATA_PATH):
+        raise FileNotFoundError(f"Metadata not found at {METADATA_PATH}. Please upload a PDF first.")
+
+    with _resources_lock:
+        for _ in range(LOAD_ATTEMPTS):
+            key = _resources_key()
+            publishing = str(key).startswith(PUBLISHING_PREFIX)
+            if _resources["key"] == key or (publishing and _resources["index"] is not None):
+                return _resources["index"], _resources["metadata"]
+
+            if not publishing:
+                index = load_faiss()
+                metadata = load_metadata()
+                if _resources_key() == key and index.ntotal == len(metadata):
+                    logger.info(f"FAISS index loaded: {index.ntotal} vectors, {len(metadata)} chunks")
+                    _resources.update(key=key, index=index, metadata=metadata)
+                    return index, metadata
+                logger.warning(
+                    f"FAISS index ({index.ntotal} vectors) and metadata ({len(metadata)} chunks) "
+                    f"changed while loading or do not match, re-reading"
+                )
+            time.sleep(LOAD_RETRY_DELAY_S)
+
+        if _resources["index"] is not None:
+            logger.warning("Serving the previous FAISS index until the new one is complete")
+            return _resources["index"], _resources["metadata"]
+        raise RuntimeError("The PDF index is being updated, please try again shortly")
+
+
+@lru_cache(maxsize=1)
+def load_embedder():
+    return SentenceTransformer(EMBED_MODEL)
+
+
 # ================= EMBEDDING =================
 def embed_query(query: str, model):
     emb = model.encode(
@@ -37,17 +132,76 @@ def embed_query(query: str, model):
 
 
 # ================= RETRIEVAL =================
-def retrieve_chunks(query, index, metadata, model):
-    query_emb = embed_query(query, model)
-    distances, indices = index.search(query_emb, TOP_K)
+def retrieve_chunks(query, index, metadata, model, top_k=TOP_K, track=_no_track):
+    with track("query_embed"):
+        query_emb = embed_query(query, model)
+    with track("faiss_search"):
+        distances, indices = index.search(query_emb, top_k)
 
     retrieved = []
     for idx in indices[0]:
+        # FAISS pads with -1 when the index holds fewer than top_k vectors
+        if idx < 0:
+            continue
         retrieved.append(metadata[idx])
 
     return retrieved
 
 
+# ================= RERANK =================
+@lru_cache(maxsize=1)
+def load_reranker():
+    return CrossEncoder(RERANK_MODEL, device="cpu")
+
+
+def rerank_chunks(query, candidates, reranker, top_n=TOP_K, budget_ms=RERANK_BUDGET_MS, stats=None):
+    """
+    Re-order dense candidates with a cross-encoder, scored in one batch.
+
+    Falls back to the dense order if scoring exceeds budget_ms, counted from
+    when the batch starts running, or if no scoring thread frees up within
+    budget_ms (threads still busy with timed-out batches). When a dict is
+    passed as stats it is filled with latency_ms and reranked.
+    """
+    if stats is None:
+        stats = {}
+
+    if len(candidates) <= 1:
+        stats.update(latency_ms=0.0, reranked=False)
+        return candidates[:top_n]
+
+    pairs = [(query, chunk["text"]) for chunk in candidates]
+    start = time.perf_counter()
+    started = threading.Event()
+
+    def score():
+        started.set()
+        return reranker.predict(pairs, batch_size=len(pairs))
+
+    future = _rerank_executor.submit(score)
+
+    # Time spent queued for a thread does not count against the scoring budget
+    if not started.wait(budget_ms / 1000.0) and future.cancel():
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.warning(f"No rerank thread free within {budget_ms:.0f} ms, using dense order")
+        stats.update(latency_ms=latency_ms, reranked=False)
+        return candidates[:top_n]
+
+    try:
+        scores = future.result(timeout=budget_ms / 1000.0)
+    except FutureTimeoutError:
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.warning(f"Rerank exceeded {budget_ms:.0f} ms budget, using dense order")
+        stats.update(latency_ms=latency_ms, reranked=False)
+        return candidates[:top_n]
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    order = np.argsort(-np.asarray(scores))[:top_n]
+    logger.info(f"Reranked {len(candidates)} candidates in {latency_ms:.1f} ms")
+    stats.update(latency_ms=latency_ms, reranked=True)
+    return [candidates[i] for i in order]
+
+
 # ================= PROMPT =================
 def build_prompt(context_chunks, question):
     if not context_chunks:
@@ -98,36 +252,35 @@ def call_ollama(prompt):
 
 
 # ================= MAIN =================
-def ask(question: str):
-    import logging
-    import os
-    logger = logging.getLogger(__name__)
-    
-    # Check if index exists
-    if not os.path.exists(FAISS_INDEX_PATH):
-        raise FileNotFoundError(f"FAISS index not found at {FAISS_INDEX_PATH}. Please upload a PDF first.")
-    
-    if not os.path.exists(METADATA_PATH):
-        raise FileNotFoundError(f"Metadata not found at {METADATA_PATH}. Please upload a PDF first.")
-    
-    logger.info(f"Loading FAISS index and metadata for question: {question[:100]}...")
-    index = load_faiss()
-    metadata = load_metadata()
-    
-    logger.info(f"FAISS index loaded: {index.ntotal} vectors")
-    logger.info(f"Metadata loaded: {len(metadata)} chunks")
-    
-    embedder = SentenceTransformer(EMBED_MODEL)
-    logger.info("Embedding model loaded")
+def retrieve(question: str, track=_no_track):
+    """
+    CPU-bound part of a RAG query: embed, FAISS search and optional rerank
 
-    logger.info("Retrieving relevant chunks...")
-    chunks = retrieve_chunks(question, index, metadata, embedder)
+    track(stage) must return a context manager; the server passes one that
+    records per-stage latency.
+    """
+    index, metadata = load_resources()
+    embedder = load_embedder()
+
+    logger.info(f"Retrieving relevant chunks for question: {question[:100]}...")
+    if RERANK_ENABLED:
+        candidates = retrieve_chunks(question, index, metadata, embedder, RERANK_CANDIDATES, track)
+        with track("rerank"):
+            chunks = rerank_chunks(question, candidates, load_reranker())
+    else:
+        chunks = retrieve_chunks(question, index, metadata, embedder, track=track)
     logger.info(f"Retrieved {len(chunks)} chunks")
-    
+
     # Log retrieved chunks for debugging
     for i, chunk in enumerate(chunks):
         logger.debug(f"Chunk {i+1}: {chunk['text'][:100]}...")
-    
+
+    return chunks
+
+
+def ask(question: str):
+    chunks = retrieve(question)
+
     prompt = build_prompt(chunks, question)
     logger.info("Prompt built, calling Ollama...")
     
@@ -0,0 +1,137 @@
+"""
+Compression - ASGI middleware that compresses complete responses with brotli
+(when the package is installed) or gzip
+
+Only single-body responses are compressed: streamed ones (NDJSON batches,
+server-sent events) pass through untouched so every chunk still reaches the
+client as soon as it is produced, and responses that already carry a
+Content-Encoding (precompressed /preview bodies) are never compressed twice.
+"""
+import gzip
+import re
+from typing import Iterable, List, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str]) -> str:
+    """Pick the first available encoding the Accept-Encoding header allows"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        """
+        Args:
+            app: ASGI application to wrap
+            minimum_size: Bodies smaller than this are sent as they are
+            gzip_level: 1 (fast) - 9 (small)
+            brotli_quality: 0 (fast) - 11 (small); responses are compressed
+                per request, so keep this well below the offline maximum
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ("br", "gzip") if brotli else ("gzip",)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding, self.encodings)
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start_message is None:
+                await send(message)
+                return
+
+            passthrough = True
+            body = message.get("body", b"")
+            headers = list(start_message.get("headers", []))
+            if message.get("more_body", False) or not self._compressible(start_message["status"], headers):
+                await send(start_message)
+                await send(message)
+                return
+
+            # From here on the response depends on Accept-Encoding, so caches
+            # must key on it even when this copy goes out uncompressed
+            if encoding == "identity" or len(body) < self.minimum_size:
+                await send(dict(start_message, headers=self._vary_headers(headers)))
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers = [(name, value) for name, value in self._vary_headers(headers) if name != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            await send(dict(start_message, headers=headers))
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(status: int, headers: List[Tuple[bytes, bytes]]) -> bool:
+        if status < 200 or status in (204, 304):
+            return False
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _vary_headers(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+        vary = [value for name, value in headers if name == b"vary"]
+        result = [(name, value) for name, value in headers if name != b"vary"]
+        vary_values = b", ".join(vary)
+        if b"accept-encoding" not in vary_values.lower():
+            vary_values = b", ".join(v for v in (vary_values, b"Accept-Encoding") if v)
+        result.append((b"vary", vary_values))
+        return result
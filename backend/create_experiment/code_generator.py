@@ -1,9 +1,14 @@
 """
 Code Generator - Generates complete HTML/JS code from config
 """
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional
+import hashlib
+import json
 import logging
+import threading
 from .prompt_engine import PromptEngine
+from .minifier import minify_html
 
 # Import template generators
 from .templates.network_template_py import NetworkTemplate
@@ -12,6 +17,7 @@ from .templates.flocking_template_py import FlockingTemplate
 from .templates.waves_template_py import WavesTemplate
 from .templates.generic_template_py import GenericTemplate
 from .templates.base_template import BaseTemplate
+from .templates.shared_assets import ASSET_MODES
 
 
 logger = logging.getLogger(__name__)
@@ -20,8 +26,30 @@ logger = logging.getLogger(__name__)
 class CodeGenerator:
     """Generates complete HTML/JS code from configuration"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache_size: int = 256,
+        on_cache_lookup: Optional[Callable[[str], None]] = None,
+        asset_base_url: Optional[str] = None,
+        minify: bool = False
+    ):
+        """
+        Args:
+            cache_size: Rendered documents kept in the LRU (0 disables it)
+            on_cache_lookup: Called with "hit" or "miss" for every lookup
+            asset_base_url: Where linked-mode documents load the shared
+                stylesheet/runtime from (default: BaseTemplate.asset_base_url)
+            minify: Strip indentation, comments and redundant whitespace from
+                the rendered HTML, CSS and JS
+        """
         self.prompt_engine = PromptEngine()
+        self.cache_size = cache_size
+        self.on_cache_lookup = on_cache_lookup
+        self.minify = minify
+        self._rendered: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
         
         # Register all available templates
         self.templates = {
@@ -31,6 +59,9 @@ class CodeGenerator:
             "waves": WavesTemplate(),
             "generic": GenericTemplate()
         }
+        if asset_base_url:
+            for template in self.templates.values():
+                template.asset_base_url = asset_base_url
     
     def get_available_templates(self) -> List[Dict[str, Any]]:
         """Get list of all available templates with metadata"""
@@ -48,7 +79,7 @@ class CodeGenerator:
         
         return result
     
-    def generate_html(self, config: Dict[str, Any]) -> Optional[str]:
+    def generate_html(self, config: Dict[str, Any], assets: str = "inline") -> Optional[str]:
         """
         Generate complete HTML file from configuration
         
@@ -58,6 +89,8 @@ class CodeGenerator:
                 - params: Template-specific parameters
                 - title: Experiment title
                 - description: Experiment description
+            assets: "inline" for a self-contained document, "linked" to load
+                the shared stylesheet/runtime from asset_base_url
         
         Returns:
             str: Complete HTML code ready to save/serve
@@ -69,10 +102,23 @@ class CodeGenerator:
                 logger.error(f"Template '{template_id}' not found")
                 return None
             
+            if assets not in ASSET_MODES:
+                logger.error(f"Unknown asset mode '{assets}'")
+                return None
+            
             template = self.templates[template_id]
             
+            # Identical configs render identical documents
+            key = self._cache_key(template_id, f"{template.version}:{assets}", config)
+            html_code = self._cache_get(key)
+            if html_code is not None:
+                return html_code
+            
             # Generate HTML using the template
-            html_code = template.generate(config)
+            html_code = template.generate(config, assets=assets)
+            if self.minify:
+                html_code = self._minify(html_code, template_id)
+            self._cache_put(key, html_code)
             
             logger.info(f"Successfully generated HTML for template: {template_id}")
             return html_code
@@ -81,6 +127,61 @@ class CodeGenerator:
             logger.error(f"Error generating HTML: {e}", exc_info=True)
             return None
     
+    def render_key(self, config: Dict[str, Any], assets: str = "inline") -> str:
+        """
+        Everything besides the config that generate_html's output depends on:
+        template version, asset mode (and asset URL when linked), minification
+        """
+        template = self.templates.get(config.get("template"))
+        version = template.version if template else ""
+        asset_source = f"{assets}@{template.asset_base_url}" if template and assets == "linked" else assets
+        return f"{config.get('template')}:{version}:{asset_source}:{'min' if self.minify else 'full'}"
+    
+    @staticmethod
+    def _minify(html_code: str, template_id: str) -> str:
+        try:
+            return minify_html(html_code)
+        except Exception as e:
+            # A document that cannot be minified is still a valid document
+            logger.warning(f"Could not minify HTML for template {template_id}: {e}")
+            return html_code
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._rendered),
+            "max_entries": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+    
+    @staticmethod
+    def _cache_key(template_id: str, version: str, config: Dict[str, Any]) -> str:
+        canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(f"{template_id}\0{version}\0{canonical}".encode("utf-8")).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        if self.cache_size <= 0:
+            return None
+        with self._lock:
+            html_code = self._rendered.get(key)
+            if html_code is not None:
+                self._rendered.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if self.on_cache_lookup:
+            self.on_cache_lookup("hit" if html_code is not None else "miss")
+        return html_code
+    
+    def _cache_put(self, key: str, html_code: str):
+        if self.cache_size <= 0 or not html_code:
+            return
+        with self._lock:
+            self._rendered[key] = html_code
+            self._rendered.move_to_end(key)
+            while len(self._rendered) > self.cache_size:
+                self._rendered.popitem(last=False)
+    
     def get_template_metadata(self, template_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed metadata for a specific template"""
         return self.prompt_engine.get_template_info(template_id)
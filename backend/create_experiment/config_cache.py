@@ -0,0 +1,144 @@
+"""
+Config Cache - Remembers validated experiment configs for repeat prompts
+
+Two tiers:
+- in-memory LRU with TTL (fast, per process)
+- optional on-disk JSON store that survives restarts
+
+Thread-safe, so servers can run get/put in a worker thread when the disk
+tier is on.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, config)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """
+        Normalize prompt text so trivially different phrasings share a key
+        (case, whitespace, trailing punctuation)
+        """
+        text = re.sub(r"\s+", " ", prompt.strip().lower())
+        return text.rstrip(" .!?")
+
+    def make_key(self, prompt: str, template_hint: Optional[str], model: str, engine_version: str) -> str:
+        """Build the cache key from everything that influences the generated config"""
+        material = json.dumps(
+            [self.normalize_prompt(prompt), (template_hint or "").lower(), model, engine_version]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached config, or None on miss/expiry"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, config = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(config)
+                del self._entries[key]
+
+        if self.disk_dir:
+            config = self._read_disk(key, now)
+            if config is not None:
+                # Promote to memory, keeping the original timestamp
+                self._remember(key, config["stored_at"], json.dumps(config["config"]))
+                with self._lock:
+                    self.hits += 1
+                return config["config"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, config: Dict[str, Any]):
+        """Store a validated config"""
+        now = time.time()
+        serialized = json.dumps(config)
+        self._remember(key, now, serialized)
+
+        if self.disk_dir:
+            self._write_disk(key, now, serialized)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk": bool(self.disk_dir),
+        }
+
+    def _remember(self, key: str, stored_at: float, serialized: str):
+        with self._lock:
+            self._entries[key] = (stored_at, serialized)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+        if now - record.get("stored_at", 0) > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return record
+
+    def _write_disk(self, key: str, stored_at: float, serialized: str):
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            # A unique temp file per write: concurrent puts of one key must
+            # not share it
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(f'{{"stored_at": {stored_at}, "config": {serialized}}}')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
@@ -0,0 +1,210 @@
+"""
+Experiment Store - Persists generated experiments under a content hash of
+their canonical config and how it was rendered
+
+Each experiment gets a directory with its config, the rendered HTML and
+precompressed gzip (and brotli, when the package is installed) copies, so
+previews are served straight from storage without re-rendering:
+
+    <root>/<id[:2]>/<id>/config.json
+                         index.html, index.html.gz, index.html.br
+                         meta.json   (etag, sizes, created_at, render)
+
+The render key (template version, asset mode, minification, ...) is part of
+the id: a document served as immutable must never change under it, so a new
+template version or rendering setting gives new ids instead.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from compression import choose_encoding
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ID_LENGTH = 32
+_ID_RE = re.compile(rf"^[0-9a-f]{{{ID_LENGTH}}}$")
+
+# File suffix per Content-Encoding
+_SUFFIXES = {"identity": "", "gzip": ".gz", "br": ".br"}
+
+
+@dataclass
+class StoredBody:
+    """One encoding of a stored experiment's HTML"""
+    body: bytes
+    encoding: str
+    etag: str
+
+
+class ExperimentStore:
+    def __init__(self, root_dir: str, memory_entries: int = 64):
+        """
+        Args:
+            root_dir: Directory the experiments are written to
+            memory_entries: How many experiments' bodies to keep in memory
+        """
+        self.root_dir = root_dir
+        self.memory_entries = memory_entries
+        self.encodings = ("br", "gzip") if brotli else ("gzip",)
+        self._bodies: "OrderedDict[str, Tuple[str, Dict[str, bytes]]]" = OrderedDict()  # id -> (etag, bodies)
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    @staticmethod
+    def canonical_config(config: Dict[str, Any]) -> str:
+        """Key order and whitespace independent serialization"""
+        return json.dumps(config, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def experiment_id(cls, config: Dict[str, Any], render_key: str = "") -> str:
+        digest = hashlib.sha256(f"{cls.canonical_config(config)}\n{render_key}".encode("utf-8"))
+        return digest.hexdigest()[:ID_LENGTH]
+
+    @staticmethod
+    def is_valid_id(experiment_id: str) -> bool:
+        return bool(_ID_RE.match(experiment_id))
+
+    def put(self, config: Dict[str, Any], html_code: str, render_key: str = "") -> str:
+        """
+        Store an experiment (no-op if already stored); returns its id
+
+        render_key identifies everything besides the config that shaped
+        html_code (CodeGenerator.render_key)
+        """
+        experiment_id = self.experiment_id(config, render_key)
+        path = self._path(experiment_id)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            return experiment_id
+
+        html = html_code.encode("utf-8")
+        bodies = {"identity": html, "gzip": gzip.compress(html, compresslevel=9, mtime=0)}
+        if brotli:
+            bodies["br"] = brotli.compress(html, quality=11)
+        etag = f'"{hashlib.sha256(html).hexdigest()[:ID_LENGTH]}"'
+
+        try:
+            os.makedirs(path, exist_ok=True)
+            self._write(os.path.join(path, "config.json"), self.canonical_config(config).encode("utf-8"))
+            for encoding, body in bodies.items():
+                self._write(os.path.join(path, "index.html" + _SUFFIXES[encoding]), body)
+            meta = {
+                "etag": etag,
+                "created_at": time.time(),
+                "sizes": {encoding: len(body) for encoding, body in bodies.items()},
+                "render": render_key,
+            }
+            # meta.json last: its presence marks a complete entry
+            self._write(os.path.join(path, "meta.json"), json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not store experiment {experiment_id}: {e}")
+
+        self._remember(experiment_id, etag, bodies)
+        return experiment_id
+
+    def get_config(self, experiment_id: str) -> Optional[Dict[str, Any]]:
+        if not self.is_valid_id(experiment_id):
+            return None
+        try:
+            with open(os.path.join(self._path(experiment_id), "config.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def get_body(self, experiment_id: str, accept_encoding: str = "") -> Optional[StoredBody]:
+        """
+        The stored HTML in the best encoding the client accepts, or None if
+        the experiment does not exist
+        """
+        if not self.is_valid_id(experiment_id):
+            return None
+
+        entry = self._cached(experiment_id)
+        if entry is None:
+            entry = self._load(experiment_id)
+            if entry is None:
+                return None
+            self._remember(experiment_id, *entry)
+
+        etag, bodies = entry
+        encoding = choose_encoding(accept_encoding, [e for e in self.encodings if e in bodies])
+        return StoredBody(bodies[encoding], encoding, etag)
+
+    def get_etag(self, experiment_id: str) -> Optional[str]:
+        """ETag without loading the bodies (for If-None-Match checks)"""
+        if not self.is_valid_id(experiment_id):
+            return None
+        entry = self._cached(experiment_id)
+        if entry is not None:
+            return entry[0]
+        meta = self._read_meta(experiment_id)
+        return meta["etag"] if meta else None
+
+    def _path(self, experiment_id: str) -> str:
+        return os.path.join(self.root_dir, experiment_id[:2], experiment_id)
+
+    def _read_meta(self, experiment_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self._path(experiment_id), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _load(self, experiment_id: str) -> Optional[Tuple[str, Dict[str, bytes]]]:
+        meta = self._read_meta(experiment_id)
+        if meta is None:
+            return None
+        bodies = {}
+        for encoding in meta["sizes"]:
+            try:
+                with open(os.path.join(self._path(experiment_id), "index.html" + _SUFFIXES[encoding]), "rb") as f:
+                    bodies[encoding] = f.read()
+            except OSError as e:
+                logger.warning(f"Missing {encoding} body for experiment {experiment_id}: {e}")
+        if "identity" not in bodies:
+            return None
+        return meta["etag"], bodies
+
+    def _cached(self, experiment_id: str) -> Optional[Tuple[str, Dict[str, bytes]]]:
+        with self._lock:
+            entry = self._bodies.get(experiment_id)
+            if entry is not None:
+                self._bodies.move_to_end(experiment_id)
+            return entry
+
+    def _remember(self, experiment_id: str, etag: str, bodies: Dict[str, bytes]):
+        with self._lock:
+            self._bodies[experiment_id] = (etag, bodies)
+            self._bodies.move_to_end(experiment_id)
+            while len(self._bodies) > self.memory_entries:
+                self._bodies.popitem(last=False)
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # A unique temp file per write: concurrent puts of one id must not
+        # share it, or one replace could fail or publish a mix of both
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
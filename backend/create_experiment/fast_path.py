@@ -0,0 +1,248 @@
+"""
+Fast Path - Builds configs for well-specified prompts without calling the model
+
+Prompts like "network with 10 nodes and grid layout" fully determine the
+template and its parameters. The parser reads numbers and enum options from
+the prompt against the template param specs and only answers when every word
+of the prompt is accounted for; anything vague ("many nodes", "strong
+gravity"), ambiguous or out of range falls back to the LLM.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The sign is part of the number, so "-5 nodes" reads as -5 (out of range)
+# rather than 5
+NUMBER = r"(-?\d+(?:\.\d+)?)"
+
+# Words that name a parameter in prompts, beyond its camelCase name
+PARAM_ALIASES = {
+    "nodeCount": ["nodes", "node"],
+    "packetRate": ["packet rate", "packets per second", "packets"],
+    "routingMode": ["routing", "paths", "path", "routes"],
+    "layout": ["layout"],
+    "particleCount": ["particles", "particle"],
+    "gravity": ["gravity"],
+    "attractionMode": ["attraction"],
+    "color": ["colors", "color", "colour"],
+    "boidCount": ["boids", "birds", "boid"],
+    "cohesion": ["cohesion"],
+    "separation": ["separation"],
+    "alignment": ["alignment"],
+    "maxSpeed": ["max speed", "speed"],
+    "frequency": ["frequency", "hz"],
+    "amplitude": ["amplitude"],
+    "waveType": ["waves", "wave"],
+    "colorScheme": ["colors", "color", "colour"],
+}
+
+# Qualitative wording the model has to interpret; never guessed here
+VAGUE_WORDS = {
+    "many", "lots", "few", "more", "less", "fewer", "strong", "weak", "high", "low",
+    "fast", "slow", "quick", "tight", "loose", "dense", "sparse", "big", "small",
+    "large", "huge", "tiny", "very", "extra", "super", "zero", "no", "not", "without",
+    "colorful", "bright", "dark", "some", "several",
+}
+
+# Filler that carries no parameter information
+FILLER_WORDS = {
+    "a", "an", "the", "with", "and", "of", "in", "to", "at", "per", "on", "for", "by",
+    "me", "show", "create", "make", "generate", "build", "display", "draw", "give",
+    "simulation", "simulate", "simulator", "visualization", "visualize", "visualise",
+    "experiment", "demo", "system", "pattern", "patterns", "model", "using", "use",
+    "set", "is", "are", "that", "has", "have", "please", "mode", "type", "scheme",
+    "count", "rate", "layout", "interactive",
+}
+
+CONNECTORS = r"(?:\s*(?:[:=]|of|at|to|set to|is)?\s*)"
+
+
+@dataclass
+class FastPathResult:
+    """Outcome of a fast-path attempt; config is None when falling back"""
+    template: Optional[str]
+    config: Optional[Dict[str, Any]] = None
+    confidence: float = 0.0
+    reason: str = "ok"
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def hit(self) -> bool:
+        return self.config is not None
+
+
+class FastPathParser:
+    def __init__(self, prompt_engine, min_confidence: float = 1.0):
+        """
+        Args:
+            prompt_engine: Source of template definitions and keyword detection
+            min_confidence: Share of prompt words that must be explained by the
+                template keywords, parsed params or filler (1.0 = all of them)
+        """
+        self.prompt_engine = prompt_engine
+        self.min_confidence = min_confidence
+
+    def parse(
+        self,
+        user_prompt: str,
+        template_hint: Optional[str] = None,
+        title: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> FastPathResult:
+        """Try to build a complete config; see FastPathResult.reason on fallback"""
+        text = user_prompt.lower()
+
+        template_id, reason = self._pick_template(text, template_hint)
+        if template_id is None:
+            return FastPathResult(None, reason=reason)
+
+        tokens = [(m.start(), m.end(), m.group(0)) for m in re.finditer(r"[a-z]+|\d+(?:\.\d+)?", text)]
+        if any(word in VAGUE_WORDS for _, _, word in tokens):
+            return FastPathResult(template_id, reason="vague")
+
+        param_specs = self.prompt_engine.templates[template_id]["params"]
+        params, spans, reason = self._extract_params(text, param_specs)
+        if reason != "ok":
+            return FastPathResult(template_id, reason=reason, params=params)
+        if not params:
+            return FastPathResult(template_id, reason="no_params")
+
+        confidence = self._confidence(tokens, spans, template_id)
+        if confidence < self.min_confidence:
+            return FastPathResult(template_id, confidence=confidence, reason="low_confidence", params=params)
+
+        config = self._build_config(template_id, params, title, description)
+        logger.info(f"Fast path matched '{template_id}' with {params}")
+        return FastPathResult(template_id, config=config, confidence=confidence, params=params)
+
+    def _pick_template(self, text: str, template_hint: Optional[str]) -> Tuple[Optional[str], str]:
+        if template_hint:
+            hint = template_hint.lower()
+            if hint in self.prompt_engine.templates:
+                return hint, "ok"
+            return None, "generic"
+
+        scores = self.prompt_engine.template_scores(text)
+        if scores.pop("generic") or not any(scores.values()):
+            # Algorithms and custom experiments need the model to write them
+            return None, "generic"
+
+        ranked = sorted((score, template_id) for template_id, score in scores.items())
+        (second, _), (best, best_id) = ranked[-2], ranked[-1]
+        if best == second:
+            return None, "ambiguous_template"
+        return best_id, "ok"
+
+    def _extract_params(
+        self, text: str, param_specs: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], List[Tuple[int, int]], str]:
+        params: Dict[str, Any] = {}
+        spans: List[Tuple[int, int]] = []
+        claimed_numbers: Dict[int, str] = {}
+
+        for name, spec in param_specs.items():
+            aliases = "|".join(re.escape(a) for a in self._aliases(name))
+
+            if spec["type"] in ("int", "float"):
+                patterns = (
+                    rf"(?<![\w.-]){NUMBER}\s+(?:{aliases})\b",
+                    rf"\b(?:{aliases}){CONNECTORS}{NUMBER}(?![\w.-])",
+                )
+                matches = [m for p in patterns for m in re.finditer(p, text)]
+                values = {m.group(1) for m in matches}
+                if len(values) > 1:
+                    return params, spans, "conflicting_values"
+                if not matches:
+                    continue
+
+                raw = values.pop()
+                if spec["type"] == "int" and "." in raw:
+                    return params, spans, "wrong_type"
+                value = int(raw) if spec["type"] == "int" else float(raw)
+                if not spec["min"] <= value <= spec["max"]:
+                    return params, spans, "out_of_range"
+
+                for m in matches:
+                    if claimed_numbers.setdefault(m.start(1), name) != name:
+                        return params, spans, "ambiguous_number"
+                    spans.append(m.span())
+                params[name] = value
+
+            elif spec["type"] == "select":
+                chosen = set()
+                for option in spec["options"]:
+                    # Options shared by several params (network "random") only
+                    # count next to the param's own words
+                    shared = any(
+                        option in other["options"]
+                        for other_name, other in param_specs.items()
+                        if other_name != name and other["type"] == "select"
+                    )
+                    if shared:
+                        pattern = rf"\b{re.escape(option)}\s+(?:{aliases})\b|\b(?:{aliases}){CONNECTORS}{re.escape(option)}\b"
+                    else:
+                        pattern = rf"\b{re.escape(option)}\b"
+                    for m in re.finditer(pattern, text):
+                        chosen.add(option)
+                        spans.append(m.span())
+                if len(chosen) > 1:
+                    return params, spans, "conflicting_values"
+                if chosen:
+                    params[name] = chosen.pop()
+
+        # Numbers no parameter claimed mean something we did not understand
+        for m in re.finditer(NUMBER, text):
+            if m.start() not in claimed_numbers:
+                return params, spans, "unknown_number"
+
+        return params, spans, "ok"
+
+    def _confidence(self, tokens: List[Tuple[int, int, str]], spans: List[Tuple[int, int]], template_id: str) -> float:
+        if not tokens:
+            return 0.0
+        info = self.prompt_engine.templates[template_id]
+        known = FILLER_WORDS | set(info["name"].lower().split())
+        keywords = info["keywords"]
+
+        explained = 0
+        for start, end, word in tokens:
+            if any(s <= start and end <= e for s, e in spans):
+                explained += 1
+            elif word in known or any(keyword in word for keyword in keywords):
+                explained += 1
+            elif any(word in alias.split() for aliases in PARAM_ALIASES.values() for alias in aliases):
+                # Param named without a value ("grid layout with nodes")
+                explained += 1
+        return explained / len(tokens)
+
+    def _build_config(
+        self,
+        template_id: str,
+        params: Dict[str, Any],
+        title: Optional[str],
+        description: Optional[str]
+    ) -> Dict[str, Any]:
+        info = self.prompt_engine.templates[template_id]
+        full_params = {name: spec["default"] for name, spec in info["params"].items()}
+        full_params.update(params)
+
+        summary = ", ".join(f"{self._label(name)} {value}" for name, value in params.items())
+        return {
+            "template": template_id,
+            "params": full_params,
+            "title": title or info["name"],
+            "description": description or f"{info['description']} ({summary})",
+        }
+
+    @staticmethod
+    def _aliases(param_name: str) -> List[str]:
+        spaced = FastPathParser._label(param_name)
+        return sorted({spaced, param_name.lower(), *PARAM_ALIASES.get(param_name, [])}, key=len, reverse=True)
+
+    @staticmethod
+    def _label(param_name: str) -> str:
+        """nodeCount -> 'node count'"""
+        return re.sub(r"(?<!^)(?=[A-Z])", " ", param_name).lower()
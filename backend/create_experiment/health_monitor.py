@@ -0,0 +1,126 @@
+"""
+Health Monitor - Background model warm-up and cached health status
+
+Probes of /health read the last snapshot instead of calling Ollama each
+time. A background task refreshes it every interval_s and loads the model
+(evaluating the shared prompt prefix) at startup and again after Ollama
+comes back from an outage. Once Ollama unloads an idle model after
+keep_alive, it stays unloaded until the next request: the snapshot only
+reports it (model_warm), so EXPERIMENT_KEEP_ALIVE keeps its meaning.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from llm.base import LLMError
+
+from .ollama_client import OllamaClient
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    def __init__(
+        self,
+        client: OllamaClient,
+        interval_s: float = 15.0,
+        warm_up: bool = True,
+        warm_up_prompt: str = "",
+        warm_up_timeout_s: float = 300.0,
+        on_warm_up: Optional[Callable[[str, float], None]] = None
+    ):
+        self.client = client
+        self.interval_s = interval_s
+        self.warm_up_enabled = warm_up
+        self.warm_up_prompt = warm_up_prompt
+        self.warm_up_timeout_s = warm_up_timeout_s
+        self.on_warm_up = on_warm_up  # (result, seconds) after each warm-up attempt
+        self.ollama_running = False
+        self.model_warm = False
+        self.checked_at: Optional[float] = None
+        self._warm_up_due = warm_up  # at startup, and after each outage
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        """
+        Last snapshot: "starting" before the first check, "warming" while
+        Ollama is up but the startup/post-outage warm-up has not succeeded
+        """
+        if self.checked_at is None:
+            status = "starting"
+        elif not self.ollama_running:
+            status = "degraded"
+        elif self._warm_up_due:
+            status = "warming"
+        else:
+            status = "healthy"
+        return {
+            "status": status,
+            "ollama_running": self.ollama_running,
+            "model": self.client.model,
+            "model_warm": self.model_warm,
+            "keep_alive": self.client.keep_alive,
+            "checked_seconds_ago": None if self.checked_at is None else round(time.monotonic() - self.checked_at, 1),
+        }
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Check Ollama now, warming the model up if it is due"""
+        async with self._lock:
+            running = await self.client.health_check()
+            if not running:
+                # Ollama restarted or unreachable: its loaded model is gone
+                self.model_warm = False
+                self._warm_up_due = self.warm_up_enabled
+            self.ollama_running = running
+            self.checked_at = time.monotonic()
+            if running and self._warm_up_due:
+                await self._warm_up()
+            elif running:
+                # Only reported: Ollama unloading an idle model is keep_alive
+                # doing its job, the next request loads it again
+                loaded = await self.client.model_loaded()
+                if loaded is not None:
+                    self.model_warm = loaded
+        return self.status
+
+    async def _warm_up(self):
+        start = time.perf_counter()
+        try:
+            await self.client.warm_up(self.warm_up_prompt, timeout=self.warm_up_timeout_s)
+            self.model_warm = True
+            self._warm_up_due = False
+            result = "ok"
+            logger.info(
+                f"Model {self.client.model} warmed up in {time.perf_counter() - start:.1f}s "
+                f"(keep_alive {self.client.keep_alive})"
+            )
+        except LLMError as e:
+            logger.warning(f"Model warm-up failed ({e.kind}): {e}")
+            result = e.kind
+        if self.on_warm_up:
+            self.on_warm_up(result, time.perf_counter() - start)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health refresh failed: {e}")
+            await asyncio.sleep(self.interval_s)
+
+    def start(self):
+        """Start the background refresh loop; call once at app startup"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
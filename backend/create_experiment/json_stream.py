@@ -0,0 +1,227 @@
+"""
+JSON scanners - Find the config object in a model response
+
+JsonObjectScanner works incrementally on a stream and detects when a complete
+top-level JSON object has arrived, so generation can be stopped right there;
+find_json_object does the same for a complete response in one pass.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Characters that change brace depth or string state
+_STRUCTURAL = re.compile(r'[{}"]')
+# Rest of a JSON string after its opening quote, escapes included
+_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# How a JSON object (as opposed to a brace in prose) begins
+_OBJECT_START = re.compile(r'\{\s*["}]')
+# Markdown code fence opener, with an optional language tag
+_FENCE = re.compile(r"```[\w+-]*[ \t]*\n?")
+
+# Lenient about raw control characters (literal newlines in customCode)
+_DECODER = json.JSONDecoder(strict=False)
+# Characters _first_object may decode across its candidate spans, per
+# character searched; nested spans would otherwise cost quadratic time
+SPAN_DECODE_BUDGET = 4
+
+
+class JsonObjectScanner:
+    """
+    Feed text fragments as they arrive; feed() returns True once a complete,
+    parseable top-level JSON object has been seen.
+
+    Braces inside JSON strings (including escaped quotes) are ignored, so code
+    in string values such as customCode does not confuse the depth count.
+    Text before the object (prose, code fences) is skipped.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.end: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.result is not None
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return self._text
+
+    @property
+    def object_text(self) -> Optional[str]:
+        """Source text of the completed object"""
+        if self.end is None:
+            return None
+        return self.text[self._start:self.end]
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete:
+            return True
+
+        self._text += chunk
+        text = self._text
+
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            i += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                # Outside any object only an opening brace matters; quotes in
+                # surrounding prose must not flip string state
+                if ch == "{":
+                    self._start = i - 1
+                    self._depth = 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._try_parse(text, i):
+                        self._pos = i
+                        return True
+                    # Balanced but not JSON (a brace in prose): look for the
+                    # next top-level object. Never settle for one nested in
+                    # the failed span, e.g. the params of a config - the
+                    # full-response parse after the stream does better.
+                    self._start = None
+
+        self._pos = len(text)
+        return False
+
+    def _try_parse(self, text: str, end: int) -> bool:
+        try:
+            # Lenient like find_json_object: raw newlines in customCode
+            parsed = _DECODER.decode(text[self._start:end])
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(parsed, dict):
+            return False
+        self.result = parsed
+        self.end = end
+        return True
+
+
+def balanced_spans(text: str, pos: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    (start, end) of every balanced {...} in text[pos:end], in one pass
+
+    Braces inside JSON strings are skipped (quotes only open strings inside a
+    brace, so apostrophes in surrounding prose are harmless). Spans are
+    returned ordered by start, outer spans before the ones they contain.
+    """
+    end = len(text) if end is None else end
+    open_braces: List[int] = []
+    spans = []
+    while True:
+        match = _STRUCTURAL.search(text, pos, end)
+        if match is None:
+            break
+        i = match.start()
+        ch = text[i]
+        pos = i + 1
+        if ch == "{":
+            open_braces.append(i)
+        elif ch == "}":
+            if open_braces:
+                spans.append((open_braces.pop(), pos))
+        elif open_braces:
+            string = _STRING_TAIL.match(text, pos, end)
+            if string is None:
+                break  # unterminated string: nothing after it can close
+            pos = string.end()
+    spans.sort()
+    return spans
+
+
+def _first_object(text: str, pos: int, end: int) -> Optional[Tuple[Dict[str, Any], int, int]]:
+    first = text.find("{", pos, end)
+    if first == -1:
+        return None
+    # Common case: the first brace opens the config
+    failed_at = -1
+    try:
+        parsed, parsed_end = _DECODER.raw_decode(text, first)
+        if parsed_end <= end:
+            return parsed, first, parsed_end
+    except json.JSONDecodeError as e:
+        failed_at = e.pos
+    except RecursionError:
+        pass
+
+    # Otherwise try every balanced span, outermost first. Each is decoded
+    # from its own slice (a decode error's line/column lookup scans back to
+    # the start of the string it was given), prose spans are rejected
+    # before decoding, and a span containing the point where decoding an
+    # enclosing span failed is skipped: it would fail there too. Slicing
+    # and decoding cost up to the span's length, and nested spans that each
+    # fail early add up quadratically, so the search gives up once the
+    # spans tried total SPAN_DECODE_BUDGET times the searched length.
+    budget = SPAN_DECODE_BUDGET * (end - first)
+    failed_before = -1
+    for start, stop in balanced_spans(text, first, end):
+        if start == first or start < failed_at < stop or stop <= failed_before:
+            continue
+        if not _OBJECT_START.match(text, start):
+            continue
+        budget -= stop - start
+        if budget < 0:
+            break
+        try:
+            parsed, length = _DECODER.raw_decode(text[start:stop])
+        except json.JSONDecodeError as e:
+            failed_at = start + e.pos
+            continue
+        except RecursionError:
+            failed_before = stop
+            continue
+        return parsed, start, start + length
+    return None
+
+
+def find_json_object(text: str) -> Optional[Tuple[Dict[str, Any], int, int]]:
+    """
+    First JSON object in a model response, preferring one inside a code fence
+
+    Handles prose around the object, ```json fences, arbitrary nesting and
+    braces inside string values. The brace scan is one pass; decoding
+    candidate spans is capped at SPAN_DECODE_BUDGET times the length
+    searched, so adversarial input stays linear (and may go unparsed).
+
+    Returns:
+        (object, start, end) with text[start:end] its source, or None
+    """
+    if "```" in text:
+        pos = 0
+        while True:
+            fence = _FENCE.search(text, pos)
+            if fence is None:
+                break
+            close = text.find("```", fence.end())
+            if close == -1:
+                close = len(text)
+            found = _first_object(text, fence.end(), close)
+            if found is not None:
+                return found
+            pos = close + 3
+    return _first_object(text, 0, len(text))
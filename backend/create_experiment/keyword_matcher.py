@@ -0,0 +1,79 @@
+"""
+Keyword Matcher - Scores every template against a prompt in one pass over its words
+
+All keywords of all templates are expanded once into a table of their
+inflected forms, so a prompt is scored by splitting it into words and looking
+each one up. Keywords match whole words only ("sort" no longer fires on "resort",
+"tree" not on "street") but allow the usual inflections: "node" / "nodes",
+"sort" / "sorting" / "sorted", "merge" / "merging".
+"""
+import re
+from typing import Dict, Iterable, List, Set
+
+_WORD = re.compile(r"\w+")
+
+# Inflections allowed after a keyword's stem
+_SUFFIXES = ("", "s", "es", "ed", "ing")
+
+
+def _stem(keyword: str) -> str:
+    # Plural keywords ("nodes", "particles") also match their singular
+    if len(keyword) > 3 and keyword.endswith("s") and not keyword.endswith("ss"):
+        return keyword[:-1]
+    return keyword
+
+
+def _forms(keyword: str) -> List[str]:
+    """Every inflected form a keyword matches, words separated by one space"""
+    stem = _stem(" ".join(keyword.lower().split()))
+    if stem.endswith("e") and len(stem.rsplit(" ", 1)[-1]) > 3:
+        # merge -> merges, merged, merging
+        return [stem[:-1] + suffix for suffix in ("e", "es", "ed", "ing")]
+    return [stem + suffix for suffix in _SUFFIXES]
+
+
+class KeywordMatcher:
+    """
+    Built once from {label: keywords}; scores(text) counts, per label, how
+    many distinct keywords of that label occur in the text.
+
+    Usage:
+        matcher = KeywordMatcher({"network": ["nodes", "routing"], "generic": ["sort"]})
+        matcher.scores("Sorting nodes")  # {"network": 1, "generic": 1}
+    """
+
+    def __init__(self, keyword_table: Dict[str, Iterable[str]]):
+        self.labels = list(keyword_table)
+        # A keyword listed under several labels counts for each of them
+        self._labels_by_keyword: Dict[str, List[str]] = {}
+        for label, keywords in keyword_table.items():
+            for keyword in keywords:
+                self._labels_by_keyword.setdefault(keyword.lower(), []).append(label)
+
+        # Inflected form -> keyword. Prompts are split into words once and
+        # each word (or pair of words, for "linked list") is a dict lookup,
+        # which beats one big regex alternation of all the forms.
+        self._keyword_by_form: Dict[str, str] = {}
+        for keyword in self._labels_by_keyword:
+            for form in _forms(keyword):
+                self._keyword_by_form.setdefault(form, keyword)
+        self._phrase_starts = {form.split()[0] for form in self._keyword_by_form if " " in form}
+
+    def matched_keywords(self, text: str) -> Set[str]:
+        keyword_by_form = self._keyword_by_form
+        words = _WORD.findall(text.lower())
+        present = set(words)
+        keywords = {keyword_by_form[form] for form in present & keyword_by_form.keys()}
+        if not self._phrase_starts.isdisjoint(present):
+            for first, second in zip(words, words[1:]):
+                keyword = keyword_by_form.get(f"{first} {second}")
+                if keyword:
+                    keywords.add(keyword)
+        return keywords
+
+    def scores(self, text: str) -> Dict[str, int]:
+        scores = dict.fromkeys(self.labels, 0)
+        for keyword in self.matched_keywords(text):
+            for label in self._labels_by_keyword[keyword]:
+                scores[label] += 1
+        return scores
@@ -0,0 +1,272 @@
+"""
+Minifier - Conservative HTML/CSS/JS minification for generated experiments
+
+The templates emit heavily indented documents. This strips indentation,
+comments and redundant whitespace without rewriting any code: strings,
+template literals, regex literals, <pre> and <textarea> are copied verbatim
+and JS line breaks are kept wherever automatic semicolon insertion could
+depend on them. A <script> or <style> block the scanner cannot parse is
+left untouched.
+"""
+import re
+from typing import List, Optional
+
+# Tags around which whitespace-only text never renders
+BLOCK_TAGS = {
+    "!doctype", "html", "head", "body", "meta", "title", "link", "style", "script",
+    "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "section",
+    "header", "footer", "main", "nav", "article", "aside", "table", "thead", "tbody",
+    "tr", "td", "th", "form", "br", "hr", "canvas", "svg",
+}
+
+# Elements whose content is copied as-is
+RAW_TAGS = ("pre", "textarea")
+
+_HTML_TOKEN = re.compile(
+    r"<(?:!--.*?-->"
+    r"|(script|style|pre|textarea)\b[^>]*>.*?</\1\s*>"
+    r"|[!/]?[a-zA-Z][^>]*>)",
+    re.S | re.I,
+)
+_TAG_NAME = re.compile(r"<\/?(!?[a-zA-Z][a-zA-Z0-9]*)")
+_JS_TYPE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]+)""", re.I)
+
+# JS: a "/" after these starts a regex literal rather than a division
+_REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw")
+_JS_TOKEN = re.compile(
+    r"(?P<code>[^\"'`/]+)"
+    r"|(?P<string>\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*')"
+    r"|(?P<line_comment>//[^\n]*)"
+    r"|(?P<block_comment>/\*.*?\*/)"
+    r"|(?P<other>.)",
+    re.S,
+)
+_JS_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+_JS_SPACES = re.compile(r"[ \t\f\v]{2,}|[\t\f\v]")
+_JS_INDENT = re.compile(r"\n\s*")
+# A space next to punctuation can always go; around + - / only when the
+# other side is not one of them too (a + +b, a - -b, a / /re/). Patterns
+# start with the literal so the engine can skip ahead cheaply.
+_JS_SPACE_PUNCTUATION = re.compile(r" (?:(?=[{}()\[\];,:=<>?!&|*%^~])|(?<=[{}()\[\];,:=<>?!&|*%^~] ))")
+_JS_SPACE_OPERATOR = re.compile(r" (?:(?![+\-/])(?<=[+\-/] )|(?<![+\-/] )(?=[+\-/]))")
+_JS_REDUNDANT_NEWLINE = re.compile(r"\n(?:(?<=[{;,(\[]\n)|(?=\}))")
+_CSS_STRING = re.compile(r"(\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*')")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_UNTERMINATED_CSS_COMMENT = re.compile(r"/\*(?!.*?\*/)", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_SPACE_AROUND = re.compile(r" (?:(?=[{};,>])|(?<=[{};,>] ))")
+_CSS_SPACE_AFTER_COLON = re.compile(r": ")
+
+
+def minify_html(html: str) -> str:
+    """Minify a complete HTML document (inline <script>/<style> included)"""
+    out: List[str] = []
+    pos = 0
+    prev_tag: Optional[str] = None
+    for match in _HTML_TOKEN.finditer(html):
+        if match.start() > pos:
+            out.append(_minify_text(html[pos:match.start()], prev_tag, _tag_name(match.group(0))))
+        token = match.group(0)
+        name = _tag_name(token)
+        if token.startswith("<!--"):
+            # Keep conditional comments, drop the rest
+            if token.startswith("<!--[if"):
+                out.append(token)
+        elif match.group(1):
+            out.append(_minify_element(token, match.group(1).lower()))
+        else:
+            out.append(token)
+        if name:
+            prev_tag = name
+        pos = match.end()
+    if pos < len(html):
+        out.append(_minify_text(html[pos:], prev_tag, None))
+    return "".join(out).strip()
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and whitespace that never affects a stylesheet"""
+    parts = _CSS_STRING.split(css)
+    if _UNTERMINATED_CSS_COMMENT.search("".join(parts[::2])):
+        raise ValueError("unterminated CSS comment")
+    # Strings sit at odd indices and are kept verbatim
+    for i in range(0, len(parts), 2):
+        code = _CSS_COMMENT.sub(" ", parts[i])
+        code = _CSS_SPACE_AROUND.sub("", _CSS_SPACE.sub(" ", code))
+        parts[i] = _CSS_SPACE_AFTER_COLON.sub(":", code).replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def minify_js(js: str) -> str:
+    """
+    Drop comments, indentation and spaces next to punctuation
+
+    Strings, template and regex literals are swapped for placeholders while
+    the code around them is minified. Line breaks are only removed after
+    "{", ";", ",", "(" and "[" and before "}" (where no statement can end),
+    so ASI behaves exactly as in the input.
+    """
+    literals: List[str] = []
+    pieces: List[str] = []
+    i, n = 0, len(js)
+    while i < n:
+        match = _JS_TOKEN.match(js, i)
+        kind = match.lastgroup
+        end = match.end()
+        if kind == "code":
+            pieces.append(match.group(0))
+        elif kind == "block_comment":
+            pieces.append("\n" if "\n" in match.group(0) else " ")
+        elif kind == "string":
+            pieces.append(_placeholder(literals, match.group(0)))
+        elif kind == "other":
+            c = js[i]
+            if c in "\"'":
+                raise ValueError("unterminated string")
+            if c == "`":
+                end = _skip_template(js, i)
+                pieces.append(_placeholder(literals, js[i:end]))
+            elif _starts_regex("".join(pieces[-3:])):
+                end = _skip_regex(js, i)
+                pieces.append(_placeholder(literals, js[i:end]))
+            else:
+                pieces.append(c)
+        # line comments are dropped; the newline after them stays
+        i = end
+
+    code = _JS_INDENT.sub("\n", "".join(pieces).replace("\r", "\n"))
+    code = _JS_SPACES.sub(" ", code).replace(" \n", "\n")
+    code = _JS_SPACE_PUNCTUATION.sub("", code)
+    code = _JS_SPACE_OPERATOR.sub("", code)
+    code = _JS_REDUNDANT_NEWLINE.sub("", code)
+    # a < !b must not become the start of an HTML-like comment
+    code = code.replace("<!", "< !")
+    return _JS_PLACEHOLDER.sub(lambda m: literals[int(m.group(1))], code).strip()
+
+
+def _placeholder(literals: List[str], literal: str) -> str:
+    literals.append(literal)
+    return f"\x00{len(literals) - 1}\x00"
+
+
+def _starts_regex(preceding: str) -> bool:
+    stripped = preceding.rstrip()
+    if not stripped:
+        return True
+    if stripped[-1] in _REGEX_PREFIX:
+        return True
+    word = re.search(r"[A-Za-z_$][\w$]*$", stripped)
+    return bool(word) and word.group(0) in _REGEX_KEYWORDS
+
+
+def _skip_string(text: str, start: int) -> int:
+    quote = text[start]
+    i = start + 1
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if c == "\n":
+            break
+        i += 1
+    raise ValueError("unterminated string")
+
+
+def _skip_template(text: str, start: int) -> int:
+    """End of a `template literal`, including nested ${...} expressions"""
+    i = start + 1
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+        elif c == "`":
+            return i + 1
+        elif text.startswith("${", i):
+            i = _skip_expression(text, i + 2)
+        else:
+            i += 1
+    raise ValueError("unterminated template literal")
+
+
+def _skip_expression(text: str, start: int) -> int:
+    depth = 1
+    i = start
+    while i < len(text):
+        c = text[i]
+        if c in "\"'":
+            i = _skip_string(text, i)
+        elif c == "`":
+            i = _skip_template(text, i)
+        elif c == "{":
+            depth += 1
+            i += 1
+        elif c == "}":
+            depth -= 1
+            i += 1
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    raise ValueError("unterminated template expression")
+
+
+def _skip_regex(text: str, start: int) -> int:
+    i = start + 1
+    in_class = False
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "\n":
+            break
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < len(text) and text[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    raise ValueError("unterminated regex literal")
+
+
+def _tag_name(token: str) -> Optional[str]:
+    match = _TAG_NAME.match(token)
+    return match.group(1).lower() if match else None
+
+
+def _minify_text(text: str, prev_tag: Optional[str], next_tag: Optional[str]) -> str:
+    collapsed = re.sub(r"\s+", " ", text)
+    if prev_tag in BLOCK_TAGS:
+        collapsed = collapsed.lstrip()
+    if next_tag in BLOCK_TAGS:
+        collapsed = collapsed.rstrip()
+    return collapsed
+
+
+def _minify_element(element: str, name: str) -> str:
+    """<script>/<style> get their content minified; raw tags stay as they are"""
+    if name in RAW_TAGS:
+        return element
+    open_end = element.index(">") + 1
+    close_start = element.lower().rindex("</")
+    open_tag, content, close_tag = element[:open_end], element[open_end:close_start], element[close_start:]
+
+    if name == "script":
+        script_type = _JS_TYPE.search(open_tag)
+        if script_type and script_type.group(1).lower() not in ("text/javascript", "module", "application/javascript"):
+            return element
+        minify = minify_js
+    else:
+        minify = minify_css
+    try:
+        return open_tag + minify(content) + close_tag
+    except ValueError:
+        return element
@@ -1,25 +1,85 @@
 """
 Ollama Client - Handles communication with Qwen2.5-Coder model
 """
-import aiohttp
 import asyncio
 import logging
-from typing import Optional
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Union
+
+from llm.base import LLMBackend, LLMError, LLMResponse
+from llm.factory import create_backend
+from llm.retry import Deadline, RetryPolicy, retry_call
+
+from .json_stream import JsonObjectScanner
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = os.environ.get("EXPERIMENT_MODEL", "qwen2.5-coder:7b")
+DEFAULT_TIMEOUT_S = float(os.environ.get("EXPERIMENT_LLM_TIMEOUT_S", "60"))
+# How long Ollama keeps the model (and the cached prompt prefix) loaded between
+# requests: a duration ("30m", "2h") or seconds, -1 to keep it loaded for good
+DEFAULT_KEEP_ALIVE = os.environ.get("EXPERIMENT_KEEP_ALIVE", "30m")
+# How long generate_until_json waits for the end of a stream once the config
+# is complete before it counts the cancellation as an early stop
+STREAM_END_GRACE_S = 0.005
+
+
+def parse_keep_alive(value: Union[str, int]) -> Union[str, int]:
+    """Ollama reads a bare number as seconds but rejects it as a string ("-1")"""
+    text = str(value).strip()
+    return int(text) if text.lstrip("-").isdigit() else text
+
+
+@dataclass
+class StreamResult:
+    """Outcome of a streamed generation"""
+    text: str
+    tokens: int
+    stopped_early: bool
+    elapsed_ms: float
+    first_token_ms: Optional[float] = None
+
+
+@dataclass
+class HedgedResult:
+    """Outcome of a hedged generation"""
+    response: Optional[Union[StreamResult, LLMResponse]]  # winner, else the last one to finish
+    value: Any  # what accept() returned for the winner; None if no attempt was accepted
+    attempt: Optional[int]  # index of the winning attempt (0 = the original request)
+    launched: int
+    elapsed_ms: float
+
 
 class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434"):
-        self.base_url = base_url
-        self.model = "qwen2.5-coder:7b"
-        self.timeout = aiohttp.ClientTimeout(total=60)
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        backend: Optional[LLMBackend] = None,
+        keep_alive: Union[str, int] = DEFAULT_KEEP_ALIVE
+    ):
+        # The backend (real Ollama or the load-test stub) comes from LLM_BACKEND
+        self.backend = backend or create_backend(model, timeout=DEFAULT_TIMEOUT_S)
+        self.model = self.backend.model
+        self.keep_alive = parse_keep_alive(keep_alive)
+    
+    async def start(self):
+        """Open the pooled HTTP session; call once at app startup"""
+        await self.backend.start()
+    
+    async def close(self):
+        """Close the pooled HTTP session; call once at app shutdown"""
+        await self.backend.close()
     
     async def generate(
         self, 
         prompt: str, 
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        timeout: Optional[float] = None
     ) -> str:
         """
         Generate response from Ollama model
@@ -28,44 +88,218 @@ class OllamaClient:
             prompt: The prompt to send to the model
             temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
             max_tokens: Maximum response length
+            format: "json" or a JSON schema to constrain the output to
+            timeout: Per-request time limit in seconds (client default if None)
             
         Returns:
             str: The model's response
         """
-        url = f"{self.base_url}/api/generate"
-        
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens,
-                "top_p": 0.9,
-                "top_k": 40,
-            }
-        }
+        result = await self.generate_response(prompt, temperature, max_tokens, format, timeout)
+        return result.text
+    
+    async def generate_response(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        timeout: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> LLMResponse:
+        """
+        Like generate(), but returns the full response with token counts and
+        prompt-eval timing (`seed` fixes the sample)
+        """
+        options = self.sampling_options(temperature, max_tokens, seed)
         
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"Ollama API error: {error_text}")
-                    
-                    data = await response.json()
-                    return data.get("response", "")
-                    
-        except asyncio.TimeoutError:
-            logger.error("Ollama request timed out")
-            raise Exception("Request to AI model timed out. Please try again.")
-        except aiohttp.ClientError as e:
-            logger.error(f"Ollama client error: {e}")
-            raise Exception(f"Could not connect to Ollama: {e}")
+            return await self.backend.generate(
+                prompt, options, timeout=timeout, format=format, keep_alive=self.keep_alive
+            )
+        except LLMError:
+            raise
         except Exception as e:
             logger.error(f"Unexpected error in Ollama client: {e}")
             raise
     
+    async def generate_until_json(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        timeout: Optional[float] = None,
+        seed: Optional[int] = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> StreamResult:
+        """
+        Stream a generation and stop as soon as a complete top-level JSON
+        object has arrived, cancelling the rest of the Ollama request
+        
+        `on_token` sees every fragment as it arrives (live progress). Being
+        cancelled also cancels the Ollama request.
+        
+        Returns:
+            StreamResult: The object's text if one completed (otherwise the
+            full response), streamed token count, whether it stopped early and
+            time to first token (≈ prompt-eval time)
+        """
+        start = time.perf_counter()
+        scanner = JsonObjectScanner()
+        tokens = 0
+        first_token_ms = None
+        
+        stream = self.backend.stream(
+            prompt, self.sampling_options(temperature, max_tokens, seed),
+            timeout=timeout, format=format, keep_alive=self.keep_alive
+        )
+        stopped_early = False
+        try:
+            async for piece in stream:
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                tokens += 1
+                if on_token:
+                    on_token(piece)
+                if scanner.feed(piece):
+                    stopped_early = not await self._stream_ended(stream)
+                    break
+        finally:
+            # Closing the stream drops the HTTP connection, which aborts generation
+            await stream.aclose()
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if scanner.complete:
+            logger.info(f"Config complete after {tokens} streamed tokens ({elapsed_ms:.0f} ms)")
+            return StreamResult(scanner.object_text, tokens, stopped_early, elapsed_ms, first_token_ms)
+        return StreamResult(scanner.text, tokens, False, elapsed_ms, first_token_ms)
+    
+    @staticmethod
+    async def _stream_ended(stream) -> bool:
+        """
+        Whether a stream whose config just completed was ending anyway (the
+        object closed on the last token; Ollama's done line follows at once)
+        rather than being cut off; a piece or silence means it was cut off
+        """
+        try:
+            await asyncio.wait_for(stream.__anext__(), STREAM_END_GRACE_S)
+        except StopAsyncIteration:
+            return True
+        except asyncio.TimeoutError:
+            pass
+        return False
+    
+    async def generate_hedged(
+        self,
+        prompt: str,
+        accept: Callable[[str], Any],
+        attempts: int = 2,
+        delay_s: float = 2.0,
+        temperature: float = 0.7,
+        temperature_step: float = 0.1,
+        stream: bool = False,
+        max_tokens: int = 2000,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        timeout: Optional[float] = None
+    ) -> HedgedResult:
+        """
+        Run up to `attempts` generations of the same prompt and return the
+        first one `accept` takes, cancelling the others
+        
+        Another attempt starts when nothing has been accepted within
+        `delay_s` (0 starts them all at once) or as soon as an attempt fails
+        or is rejected. Each extra attempt gets its own seed and a
+        temperature `temperature_step` higher than the one before it.
+        
+        Args:
+            accept: Maps a response text to a value (e.g. a validated config),
+                or None to reject it
+            stream: Use generate_until_json for each attempt
+            
+        Returns:
+            HedgedResult: The winner and accept()'s value; if every attempt
+            was rejected, the last response with value None
+            
+        Raises:
+            LLMError: Every attempt failed without a response
+        """
+        start = time.perf_counter()
+        tasks: Dict[asyncio.Task, int] = {}
+        last_response = None
+        last_error: Optional[Exception] = None
+        
+        def launch():
+            index = len(tasks)
+            seed = random.randrange(1 << 31) if index else None
+            attempt_temperature = min(temperature + index * temperature_step, 2.0)
+            if stream:
+                coro = self.generate_until_json(prompt, attempt_temperature, max_tokens, format, timeout, seed=seed)
+            else:
+                coro = self.generate_response(prompt, attempt_temperature, max_tokens, format, timeout, seed=seed)
+            tasks[asyncio.ensure_future(coro)] = index
+        
+        launch()
+        pending = set(tasks)
+        try:
+            while pending:
+                can_hedge = len(tasks) < attempts
+                done, pending = await asyncio.wait(
+                    pending, timeout=delay_s if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info(f"No accepted response after {delay_s}s, starting attempt {len(tasks) + 1}")
+                    launch()
+                    pending = {task for task in tasks if not task.done()}
+                    continue
+                
+                for task in done:
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        logger.warning(f"Hedged attempt {tasks[task] + 1} failed: {e}")
+                        last_error = e
+                    else:
+                        value = accept(response.text)
+                        if value is not None:
+                            elapsed_ms = (time.perf_counter() - start) * 1000
+                            return HedgedResult(response, value, tasks[task], len(tasks), elapsed_ms)
+                        logger.info(f"Hedged attempt {tasks[task] + 1} rejected")
+                        last_response = response
+                    if len(tasks) < attempts:
+                        launch()
+                pending = {task for task in tasks if not task.done()}
+        finally:
+            # Cancelling drops the HTTP request, which aborts the generation
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if last_response is None and last_error is not None:
+            raise last_error
+        return HedgedResult(last_response, None, None, len(tasks), (time.perf_counter() - start) * 1000)
+    
+    @staticmethod
+    def sampling_options(temperature: float, max_tokens: int, seed: Optional[int] = None) -> Dict[str, Any]:
+        options = {
+            "temperature": temperature,
+            "num_predict": max_tokens,
+            "top_p": 0.9,
+            "top_k": 40,
+        }
+        if seed is not None:
+            options["seed"] = seed
+        return options
+    
+    async def warm_up(self, prompt: str = "", timeout: Optional[float] = None) -> LLMResponse:
+        """
+        Load the model into memory (held for keep_alive) so the first real
+        request does not pay for it. A non-empty prompt, e.g. the shared
+        prompt prefix, is also evaluated so its cached context is ready.
+        """
+        return await self.backend.generate(
+            prompt, {"num_predict": 1}, timeout=timeout, keep_alive=self.keep_alive
+        )
+    
     async def health_check(self) -> bool:
         """
         Check if Ollama is running and model is available
@@ -73,37 +307,33 @@ class OllamaClient:
         Returns:
             bool: True if healthy, False otherwise
         """
-        try:
-            url = f"{self.base_url}/api/tags"
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        models = data.get("models", [])
-                        model_names = [m.get("name", "") for m in models]
-                        
-                        # Check if our model is available
-                        return any(self.model in name for name in model_names)
-            return False
-        except Exception as e:
-            logger.error(f"Health check failed: {e}")
-            return False
+        return await self.backend.health_check()
+    
+    async def model_loaded(self) -> Optional[bool]:
+        """Whether Ollama still holds the model in memory (None if unknown)"""
+        return await self.backend.model_loaded()
     
     async def generate_with_retry(
         self, 
         prompt: str, 
-        max_retries: int = 3
-    ) -> Optional[str]:
-        """
-        Generate with automatic retry on failure
-        """
-        for attempt in range(max_retries):
-            try:
-                result = await self.generate(prompt)
-                return result
-            except Exception as e:
-                logger.warning(f"Attempt {attempt + 1} failed: {e}")
-                if attempt == max_retries - 1:
-                    raise
-                await asyncio.sleep(1)  # Wait before retry
-        return None
+        max_retries: int = 3,
+        deadline: Optional[Deadline] = None,
+        policy: Optional[RetryPolicy] = None,
+        **kwargs: Any
+    ) -> str:
+        """
+        Generate with retries on retryable errors (timeouts, connection
+        failures, overloaded server), jittered exponential backoff in between
+        
+        Args:
+            max_retries: Attempts in total (ignored when a policy is given)
+            deadline: Budget shared by all attempts and sleeps (the client
+                timeout per attempt if None)
+            kwargs: Passed to generate() (temperature, max_tokens, format)
+        """
+        deadline = deadline or Deadline(DEFAULT_TIMEOUT_S * max_retries)
+        policy = policy or RetryPolicy(max_attempts=max_retries)
+        return await retry_call(
+            lambda timeout: self.generate(prompt, timeout=timeout, **kwargs),
+            deadline, policy, timeout=DEFAULT_TIMEOUT_S
+        )
@@ -3,26 +3,28 @@ Prompt Engineering Engine - Builds optimized prompts for Qwen2.5-Coder
 """
 import json
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
+from .json_stream import find_json_object
+from .keyword_matcher import KeywordMatcher
+from .schema import DESCRIPTION_LENGTH, TEMPLATE_PARAMS, TITLE_LENGTH
+
 logger = logging.getLogger(__name__)
 
 
 class PromptEngine:
-    def __init__(self):
+    # Bump whenever prompt wording or examples change: cached configs are keyed on it
+    VERSION = "5"
+
+    def __init__(self, few_shot: str = "relevant", example_token_budget: int = 300, max_examples: int = 2):
         # Template definitions - these describe what each template does
         self.templates = {
             "network": {
                 "name": "Network Simulation",
                 "description": "Simulates data packets flowing through network nodes with routing algorithms",
                 "keywords": ["network", "nodes", "packets", "routing", "connection", "graph", "topology"],
-                "params": {
-                    "nodeCount": {"type": "int", "min": 4, "max": 12, "default": 8},
-                    "packetRate": {"type": "int", "min": 1, "max": 10, "default": 2},
-                    "routingMode": {"type": "select", "options": ["shortest", "random", "multipath"], "default": "shortest"},
-                    "layout": {"type": "select", "options": ["circular", "grid", "random"], "default": "circular"}
-                },
+                "params": TEMPLATE_PARAMS["network"],
                 "examples": [
                     "Create a network with many nodes",
                     "Show me packet routing with random paths",
@@ -33,12 +35,7 @@ class PromptEngine:
                 "name": "Particle System",
                 "description": "Simulates particles with physics like gravity, attraction, and motion",
                 "keywords": ["particles", "physics", "gravity", "attraction", "motion", "swarm", "dots"],
-                "params": {
-                    "particleCount": {"type": "int", "min": 50, "max": 1000, "default": 200},
-                    "gravity": {"type": "float", "min": 0, "max": 2, "default": 0.5},
-                    "attractionMode": {"type": "select", "options": ["center", "mouse", "none"], "default": "center"},
-                    "color": {"type": "select", "options": ["rainbow", "blue", "fire", "purple"], "default": "rainbow"}
-                },
+                "params": TEMPLATE_PARAMS["particles"],
                 "examples": [
                     "Particle system with strong gravity",
                     "Lots of colorful particles",
@@ -49,13 +46,7 @@ class PromptEngine:
                 "name": "Flocking Simulation",
                 "description": "Simulates bird-like flocking behavior with cohesion, separation, and alignment",
                 "keywords": ["flocking", "birds", "boids", "swarm", "group", "cohesion", "flock"],
-                "params": {
-                    "boidCount": {"type": "int", "min": 20, "max": 200, "default": 50},
-                    "cohesion": {"type": "float", "min": 0, "max": 2, "default": 1},
-                    "separation": {"type": "float", "min": 0, "max": 2, "default": 1},
-                    "alignment": {"type": "float", "min": 0, "max": 2, "default": 1},
-                    "maxSpeed": {"type": "float", "min": 1, "max": 5, "default": 3}
-                },
+                "params": TEMPLATE_PARAMS["flocking"],
                 "examples": [
                     "Bird flocking simulation",
                     "Tight swarm behavior",
@@ -66,12 +57,7 @@ class PromptEngine:
                 "name": "Wave Simulation",
                 "description": "Generates wave patterns with frequency, amplitude, and different wave types",
                 "keywords": ["waves", "wave", "sine", "ripple", "oscillation", "frequency", "amplitude", "sound"],
-                "params": {
-                    "frequency": {"type": "float", "min": 0.1, "max": 5, "default": 1},
-                    "amplitude": {"type": "int", "min": 10, "max": 100, "default": 50},
-                    "waveType": {"type": "select", "options": ["sine", "square", "triangle"], "default": "sine"},
-                    "colorScheme": {"type": "select", "options": ["blue", "rainbow", "fire"], "default": "blue"}
-                },
+                "params": TEMPLATE_PARAMS["waves"],
                 "examples": [
                     "Wave simulation with high frequency",
                     "Sine waves with rainbow colors",
@@ -79,241 +65,454 @@ class PromptEngine:
                 ]
             }
         }
+        
+        # Parameters of the generic/custom template (described separately in the prompt)
+        self.generic_params = TEMPLATE_PARAMS["generic"]
+        
+        # Keywords that point to algorithms/data structures (generic template)
+        self.generic_keywords = [
+            "sort", "algorithm", "tree", "graph", "data structure", "binary", "heap",
+            "queue", "stack", "linked list", "array", "hash", "search", "traversal",
+            "merge", "quick", "insertion", "selection", "bubble", "heap sort",
+            "quicksort", "mergesort", "heapsort",
+            "dfs", "bfs", "dijkstra", "pathfinding", "recursion", "iteration"
+        ]
+        
+        # Every keyword table compiled into one whole-word regex
+        self.keyword_matcher = KeywordMatcher({
+            **{template_id: info["keywords"] for template_id, info in self.templates.items()},
+            "generic": self.generic_keywords,
+        })
+        
+        # Few-shot examples. The six "core" ones make up the full prompt;
+        # the rest only take part in relevance selection.
+        self.few_shot_examples = [
+            {
+                "template": "network",
+                "prompt": "Create a network simulation with many nodes and fast packets",
+                "config": {
+                    "template": "network",
+                    "params": {"nodeCount": 12, "packetRate": 8, "routingMode": "shortest", "layout": "circular"},
+                    "title": "High-Speed Network Simulation",
+                    "description": "Dense network topology with rapid packet transmission showing efficient routing"
+                },
+                "core": True
+            },
+            {
+                "template": "network",
+                "prompt": "Small grid network where packets take random routes",
+                "config": {
+                    "template": "network",
+                    "params": {"nodeCount": 5, "packetRate": 3, "routingMode": "random", "layout": "grid"},
+                    "title": "Random Routing on a Grid",
+                    "description": "A small grid of nodes where each packet picks a random path to its destination"
+                }
+            },
+            {
+                "template": "particles",
+                "prompt": "Show me particles with zero gravity",
+                "config": {
+                    "template": "particles",
+                    "params": {"particleCount": 300, "gravity": 0, "attractionMode": "none", "color": "rainbow"},
+                    "title": "Zero-Gravity Particle Field",
+                    "description": "Particles floating freely in space without gravitational forces"
+                },
+                "core": True
+            },
+            {
+                "template": "particles",
+                "prompt": "Lots of fiery particles following the mouse",
+                "config": {
+                    "template": "particles",
+                    "params": {"particleCount": 800, "gravity": 0.3, "attractionMode": "mouse", "color": "fire"},
+                    "title": "Fire Particles Following the Cursor",
+                    "description": "A dense cloud of fire-colored particles attracted to the mouse pointer"
+                }
+            },
+            {
+                "template": "flocking",
+                "prompt": "Bird flocking with tight groups",
+                "config": {
+                    "template": "flocking",
+                    "params": {"boidCount": 100, "cohesion": 1.8, "separation": 0.5, "alignment": 1.5, "maxSpeed": 3},
+                    "title": "Tight Formation Flocking",
+                    "description": "Birds forming cohesive groups with strong attraction to flock center"
+                },
+                "core": True
+            },
+            {
+                "template": "flocking",
+                "prompt": "Fast scattered boids that keep their distance",
+                "config": {
+                    "template": "flocking",
+                    "params": {"boidCount": 60, "cohesion": 0.4, "separation": 1.9, "alignment": 0.8, "maxSpeed": 4.5},
+                    "title": "Scattered High-Speed Boids",
+                    "description": "Quick-moving boids with strong separation that spread out instead of clumping"
+                }
+            },
+            {
+                "template": "waves",
+                "prompt": "Wave simulation with high frequency",
+                "config": {
+                    "template": "waves",
+                    "params": {"frequency": 3.5, "amplitude": 60, "waveType": "sine", "colorScheme": "blue"},
+                    "title": "High-Frequency Wave Pattern",
+                    "description": "Rapid oscillating wave patterns with increased frequency"
+                },
+                "core": True
+            },
+            {
+                "template": "waves",
+                "prompt": "Slow square wave with a large amplitude in fire colors",
+                "config": {
+                    "template": "waves",
+                    "params": {"frequency": 0.5, "amplitude": 90, "waveType": "square", "colorScheme": "fire"},
+                    "title": "Slow Large Square Wave",
+                    "description": "A low-frequency square wave with tall steps drawn in warm fire colors"
+                }
+            },
+            {
+                "template": "generic",
+                "prompt": "Bubble sort algorithm visualization",
+                "config": {
+                    "template": "generic",
+                    "params": {"experimentType": "bubble-sort", "arraySize": 20},
+                    "title": "Bubble Sort Visualization",
+                    "description": "Interactive visualization of the bubble sort algorithm showing step-by-step sorting process"
+                },
+                "core": True
+            },
+            {
+                "template": "generic",
+                "prompt": "Binary search tree visualization",
+                "config": {
+                    "template": "generic",
+                    "params": {"experimentType": "binary-search-tree", "nodeCount": 15},
+                    "title": "Binary Search Tree Visualization",
+                    "description": "Interactive visualization of binary search tree operations including insertion and traversal"
+                },
+                "core": True
+            },
+            {
+                "template": "generic",
+                "prompt": "Breadth-first search on a graph",
+                "config": {
+                    "template": "generic",
+                    "params": {"experimentType": "graph-traversal", "nodeCount": 12, "algorithm": "bfs"},
+                    "title": "Breadth-First Search Traversal",
+                    "description": "Step-by-step breadth-first traversal of a graph, visiting nodes level by level"
+                }
+            }
+        ]
+        
+        # Few-shot mode: "relevant" sends only the detected template and the
+        # examples closest to the request (within example_token_budget);
+        # "all" always sends the full prompt
+        self.few_shot = few_shot
+        self.example_token_budget = example_token_budget
+        self.max_examples = max_examples
+        
+        # Identical for every request, so the model server can keep its
+        # evaluated context warm and only process the short suffix
+        self.prompt_prefix = self._build_prompt_prefix()
+        self._template_prefixes: Dict[str, str] = {}
     
     def build_prompt(self, user_prompt: str, template_hint: Optional[str] = None, title: Optional[str] = None, description: Optional[str] = None) -> str:
         """
         Build the complete prompt for Qwen2.5-Coder
         
-        This uses few-shot learning to teach the model the expected format
-        """
+        This uses few-shot learning to teach the model the expected format.
+        The prompt is a precomputed static prefix followed by a short
+        per-request suffix, so Ollama can reuse the prefix's cached context
+        across requests instead of re-evaluating it every time.
         
-        # Select template based on keywords if no hint
-        suggested_template = template_hint or self._detect_template(user_prompt)
+        When the template is clear from the hint or keywords, the prefix only
+        describes that template and the examples are picked per request.
+        """
+        enhanced_prompt = self._enhance_prompt(user_prompt, title, description)
+        suffix = self.build_prompt_suffix(enhanced_prompt, template_hint)
         
-        # Check if the request matches any known template
-        matches_template = self._check_template_match(user_prompt)
+        template_id = self.select_template(enhanced_prompt, template_hint) if self.few_shot == "relevant" else None
+        if template_id is None:
+            return self.prompt_prefix + suffix
         
-        # Enhance user prompt with title/description if provided separately
+        examples = self.select_examples(enhanced_prompt, template_id)
+        return self.template_prefix(template_id) + self._format_examples(examples) + suffix
+    
+    def template_prefix(self, template_id: str) -> str:
+        """The static prefix of a prompt that only describes one template"""
+        if template_id not in self._template_prefixes:
+            self._template_prefixes[template_id] = self._build_prompt_prefix([template_id], examples=[])
+        return self._template_prefixes[template_id]
+    
+    @staticmethod
+    def _enhance_prompt(user_prompt: str, title: Optional[str], description: Optional[str]) -> str:
+        """The user prompt with title/description added if provided separately"""
         enhanced_prompt = user_prompt
         if title and title not in user_prompt:
             enhanced_prompt = f"{title}. {user_prompt}"
         if description and description not in user_prompt:
             enhanced_prompt = f"{enhanced_prompt} {description}"
+        return enhanced_prompt
+    
+    def build_prompt_suffix(self, user_prompt: str, template_hint: Optional[str] = None) -> str:
+        """
+        The only per-request part of the prompt; keep it small and at the end
+        """
+        suffix = f'User Request: "{user_prompt}"\n'
+        if template_hint:
+            suffix += f"Preferred template: {template_hint}\n"
+        return suffix + "\nJSON configuration:\n"
+    
+    def select_template(self, user_prompt: str, template_hint: Optional[str] = None) -> Optional[str]:
+        """
+        The single template a compact prompt should describe, or None when
+        keywords are missing or tied and the model should see every template
+        """
+        if template_hint:
+            hint = template_hint.lower()
+            return hint if hint in self.templates or hint == "generic" else None
         
-        prompt = f"""You are an expert at generating configuration files for interactive simulations.
-Your task is to analyze the user's request and generate a valid JSON configuration.
-
-Available Templates:
-{self._format_templates_info()}
-
-GENERIC TEMPLATE:
+        scores = self.template_scores(user_prompt)
+        if scores.pop("generic"):
+            return "generic"
+        
+        ranked = sorted((score, template_id) for template_id, score in scores.items())
+        (second, _), (best, best_id) = ranked[-2], ranked[-1]
+        if best == 0 or best == second:
+            return None
+        return best_id
+    
+    def template_scores(self, user_prompt: str) -> Dict[str, int]:
+        """
+        Distinct keywords of each template (and "generic") in the prompt,
+        counted in a single pass
+        """
+        return self.keyword_matcher.scores(user_prompt)
+    
+    def select_examples(self, user_prompt: str, template_id: str) -> List[Dict[str, Any]]:
+        """
+        Up to max_examples examples of the template, most similar to the
+        request first, that fit in example_token_budget
+        """
+        words = self._words(user_prompt)
+        candidates = [e for e in self.few_shot_examples if e["template"] == template_id]
+        candidates.sort(key=lambda e: -self._similarity(words, self._words(e["prompt"])))
+        
+        selected = []
+        used = 0
+        for example in candidates[:self.max_examples]:
+            cost = self.estimate_tokens(self._format_example(len(selected) + 1, example))
+            if used + cost > self.example_token_budget:
+                break
+            selected.append(example)
+            used += cost
+        return selected
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count: ~4 characters per token for English and JSON"""
+        return max(1, len(text) // 4)
+    
+    @staticmethod
+    def _words(text: str) -> set:
+        # Crude stemming so "waves"/"wave" and "particles"/"particle" match
+        return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in re.findall(r"[a-z]+", text.lower())}
+    
+    @staticmethod
+    def _similarity(a: set, b: set) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+    
+    def _format_example(self, number: int, example: Dict[str, Any]) -> str:
+        return f'Example {number}:\nUser: "{example["prompt"]}"\n{json.dumps(example["config"], indent=2)}\n\n'
+    
+    def _format_examples(self, examples: List[Dict[str, Any]]) -> str:
+        text = ""
+        if examples:
+            text = "Examples:\n\n" + "".join(self._format_example(i, e) for i, e in enumerate(examples, 1))
+        return text + "Now generate the JSON configuration for the following request. Remember: return ONLY the JSON object, nothing else.\n\n"
+    
+    def _build_prompt_prefix(self, template_ids: Optional[List[str]] = None, examples: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Static part of the generation prompt: templates, instructions and
+        (unless examples=[]) examples. Built once per template set; must not
+        depend on the request.
+        
+        Args:
+            template_ids: Templates to describe (default: all, plus generic)
+            examples: Examples to include (default: the core ones)
+        """
+        if template_ids is None:
+            template_ids = list(self.templates) + ["generic"]
+        if examples is None:
+            examples = [e for e in self.few_shot_examples if e.get("core")]
+        specific = [t for t in template_ids if t in self.templates]
+        
+        sections = []
+        if specific:
+            sections.append(f"Available Templates:\n{self._format_templates_info(specific)}")
+        if "generic" in template_ids:
+            sections.append("""GENERIC TEMPLATE:
 - id: "generic"
 - name: "Generic/Custom Experiment"
 - description: "Use this for experiments that don't match any specific template (e.g., sorting algorithms, data structures, custom visualizations)"
-- params: {{
+- params: {
     "experimentType": "string describing the experiment type (e.g., 'sorting', 'graph', 'algorithm', 'data-structure')",
     "customCode": "optional: if you can generate complete HTML/JS code, include it here as a string",
     "arraySize": "optional: number of elements for array-based experiments (5-100)",
     "nodeCount": "optional: number of nodes for graph/tree experiments (1-100)",
     "algorithm": "optional: specific algorithm name (e.g., 'bubble-sort', 'quick-sort', 'dfs', 'bfs')"
-  }}
-
-User Request: "{enhanced_prompt}"
-
-Instructions:
-1. FIRST, check if the request matches any specific template (network, particles, flocking, waves)
-2. If it matches a specific template, use that template with appropriate parameters
-3. If it DOES NOT match any specific template (e.g., "bubble sort", "binary tree", "graph algorithm"), use "generic" template
-4. For generic template:
+  }""")
+        
+        instructions = ["Read the user's request at the end of this prompt"]
+        if specific and "generic" in template_ids:
+            instructions += [
+                f"FIRST, check if the request matches any specific template ({', '.join(specific)})",
+                "If it matches a specific template, use that template with appropriate parameters",
+                'If it DOES NOT match any specific template (e.g., "bubble sort", "binary tree", "graph algorithm"), use "generic" template',
+            ]
+        elif specific:
+            instructions.append(f'Use the "{specific[0]}" template')
+        else:
+            instructions.append('Use the "generic" template')
+        if "generic" in template_ids:
+            instructions.append("""For generic template:
    - Set "experimentType" to describe the experiment (e.g., "bubble-sort", "binary-search-tree", "graph-traversal")
    - If you can generate HTML/JS code directly, include it in "customCode" field
-   - Otherwise, leave "customCode" empty and the system will generate a basic visualization
-5. Set parameter values that match what the user described
-6. Create a descriptive title and description based on the user's request
-7. Return ONLY valid JSON, no other text or explanation
-8. All parameter values must be within the specified ranges for specific templates
-
-Response Format (JSON only):
-{{
+   - Otherwise, leave "customCode" empty and the system will generate a basic visualization""")
+        instructions += [
+            "Set parameter values that match what the user described",
+            "Create a descriptive title and description based on the user's request",
+            "Return ONLY valid JSON, no other text or explanation",
+        ]
+        if specific:
+            instructions.append("All parameter values must be within the specified ranges for specific templates")
+        
+        prompt = "You are an expert at generating configuration files for interactive simulations.\n"
+        prompt += "Your task is to analyze the user's request and generate a valid JSON configuration.\n\n"
+        prompt += "\n\n".join(sections) + "\n\n"
+        prompt += "Instructions:\n" + "\n".join(f"{i}. {line}" for i, line in enumerate(instructions, 1)) + "\n\n"
+        prompt += """Response Format (JSON only):
+{
   "template": "template_name" or "generic",
-  "params": {{
+  "params": {
     "param1": value1,
     "param2": value2,
     // For generic template, include:
     "experimentType": "description",
     "customCode": "optional HTML/JS code"
-  }},
+  },
   "title": "Descriptive Title",
   "description": "Brief description of what this experiment shows"
-}}
+}
 
-Examples:
-
-Example 1:
-User: "Create a network simulation with many nodes and fast packets"
-{{
-  "template": "network",
-  "params": {{
-    "nodeCount": 12,
-    "packetRate": 8,
-    "routingMode": "shortest",
-    "layout": "circular"
-  }},
-  "title": "High-Speed Network Simulation",
-  "description": "Dense network topology with rapid packet transmission showing efficient routing"
-}}
-
-Example 2:
-User: "Show me particles with zero gravity"
-{{
-  "template": "particles",
-  "params": {{
-    "particleCount": 300,
-    "gravity": 0,
-    "attractionMode": "none",
-    "color": "rainbow"
-  }},
-  "title": "Zero-Gravity Particle Field",
-  "description": "Particles floating freely in space without gravitational forces"
-}}
-
-Example 3:
-User: "Bird flocking with tight groups"
-{{
-  "template": "flocking",
-  "params": {{
-    "boidCount": 100,
-    "cohesion": 1.8,
-    "separation": 0.5,
-    "alignment": 1.5,
-    "maxSpeed": 3
-  }},
-  "title": "Tight Formation Flocking",
-  "description": "Birds forming cohesive groups with strong attraction to flock center"
-}}
-
-Example 4:
-User: "Wave simulation with high frequency"
-{{
-  "template": "waves",
-  "params": {{
-    "frequency": 3.5,
-    "amplitude": 60,
-    "waveType": "sine",
-    "colorScheme": "blue"
-  }},
-  "title": "High-Frequency Wave Pattern",
-  "description": "Rapid oscillating wave patterns with increased frequency"
-}}
-
-Example 5:
-User: "Bubble sort algorithm visualization"
-{{
-  "template": "generic",
-  "params": {{
-    "experimentType": "bubble-sort",
-    "arraySize": 20
-  }},
-  "title": "Bubble Sort Visualization",
-  "description": "Interactive visualization of the bubble sort algorithm showing step-by-step sorting process"
-}}
-
-Example 6:
-User: "Binary search tree visualization"
-{{
-  "template": "generic",
-  "params": {{
-    "experimentType": "binary-search-tree",
-    "nodeCount": 15
-  }},
-  "title": "Binary Search Tree Visualization",
-  "description": "Interactive visualization of binary search tree operations including insertion and traversal"
-}}
-
-Now generate the JSON configuration for the user's request. Remember: return ONLY the JSON object, nothing else.
 """
-        return prompt
+        if examples == []:
+            return prompt
+        return prompt + self._format_examples(examples)
     
     def build_refinement_prompt(self, current_config: Dict[str, Any], refinement_request: str) -> str:
         """
-        Build prompt for refining an existing configuration
+        Build a compact prompt for refining an existing configuration
+        
+        Only the current config and the allowed ranges of its template's
+        params go in - no template catalogue, no few-shot examples - and the
+        model is asked for a patch holding just what changes (applied with
+        apply_refinement).
         """
-        prompt = f"""You are refining an existing simulation configuration based on user feedback.
-
-Current Configuration:
-{json.dumps(current_config, indent=2)}
+        template_id = current_config.get("template", "generic")
+        current = {key: current_config.get(key) for key in ("params", "title", "description")}
+        allowed = "\n".join(
+            f"- {name}: {self._describe_param(spec)}" for name, spec in self._param_specs(template_id).items()
+        )
+        return f"""Update this {template_id} simulation configuration.
 
-User Refinement Request: "{refinement_request}"
+Current: {json.dumps(current, separators=(",", ":"))}
+Allowed params:
+{allowed}
 
-Instructions:
-1. Modify the appropriate parameters based on the user's request
-2. Keep the same template unless explicitly requested to change
-3. Keep parameters within valid ranges
-4. Return ONLY the updated JSON configuration
+Change request: "{refinement_request}"
 
-Return the complete updated configuration as JSON:
-"""
-        return prompt
+Reply with ONLY a JSON object containing what changes, like {{"params":{{"name":value}}}}. Add "title" or "description" only if they should change.
+JSON:"""
     
-    def _detect_template(self, user_prompt: str) -> str:
+    def build_refinement_format(self, template_id: str) -> Tuple[Dict[str, Any], int]:
         """
-        Detect which template to use based on keywords in user prompt
+        JSON schema for a refinement patch (every field optional) plus its
+        max_tokens budget
         """
-        prompt_lower = user_prompt.lower()
-        
-        # Check for generic experiment keywords (algorithms, data structures, etc.)
-        generic_keywords = [
-            "sort", "algorithm", "tree", "graph", "data structure", "binary", "heap",
-            "queue", "stack", "linked list", "array", "hash", "search", "traversal",
-            "merge", "quick", "insertion", "selection", "bubble", "heap sort",
-            "dfs", "bfs", "dijkstra", "pathfinding", "recursion", "iteration"
-        ]
-        
-        if any(keyword in prompt_lower for keyword in generic_keywords):
-            logger.info("Detected generic experiment type from keywords")
-            return "generic"
-        
-        # Count keyword matches for each template
-        scores = {}
-        for template_id, template_info in self.templates.items():
-            score = sum(1 for keyword in template_info["keywords"] if keyword in prompt_lower)
-            scores[template_id] = score
+        param_specs = self._param_specs(template_id)
+        properties, _ = self._param_properties(param_specs)
+        schema = {
+            "type": "object",
+            "properties": {
+                "params": {"type": "object", "properties": properties},
+                "title": {"type": "string", "minLength": TITLE_LENGTH[0], "maxLength": TITLE_LENGTH[1]},
+                "description": {"type": "string", "minLength": DESCRIPTION_LENGTH[0], "maxLength": DESCRIPTION_LENGTH[1]}
+            },
+            "required": ["params"]
+        }
+        if template_id not in self.templates:
+            return schema, self.max_tokens_for(template_id)
+        # Skeleton ~16 tokens, ~12 per param, an optional new title
+        return schema, 16 + 12 * len(param_specs) + 25 + 32
+    
+    def apply_refinement(self, current_config: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge a refinement patch into a copy of the current config
         
-        # Return template with highest score, or default to generic
-        if max(scores.values()) > 0:
-            best_template = max(scores, key=scores.get)
-            logger.info(f"Detected template '{best_template}' from keywords")
-            return best_template
+        Accepts {"params": {...}, "title": ..., "description": ...}, a bare
+        params object, or a complete config. The template never changes.
+        """
+        if isinstance(patch.get("params"), dict):
+            changed_params = patch["params"]
+        else:
+            changed_params = {k: v for k, v in patch.items() if k not in ("template", "title", "description")}
+        if patch.get("template") not in (None, current_config.get("template")):
+            logger.warning(f"Ignoring template change to '{patch['template']}' in refinement")
         
-        logger.info("No keywords matched, defaulting to 'generic'")
-        return "generic"
+        refined = {**current_config, "params": {**current_config.get("params", {}), **changed_params}}
+        for key in ("title", "description"):
+            if isinstance(patch.get(key), str) and patch[key].strip():
+                refined[key] = patch[key]
+        return refined
+    
+    def _param_specs(self, template_id: str) -> Dict[str, Dict[str, Any]]:
+        if template_id in self.templates:
+            return self.templates[template_id]["params"]
+        return self.generic_params
+    
+    @staticmethod
+    def _describe_param(spec: Dict[str, Any]) -> str:
+        if spec["type"] == "select":
+            return " | ".join(spec["options"])
+        if spec["type"] in ("int", "float"):
+            kind = "integer" if spec["type"] == "int" else "number"
+            return f"{kind} {spec['min']}-{spec['max']}"
+        return "text"
     
     def _check_template_match(self, user_prompt: str) -> bool:
         """
         Check if the user prompt matches any specific template
         """
-        prompt_lower = user_prompt.lower()
+        scores = self.template_scores(user_prompt)
         
         # Check for generic keywords first
-        generic_keywords = [
-            "sort", "algorithm", "tree", "graph", "data structure", "binary"
-        ]
-        if any(keyword in prompt_lower for keyword in generic_keywords):
+        if scores.pop("generic"):
             return False
         
         # Check for specific template keywords
-        for template_id, template_info in self.templates.items():
-            if any(keyword in prompt_lower for keyword in template_info["keywords"]):
-                return True
-        
-        return False
+        return any(scores.values())
     
-    def _format_templates_info(self) -> str:
+    def _format_templates_info(self, template_ids: Optional[List[str]] = None) -> str:
         """
         Format template information for the prompt
         """
         lines = []
-        for template_id, info in self.templates.items():
+        for template_id in template_ids or self.templates:
+            info = self.templates[template_id]
             lines.append(f"\n{template_id.upper()}: {info['name']}")
             lines.append(f"  Description: {info['description']}")
             lines.append(f"  Parameters:")
@@ -326,41 +525,95 @@ Return the complete updated configuration as JSON:
     
     def extract_json(self, response: str) -> Optional[Dict[str, Any]]:
         """
-        Extract JSON from AI response, handling various formats
+        Extract the config object from an AI response
+
+        Bare JSON, JSON wrapped in prose or a ```json fence, any nesting depth
+        and braces inside string values (customCode) are all handled; the
+        work is bounded by a constant times the response length (see
+        find_json_object).
+        """
+        found = find_json_object(response)
+        if found is None:
+            logger.error("Could not extract valid JSON from response")
+            return None
+
+        logger.info("Successfully extracted JSON from response")
+        return found[0]
+    
+    def build_output_format(
+        self,
+        user_prompt: str,
+        template_hint: Optional[str] = None,
+        title: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], int]:
         """
-        # Try to find JSON in the response
-        # Pattern 1: Look for JSON object
-        json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response, re.DOTALL)
+        Build the JSON schema passed to Ollama's `format` field, plus a
+        max_tokens budget sized for it
         
-        if json_match:
-            try:
-                json_str = json_match.group(0)
-                parsed = json.loads(json_str)
-                logger.info("Successfully extracted JSON from response")
-                return parsed
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse JSON match: {e}")
+        The template is chosen exactly as build_prompt chooses it (same
+        arguments, select_template): pinned when the hint or keywords name a
+        single template, any template when they are missing or tied.
+        """
+        template_id = self.select_template(self._enhance_prompt(user_prompt, title, description), template_hint)
+        if template_id is not None:
+            return self.build_json_schema(template_id), self.max_tokens_for(template_id)
         
-        # Pattern 2: Try parsing the entire response
-        try:
-            parsed = json.loads(response.strip())
-            logger.info("Successfully parsed entire response as JSON")
-            return parsed
-        except json.JSONDecodeError:
-            pass
+        schemas = [self.build_json_schema(t) for t in list(self.templates) + ["generic"]]
+        return {"anyOf": schemas}, self.max_tokens_for("generic")
+    
+    def build_json_schema(self, template_id: str) -> Dict[str, Any]:
+        """
+        JSON schema for one template's config, derived from its param definitions
+        """
+        if template_id == "generic":
+            param_specs = self.generic_params
+        else:
+            param_specs = self.templates[template_id]["params"]
+        properties, required = self._param_properties(param_specs)
         
-        # Pattern 3: Look for code blocks
-        code_block_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if code_block_match:
-            try:
-                parsed = json.loads(code_block_match.group(1))
-                logger.info("Successfully extracted JSON from code block")
-                return parsed
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse code block JSON: {e}")
+        return {
+            "type": "object",
+            "properties": {
+                "template": {"type": "string", "enum": [template_id]},
+                "params": {"type": "object", "properties": properties, "required": required},
+                "title": {"type": "string", "minLength": TITLE_LENGTH[0], "maxLength": TITLE_LENGTH[1]},
+                "description": {"type": "string", "minLength": DESCRIPTION_LENGTH[0], "maxLength": DESCRIPTION_LENGTH[1]}
+            },
+            "required": ["template", "params", "title", "description"]
+        }
+    
+    @staticmethod
+    def _param_properties(param_specs: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Any], List[str]]:
+        """JSON schema properties for param specs, plus the required names"""
+        properties = {}
+        required = []
+        for param_name, spec in param_specs.items():
+            if spec["type"] == "int":
+                prop = {"type": "integer", "minimum": spec["min"], "maximum": spec["max"]}
+            elif spec["type"] == "float":
+                prop = {"type": "number", "minimum": spec["min"], "maximum": spec["max"]}
+            elif spec["type"] == "select":
+                prop = {"type": "string", "enum": spec["options"]}
+            else:
+                prop = {"type": "string"}
+            properties[param_name] = prop
+            if not spec.get("optional", False):
+                required.append(param_name)
+        return properties, required
+    
+    def max_tokens_for(self, template_id: str) -> int:
+        """
+        Generation budget for a schema-constrained config
         
-        logger.error("Could not extract valid JSON from response")
-        return None
+        JSON skeleton ~40 tokens, title <= 100 chars (~25), description
+        <= 500 chars (~125), ~12 tokens per param, plus headroom. The generic
+        template may carry a whole customCode document, so it keeps the
+        large budget.
+        """
+        if template_id not in self.templates:
+            return 2000
+        return 40 + 25 + 125 + 12 * len(self.templates[template_id]["params"]) + 64
     
     def get_template_info(self, template_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,217 @@
+"""
+Schema - Single source of the template parameter specs
+
+PromptEngine describes these params to the model (and derives the JSON
+schema for structured output from them); ConfigValidator compiles them once
+into per-template checkers. Spec fields:
+
+    type      "int", "float", "select" or "string"
+    min/max   inclusive range for int/float
+    options   allowed values for select
+    default   value used when the param is missing or cannot be repaired
+    optional  params that may be omitted or null
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TEMPLATE_PARAMS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "network": {
+        "nodeCount": {"type": "int", "min": 4, "max": 12, "default": 8},
+        "packetRate": {"type": "int", "min": 1, "max": 10, "default": 2},
+        "routingMode": {"type": "select", "options": ["shortest", "random", "multipath"], "default": "shortest"},
+        "layout": {"type": "select", "options": ["circular", "grid", "random"], "default": "circular"}
+    },
+    "particles": {
+        "particleCount": {"type": "int", "min": 50, "max": 1000, "default": 200},
+        "gravity": {"type": "float", "min": 0, "max": 2, "default": 0.5},
+        "attractionMode": {"type": "select", "options": ["center", "mouse", "none"], "default": "center"},
+        "color": {"type": "select", "options": ["rainbow", "blue", "fire", "purple"], "default": "rainbow"}
+    },
+    "flocking": {
+        "boidCount": {"type": "int", "min": 20, "max": 200, "default": 50},
+        "cohesion": {"type": "float", "min": 0, "max": 2, "default": 1},
+        "separation": {"type": "float", "min": 0, "max": 2, "default": 1},
+        "alignment": {"type": "float", "min": 0, "max": 2, "default": 1},
+        "maxSpeed": {"type": "float", "min": 1, "max": 5, "default": 3}
+    },
+    "waves": {
+        "frequency": {"type": "float", "min": 0.1, "max": 5, "default": 1},
+        "amplitude": {"type": "int", "min": 10, "max": 100, "default": 50},
+        "waveType": {"type": "select", "options": ["sine", "square", "triangle"], "default": "sine"},
+        "colorScheme": {"type": "select", "options": ["blue", "rainbow", "fire"], "default": "blue"}
+    },
+    # Algorithms and custom experiments: any experimentType, extra params allowed
+    "generic": {
+        "experimentType": {"type": "string", "default": "interactive"},
+        "customCode": {"type": "string", "optional": True},
+        "arraySize": {"type": "int", "min": 5, "max": 100, "optional": True, "default": 20},
+        "nodeCount": {"type": "int", "min": 1, "max": 100, "optional": True},
+        "algorithm": {"type": "string", "optional": True}
+    },
+}
+
+# Templates whose configs may carry params outside their spec
+OPEN_TEMPLATES = {"generic"}
+
+REQUIRED_FIELDS = ("template", "params", "title", "description")
+TITLE_LENGTH = (3, 100)
+DESCRIPTION_LENGTH = (10, 500)
+
+
+def default_params(template_id: str) -> Dict[str, Any]:
+    """Params a config gets when nothing else is specified"""
+    return {
+        name: spec["default"]
+        for name, spec in TEMPLATE_PARAMS.get(template_id, {}).items()
+        if "default" in spec
+    }
+
+
+_NUMBER_TYPES = {"int": (int,), "float": (int, float)}
+_MISSING = object()
+
+
+def compile_check(name: str, spec: Dict[str, Any]) -> Callable[[Any], Optional[str]]:
+    """Value -> error message, or None when it is valid"""
+    kind = spec["type"]
+    optional = spec.get("optional", False)
+    if kind in ("int", "float"):
+        # exact type match: bool is an int subclass, but `true` is never a count
+        types = _NUMBER_TYPES[kind]
+        low, high = spec["min"], spec["max"]
+        type_error = f"Parameter '{name}' must be {'an integer' if kind == 'int' else 'a number'}"
+        low_error = f"Parameter '{name}' must be >= {low}"
+        high_error = f"Parameter '{name}' must be <= {high}"
+
+        def check(value: Any) -> Optional[str]:
+            if value is None and optional:
+                return None
+            if type(value) not in types:
+                return type_error
+            if value < low:
+                return low_error
+            if value > high:
+                return high_error
+            return None
+    elif kind == "select":
+        options = frozenset(spec["options"])
+        option_error = f"Parameter '{name}' must be one of {spec['options']}"
+
+        def check(value: Any) -> Optional[str]:
+            if value is None and optional:
+                return None
+            return None if type(value) is str and value in options else option_error
+    else:
+        string_error = f"Parameter '{name}' must be a string"
+
+        def check(value: Any) -> Optional[str]:
+            if value is None and optional:
+                return None
+            return None if isinstance(value, str) else string_error
+    return check
+
+
+def compile_params(params: Dict[str, Dict[str, Any]]) -> Callable[[Dict[str, Any]], List[str]]:
+    """
+    One check function for all of a template's params
+
+    The specs are read here only: each param gets a closure with its type
+    test, bounds, option set and messages bound, so a check costs a dict
+    lookup and a few comparisons per param. Params outside the spec and
+    missing params are ignored.
+    """
+    checks = [(name, compile_check(name, spec)) for name, spec in params.items()]
+
+    def check_params(values: Dict[str, Any]) -> List[str]:
+        errors = []
+        for name, check in checks:
+            value = values.get(name, _MISSING)
+            if value is not _MISSING:
+                error = check(value)
+                if error is not None:
+                    errors.append(error)
+        return errors
+    return check_params
+
+
+def compile_repair(name: str, spec: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Value -> nearest valid value (clamped, rounded or the default)"""
+    kind = spec["type"]
+    fallback = spec.get("default")
+    if kind in ("int", "float"):
+        low, high = spec["min"], spec["max"]
+        integer = kind == "int"
+
+        def repair(value: Any) -> Any:
+            if type(value) not in (int, float):
+                return fallback
+            value = max(low, min(high, value))
+            return int(round(value)) if integer else value
+    elif kind == "select":
+        options = spec["options"]
+        fallback = fallback if fallback is not None else options[0]
+
+        def repair(value: Any) -> Any:
+            return value if value in options else fallback
+    else:
+        def repair(value: Any) -> Any:
+            return value if isinstance(value, str) else fallback
+
+    return repair
+
+
+@dataclass
+class CompiledTemplate:
+    """Checks and repairs for one template's params, built once at startup"""
+    template_id: str
+    check_params: Callable[[Dict[str, Any]], List[str]]
+    repairs: Dict[str, Callable[[Any], Any]]
+    open: bool = False
+
+    def repair_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        repaired = {}
+        for name, value in params.items():
+            repair = self.repairs.get(name)
+            if repair is None:
+                if self.open:
+                    repaired[name] = value
+                continue
+            if value is not None and self.check_params({name: value}):
+                value = repair(value)
+            if value is not None:
+                repaired[name] = value
+        return repaired
+
+
+@dataclass
+class ValidationResult:
+    valid: bool
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def message(self) -> str:
+        return "; ".join(self.errors)
+
+
+def compile_templates(
+    template_params: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+) -> Dict[str, CompiledTemplate]:
+    template_params = template_params or TEMPLATE_PARAMS
+    return {
+        template_id: CompiledTemplate(
+            template_id,
+            check_params=compile_params(params),
+            repairs={name: compile_repair(name, spec) for name, spec in params.items()},
+            open=template_id in OPEN_TEMPLATES,
+        )
+        for template_id, params in template_params.items()
+    }
+
+
+def check_text(name: str, value: Any, length: Tuple[int, int]) -> Optional[str]:
+    low, high = length
+    if not isinstance(value, str) or len(value) < low:
+        return f"{name} must be a string with at least {low} characters"
+    if len(value) > high:
+        return f"{name} must be less than {high} characters"
+    return None
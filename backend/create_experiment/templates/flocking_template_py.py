@@ -9,7 +9,7 @@ from .base_template import BaseTemplate
 class FlockingTemplate(BaseTemplate):
     """Flocking simulation with cohesion, separation, and alignment"""
     
-    def generate(self, config: Dict[str, Any]) -> str:
+    def generate(self, config: Dict[str, Any], assets: str = "inline") -> str:
         """Generate complete HTML for flocking simulation"""
         
         params = config.get("params", {})
@@ -193,13 +193,12 @@ class FlockingTemplate(BaseTemplate):
             requestAnimationFrame(animate);
         }}
         
-        document.getElementById('pause-btn').addEventListener('click', () => {{
-            isRunning = !isRunning;
-            document.getElementById('pause-btn').textContent = isRunning ? '⏸ Pause' : '▶ Resume';
-        }});
-        
-        document.getElementById('reset-btn').addEventListener('click', () => {{
-            initBoids();
+        // Pause/Resume and Reset buttons (shared runtime)
+        ExperimentRuntime.controls({{
+            onToggle: (running) => {{ isRunning = running; }},
+            onReset: () => {{
+                initBoids();
+            }}
         }});
         
         ctx.fillStyle = '#0f172a';
@@ -208,4 +207,4 @@ class FlockingTemplate(BaseTemplate):
         requestAnimationFrame(animate);
         """
         
-        return self.wrap_html(title, description, body, script=script)
+        return self.wrap_html(title, description, body, script=script, assets=assets)
@@ -4,6 +4,7 @@ Uses AI to generate complete HTML/JS code directly
 """
 from typing import Dict, Any
 from .base_template import BaseTemplate
+from .shared_assets import CUSTOM_CSS, asset_url
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +13,7 @@ logger = logging.getLogger(__name__)
 class GenericTemplate(BaseTemplate):
     """Generic template that uses AI to generate code for any experiment type"""
     
-    def generate(self, config: Dict[str, Any]) -> str:
+    def generate(self, config: Dict[str, Any], assets: str = "inline") -> str:
         """
         Generate HTML code for generic/custom experiments
         For now, returns a placeholder that can be enhanced with AI code generation
@@ -24,13 +25,18 @@ class GenericTemplate(BaseTemplate):
         
         # If custom code is provided (from AI generation), use it
         if custom_code:
-            return self._wrap_custom_code(title, description, custom_code)
+            return self._wrap_custom_code(title, description, custom_code, assets)
         
         # Otherwise, generate a basic interactive canvas based on experiment type
-        return self._generate_basic_experiment(title, description, experiment_type, config.get("params", {}))
+        return self._generate_basic_experiment(title, description, experiment_type, config.get("params", {}), assets)
     
-    def _wrap_custom_code(self, title: str, description: str, code: str) -> str:
+    def _wrap_custom_code(self, title: str, description: str, code: str, assets: str = "inline") -> str:
         """Wrap AI-generated code in HTML structure"""
+        if assets == "linked":
+            stylesheet = f'<link rel="stylesheet" href="{asset_url("experiment-custom.css", self.asset_base_url)}">'
+        else:
+            stylesheet = f"<style>\n{CUSTOM_CSS}    </style>"
+        
         return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -38,47 +44,7 @@ class GenericTemplate(BaseTemplate):
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{self.escape_js_string(title)}</title>
     <meta name="description" content="{self.escape_js_string(description)}">
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
-            color: #f1f5f9;
-            overflow-x: hidden;
-        }}
-        
-        .header {{
-            background: rgba(15, 23, 42, 0.9);
-            backdrop-filter: blur(10px);
-            padding: 1.5rem;
-            border-bottom: 1px solid rgba(148, 163, 184, 0.1);
-        }}
-        
-        .header h1 {{
-            font-size: 1.5rem;
-            margin-bottom: 0.5rem;
-            background: linear-gradient(to right, #60a5fa, #a78bfa);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }}
-        
-        .header p {{
-            color: #94a3b8;
-            font-size: 0.875rem;
-        }}
-        
-        .content {{
-            padding: 2rem;
-            max-width: 1400px;
-            margin: 0 auto;
-        }}
-    </style>
+    {stylesheet}
 </head>
 <body>
     <div class="header">
@@ -91,18 +57,18 @@ class GenericTemplate(BaseTemplate):
 </body>
 </html>"""
     
-    def _generate_basic_experiment(self, title: str, description: str, experiment_type: str, params: Dict[str, Any]) -> str:
+    def _generate_basic_experiment(self, title: str, description: str, experiment_type: str, params: Dict[str, Any], assets: str = "inline") -> str:
         """Generate a basic interactive experiment based on type"""
         
         # Different basic templates based on experiment type
         if "sort" in experiment_type.lower() or "algorithm" in experiment_type.lower():
-            return self._generate_sorting_visualization(title, description, params)
+            return self._generate_sorting_visualization(title, description, params, assets)
         elif "graph" in experiment_type.lower() or "chart" in experiment_type.lower():
-            return self._generate_graph_visualization(title, description, params)
+            return self._generate_graph_visualization(title, description, params, assets)
         else:
-            return self._generate_default_interactive(title, description, params)
+            return self._generate_default_interactive(title, description, params, assets)
     
-    def _generate_sorting_visualization(self, title: str, description: str, params: Dict[str, Any]) -> str:
+    def _generate_sorting_visualization(self, title: str, description: str, params: Dict[str, Any], assets: str = "inline") -> str:
         """Generate a basic sorting algorithm visualization"""
         array_size = params.get("arraySize", 20)
         algorithm = params.get("algorithm", "bubble")
@@ -207,10 +173,11 @@ class GenericTemplate(BaseTemplate):
             
             // Initialize
             generateArray();
-            """
+            """,
+            assets=assets
         )
     
-    def _generate_graph_visualization(self, title: str, description: str, params: Dict[str, Any]) -> str:
+    def _generate_graph_visualization(self, title: str, description: str, params: Dict[str, Any], assets: str = "inline") -> str:
         """Generate a basic graph/chart visualization"""
         return self.wrap_html(
             title=title,
@@ -232,10 +199,11 @@ class GenericTemplate(BaseTemplate):
             ctx.font = '24px Arial';
             ctx.textAlign = 'center';
             ctx.fillText('Graph Visualization - Customize this template', canvas.width / 2, canvas.height / 2);
-            """
+            """,
+            assets=assets
         )
     
-    def _generate_default_interactive(self, title: str, description: str, params: Dict[str, Any]) -> str:
+    def _generate_default_interactive(self, title: str, description: str, params: Dict[str, Any], assets: str = "inline") -> str:
         """Generate a default interactive canvas"""
         return self.wrap_html(
             title=title,
@@ -256,6 +224,7 @@ class GenericTemplate(BaseTemplate):
             ctx.font = '24px Arial';
             ctx.textAlign = 'center';
             ctx.fillText('Custom Experiment - Add your code here', canvas.width / 2, canvas.height / 2);
-            """
+            """,
+            assets=assets
         )
 
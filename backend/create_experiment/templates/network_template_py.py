@@ -9,7 +9,7 @@ from .base_template import BaseTemplate
 class NetworkTemplate(BaseTemplate):
     """Network simulation with nodes and packet routing"""
     
-    def generate(self, config: Dict[str, Any]) -> str:
+    def generate(self, config: Dict[str, Any], assets: str = "inline") -> str:
         """Generate complete HTML for network simulation"""
         
         # Extract parameters with defaults
@@ -298,17 +298,15 @@ class NetworkTemplate(BaseTemplate):
             requestAnimationFrame(animate);
         }}
         
-        // Event listeners
-        document.getElementById('pause-btn').addEventListener('click', () => {{
-            isRunning = !isRunning;
-            document.getElementById('pause-btn').textContent = isRunning ? '⏸ Pause' : '▶ Resume';
-        }});
-        
-        document.getElementById('reset-btn').addEventListener('click', () => {{
-            packets = [];
-            totalPackets = 0;
-            packetId = 0;
-            initNodes();
+        // Pause/Resume and Reset buttons (shared runtime)
+        ExperimentRuntime.controls({{
+            onToggle: (running) => {{ isRunning = running; }},
+            onReset: () => {{
+                packets = [];
+                totalPackets = 0;
+                packetId = 0;
+                initNodes();
+            }}
         }});
         
         // Initialize and start
@@ -316,4 +314,4 @@ class NetworkTemplate(BaseTemplate):
         requestAnimationFrame(animate);
         """
         
-        return self.wrap_html(title, description, body, script=script)
\ No newline at end of file
+        return self.wrap_html(title, description, body, script=script, assets=assets)
\ No newline at end of file
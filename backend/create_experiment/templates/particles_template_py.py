@@ -9,7 +9,7 @@ from .base_template import BaseTemplate
 class ParticlesTemplate(BaseTemplate):
     """Particle system with gravity and attraction forces"""
     
-    def generate(self, config: Dict[str, Any]) -> str:
+    def generate(self, config: Dict[str, Any], assets: str = "inline") -> str:
         """Generate complete HTML for particle simulation"""
         
         # Extract parameters
@@ -198,17 +198,15 @@ class ParticlesTemplate(BaseTemplate):
             mouseY = e.clientY - rect.top;
         }});
         
-        // Event listeners
-        document.getElementById('pause-btn').addEventListener('click', () => {{
-            isRunning = !isRunning;
-            document.getElementById('pause-btn').textContent = isRunning ? '⏸ Pause' : '▶ Resume';
-        }});
-        
-        document.getElementById('reset-btn').addEventListener('click', () => {{
-            initParticles();
-            // Clear canvas
-            ctx.fillStyle = '#0f172a';
-            ctx.fillRect(0, 0, CONFIG.canvasWidth, CONFIG.canvasHeight);
+        // Pause/Resume and Reset buttons (shared runtime)
+        ExperimentRuntime.controls({{
+            onToggle: (running) => {{ isRunning = running; }},
+            onReset: () => {{
+                initParticles();
+                // Clear canvas
+                ctx.fillStyle = '#0f172a';
+                ctx.fillRect(0, 0, CONFIG.canvasWidth, CONFIG.canvasHeight);
+            }}
         }});
         
         // Initialize and start
@@ -218,4 +216,4 @@ class ParticlesTemplate(BaseTemplate):
         requestAnimationFrame(animate);
         """
         
-        return self.wrap_html(title, description, body, script=script)
+        return self.wrap_html(title, description, body, script=script, assets=assets)
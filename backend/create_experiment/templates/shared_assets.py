@@ -0,0 +1,246 @@
+"""
+Shared Assets - Stylesheets and runtime script common to every generated
+experiment
+
+Templates either inline these (self-contained single file, used for
+downloads) or link them as versioned, immutable files served under
+/assets/, so repeat previews only ship the experiment-specific bytes.
+File names carry a content hash, so a changed asset gets a new URL.
+"""
+import hashlib
+import re
+from typing import Dict, Optional, Tuple
+
+# Page chrome used by BaseTemplate.wrap_html
+BASE_CSS = """* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+    background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
+    color: #f1f5f9;
+    overflow: hidden;
+}
+
+#app {
+    width: 100vw;
+    height: 100vh;
+    display: flex;
+    flex-direction: column;
+}
+
+.controls {
+    background: rgba(15, 23, 42, 0.9);
+    backdrop-filter: blur(10px);
+    padding: 1.5rem;
+    border-bottom: 1px solid rgba(148, 163, 184, 0.1);
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+}
+
+.controls h1 {
+    font-size: 1.5rem;
+    margin-bottom: 0.5rem;
+    background: linear-gradient(to right, #60a5fa, #a78bfa);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    background-clip: text;
+}
+
+.controls p {
+    color: #94a3b8;
+    font-size: 0.875rem;
+    margin-bottom: 1rem;
+}
+
+.stats {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
+    gap: 1rem;
+    margin-bottom: 1rem;
+}
+
+.stat-card {
+    background: rgba(30, 41, 59, 0.5);
+    padding: 1rem;
+    border-radius: 0.5rem;
+    border: 1px solid rgba(148, 163, 184, 0.1);
+}
+
+.stat-label {
+    font-size: 0.75rem;
+    color: #94a3b8;
+    text-transform: uppercase;
+    letter-spacing: 0.05em;
+    margin-bottom: 0.25rem;
+}
+
+.stat-value {
+    font-size: 1.5rem;
+    font-weight: bold;
+}
+
+.buttons {
+    display: flex;
+    gap: 0.5rem;
+    flex-wrap: wrap;
+}
+
+button {
+    padding: 0.75rem 1.5rem;
+    border: none;
+    border-radius: 0.5rem;
+    font-size: 0.875rem;
+    font-weight: 600;
+    cursor: pointer;
+    transition: all 0.2s;
+}
+
+button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2);
+}
+
+.btn-primary {
+    background: linear-gradient(to right, #3b82f6, #8b5cf6);
+    color: white;
+}
+
+.btn-secondary {
+    background: rgba(71, 85, 105, 0.5);
+    color: #e2e8f0;
+}
+
+#canvas-container {
+    flex: 1;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    padding: 2rem;
+}
+
+canvas {
+    border: 1px solid rgba(148, 163, 184, 0.2);
+    border-radius: 0.5rem;
+    box-shadow: 0 20px 25px -5px rgba(0, 0, 0, 0.3);
+    background: rgba(15, 23, 42, 0.5);
+}
+"""
+
+# Page chrome used around AI-generated custom code (GenericTemplate)
+CUSTOM_CSS = """* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+    background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
+    color: #f1f5f9;
+    overflow-x: hidden;
+}
+
+.header {
+    background: rgba(15, 23, 42, 0.9);
+    backdrop-filter: blur(10px);
+    padding: 1.5rem;
+    border-bottom: 1px solid rgba(148, 163, 184, 0.1);
+}
+
+.header h1 {
+    font-size: 1.5rem;
+    margin-bottom: 0.5rem;
+    background: linear-gradient(to right, #60a5fa, #a78bfa);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    background-clip: text;
+}
+
+.header p {
+    color: #94a3b8;
+    font-size: 0.875rem;
+}
+
+.content {
+    padding: 2rem;
+    max-width: 1400px;
+    margin: 0 auto;
+}
+"""
+
+# Pause/Resume and Reset button wiring shared by the simulation templates
+RUNTIME_JS = """// Shared runtime for generated experiments
+(function () {
+    function controls(options) {
+        var state = { running: true };
+        var pauseButton = document.getElementById(options.pauseButton || 'pause-btn');
+        var resetButton = document.getElementById(options.resetButton || 'reset-btn');
+        var pauseLabel = options.pauseLabel || '\u23F8 Pause';
+        var resumeLabel = options.resumeLabel || '\u25B6 Resume';
+
+        if (pauseButton) {
+            pauseButton.addEventListener('click', function () {
+                state.running = !state.running;
+                pauseButton.textContent = state.running ? pauseLabel : resumeLabel;
+                if (options.onToggle) options.onToggle(state.running);
+            });
+        }
+        if (resetButton && options.onReset) {
+            resetButton.addEventListener('click', function () {
+                options.onReset();
+            });
+        }
+        return state;
+    }
+
+    window.ExperimentRuntime = { controls: controls };
+})();
+"""
+
+ASSET_MODES = ("inline", "linked")
+
+_SOURCES = {
+    "experiment-base.css": (BASE_CSS, "text/css; charset=utf-8"),
+    "experiment-custom.css": (CUSTOM_CSS, "text/css; charset=utf-8"),
+    "experiment-runtime.js": (RUNTIME_JS, "text/javascript; charset=utf-8"),
+}
+
+
+def _versioned_name(name: str, content: str) -> str:
+    stem, ext = name.rsplit(".", 1)
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+    return f"{stem}.{digest}.{ext}"
+
+
+# versioned file name -> (body, media type)
+ASSETS: Dict[str, Tuple[bytes, str]] = {
+    _versioned_name(name, content): (content.encode("utf-8"), media_type)
+    for name, (content, media_type) in _SOURCES.items()
+}
+_FILENAMES = {name: _versioned_name(name, content) for name, (content, _) in _SOURCES.items()}
+
+
+def asset_filename(name: str) -> str:
+    """Versioned file name of a shared asset, e.g. experiment-base.3f9c0a1b2d.css"""
+    return _FILENAMES[name]
+
+
+def asset_url(name: str, base_url: str = "/assets") -> str:
+    return f"{base_url.rstrip('/')}/{asset_filename(name)}"
+
+
+# A versioned asset file name, of this or any earlier version of the assets
+_LINKED_ASSET = re.compile(rb"experiment-(?:base|custom|runtime)\.[0-9a-f]{10}\.(?:css|js)")
+
+
+def links_assets(html: bytes) -> bool:
+    """Whether a rendered document loads the shared assets (linked mode)"""
+    return _LINKED_ASSET.search(html) is not None
+
+
+def get_asset(filename: str) -> Optional[Tuple[bytes, str]]:
+    """Body and media type for a versioned file name, or None"""
+    return ASSETS.get(filename)
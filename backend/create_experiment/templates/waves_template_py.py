@@ -9,7 +9,7 @@ from .base_template import BaseTemplate
 class WavesTemplate(BaseTemplate):
     """Wave simulation with frequency and amplitude control"""
     
-    def generate(self, config: Dict[str, Any]) -> str:
+    def generate(self, config: Dict[str, Any], assets: str = "inline") -> str:
         """Generate complete HTML for wave simulation"""
         
         params = config.get("params", {})
@@ -141,16 +141,15 @@ class WavesTemplate(BaseTemplate):
             requestAnimationFrame(animate);
         }}
         
-        document.getElementById('pause-btn').addEventListener('click', () => {{
-            isRunning = !isRunning;
-            document.getElementById('pause-btn').textContent = isRunning ? '⏸ Pause' : '▶ Resume';
-        }});
-        
-        document.getElementById('reset-btn').addEventListener('click', () => {{
-            time = 0;
+        // Pause/Resume and Reset buttons (shared runtime)
+        ExperimentRuntime.controls({{
+            onToggle: (running) => {{ isRunning = running; }},
+            onReset: () => {{
+                time = 0;
+            }}
         }});
         
         requestAnimationFrame(animate);
         """
         
-        return self.wrap_html(title, description, body, script=script)
\ No newline at end of file
+        return self.wrap_html(title, description, body, script=script, assets=assets)
\ No newline at end of file
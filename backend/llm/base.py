@@ -0,0 +1,96 @@
+"""
+LLM Backend - Interface shared by every text-generation backend
+
+The servers only talk to an LLMBackend, so the Ollama HTTP API can be swapped
+for the local stub (see stub_backend.py) when load-testing our own code.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional
+
+
+class LLMError(Exception):
+    """
+    Raised when a backend cannot produce a completion
+
+    kind is a short label for metrics ("timeout", "connection", "unavailable",
+    "rejected", ...); retryable tells callers whether the same request may
+    succeed if sent again.
+    """
+
+    def __init__(self, message: str, kind: str = "error", retryable: bool = False):
+        super().__init__(message)
+        self.kind = kind
+        self.retryable = retryable
+
+
+@dataclass
+class LLMResponse:
+    """A completed generation plus the timing/token stats the backend reported"""
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    prompt_eval_ms: float = 0.0
+    total_ms: float = 0.0
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+
+class LLMBackend(ABC):
+    """Abstract base class for all LLM backends"""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abstractmethod
+    async def generate(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **request_fields: Any
+    ) -> LLMResponse:
+        """
+        Generate a full completion
+
+        Args:
+            prompt: The prompt to send to the model
+            options: Sampling options (temperature, num_predict, top_p, ...)
+            timeout: Per-request time limit in seconds (backend default if None)
+            request_fields: Extra top-level request fields (format, keep_alive, ...)
+
+        Returns:
+            LLMResponse: Completion text and stats
+        """
+        pass
+
+    @abstractmethod
+    def stream(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **request_fields: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion as text fragments
+
+        Closing the iterator early (break / aclose) must abort the request.
+        """
+        pass
+
+    @abstractmethod
+    async def health_check(self) -> bool:
+        """Return True if the backend is reachable and the model is available"""
+        pass
+
+    async def model_loaded(self) -> Optional[bool]:
+        """Whether the model is resident in memory right now; None if the backend cannot tell"""
+        return None
+
+    async def start(self):
+        """Acquire long-lived resources (connection pools); called at app startup"""
+        pass
+
+    async def close(self):
+        """Release any resources held by the backend"""
+        pass
@@ -0,0 +1,57 @@
+"""
+Backend factory - Picks the LLM backend from the environment
+
+    LLM_BACKEND       ollama (default) | stub
+    OLLAMA_BASE_URL   Ollama (or stub server) address, default http://localhost:11434
+
+Connection pool of the long-lived Ollama session (see OllamaBackend.start):
+
+    OLLAMA_POOL_LIMIT           total open connections, default 32
+    OLLAMA_POOL_LIMIT_PER_HOST  connections per host, default 16
+    OLLAMA_KEEPALIVE_S          idle keep-alive, default 60
+    OLLAMA_CONNECT_TIMEOUT_S    connect timeout, default 5
+
+The stub backend reads STUB_LATENCY_MS, STUB_TOKENS_PER_S,
+STUB_PROMPT_TOKENS_PER_S and STUB_PREFIX_CACHE, like the stub server.
+"""
+import os
+from typing import Any
+
+from .base import LLMBackend
+
+
+def create_backend(model: str, **kwargs: Any) -> LLMBackend:
+    """
+    Create the configured backend for a model
+
+    kwargs are passed to OllamaBackend (timeout, session) and ignored by the stub.
+    """
+    kind = os.environ.get("LLM_BACKEND", "ollama").lower()
+
+    if kind == "stub":
+        from .stub_backend import StubBackend
+
+        return StubBackend(
+            model=model,
+            latency_ms=float(os.environ.get("STUB_LATENCY_MS", "200")),
+            tokens_per_s=float(os.environ.get("STUB_TOKENS_PER_S", "50")),
+            prompt_tokens_per_s=float(os.environ.get("STUB_PROMPT_TOKENS_PER_S", "2000")),
+            prefix_cache=os.environ.get("STUB_PREFIX_CACHE", "1") == "1",
+            slow_rate=float(os.environ.get("STUB_SLOW_RATE", "0")),
+            slow_factor=float(os.environ.get("STUB_SLOW_FACTOR", "5")),
+            invalid_rate=float(os.environ.get("STUB_INVALID_RATE", "0")),
+        )
+
+    if kind == "ollama":
+        from .ollama_backend import OllamaBackend
+
+        base_url = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+        pool = {
+            "pool_limit": int(os.environ.get("OLLAMA_POOL_LIMIT", "32")),
+            "pool_limit_per_host": int(os.environ.get("OLLAMA_POOL_LIMIT_PER_HOST", "16")),
+            "keepalive_timeout": float(os.environ.get("OLLAMA_KEEPALIVE_S", "60")),
+            "connect_timeout": float(os.environ.get("OLLAMA_CONNECT_TIMEOUT_S", "5")),
+        }
+        return OllamaBackend(model=model, base_url=base_url, **{**pool, **kwargs})
+
+    raise ValueError(f"Unknown LLM_BACKEND '{kind}' (expected 'ollama' or 'stub')")
@@ -0,0 +1,226 @@
+"""
+Ollama Backend - LLMBackend speaking the Ollama HTTP API
+"""
+import aiohttp
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from .base import LLMBackend, LLMError, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Overloaded or restarting server: the same request may succeed later
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def api_error(status: int, error_text: str) -> LLMError:
+    retryable = status in RETRYABLE_STATUSES
+    kind = "unavailable" if retryable else "rejected"
+    return LLMError(f"Ollama API error ({status}): {error_text}", kind=kind, retryable=retryable)
+
+
+def bad_response(body: bytes) -> LLMError:
+    # A garbled body or NDJSON line is most likely a transient proxy/server
+    # hiccup, so it is worth another attempt
+    logger.error(f"Unparseable Ollama response: {body[:200]!r}")
+    return LLMError("AI model returned an unreadable response", kind="bad_response", retryable=True)
+
+
+class OllamaBackend(LLMBackend):
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:11434",
+        timeout: float = 60,
+        session: Optional[aiohttp.ClientSession] = None,
+        connect_timeout: float = 5,
+        pool_limit: int = 32,
+        pool_limit_per_host: int = 16,
+        keepalive_timeout: float = 60
+    ):
+        super().__init__(model)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=connect_timeout)
+        self.connect_timeout = connect_timeout
+        self.pool_limit = pool_limit
+        self.pool_limit_per_host = pool_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        # Either an externally owned session, or one we open in start().
+        # Without either (scripts, CLI), a short-lived session is used per call.
+        self.session = session
+        self._owns_session = False
+
+    async def start(self):
+        """Open the long-lived, connection-pooled session"""
+        if self.session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_limit,
+            limit_per_host=self.pool_limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        self._owns_session = True
+        logger.info(
+            f"Ollama session opened (pool {self.pool_limit}, per host {self.pool_limit_per_host})"
+        )
+
+    async def close(self):
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._owns_session = False
+
+    @asynccontextmanager
+    async def _session(self):
+        if self.session is not None:
+            yield self.session
+            return
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            yield session
+
+    def _request_timeout(self, timeout: Optional[float]) -> Optional[aiohttp.ClientTimeout]:
+        if timeout is None:
+            return None
+        return aiohttp.ClientTimeout(total=timeout, sock_connect=min(self.connect_timeout, timeout))
+
+    def _payload(self, prompt: str, stream: bool, options: Optional[Dict[str, Any]], request_fields: Dict[str, Any]):
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+        }
+        if options:
+            payload["options"] = options
+        payload.update({k: v for k, v in request_fields.items() if v is not None})
+        return payload
+
+    async def generate(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **request_fields: Any
+    ) -> LLMResponse:
+        url = f"{self.base_url}/api/generate"
+        payload = self._payload(prompt, False, options, request_fields)
+        request_timeout = self._request_timeout(timeout)
+
+        try:
+            async with self._session() as session:
+                async with session.post(url, json=payload, timeout=request_timeout) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        raise api_error(response.status, error_text)
+
+                    body = await response.read()
+                    try:
+                        data = json.loads(body)
+                    except ValueError:
+                        raise bad_response(body)
+                    return self._to_response(data.get("response", ""), data)
+
+        except asyncio.TimeoutError:
+            logger.error("Ollama request timed out")
+            raise LLMError("Request to AI model timed out. Please try again.", kind="timeout", retryable=True)
+        except aiohttp.ClientError as e:
+            logger.error(f"Ollama client error: {e}")
+            raise LLMError(f"Could not connect to Ollama: {e}", kind="connection", retryable=True)
+
+    async def stream(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **request_fields: Any
+    ) -> AsyncIterator[str]:
+        url = f"{self.base_url}/api/generate"
+        payload = self._payload(prompt, True, options, request_fields)
+        request_timeout = self._request_timeout(timeout)
+
+        try:
+            async with self._session() as session:
+                async with session.post(url, json=payload, timeout=request_timeout) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        raise api_error(response.status, error_text)
+
+                    # Ollama streams one JSON object per line
+                    finished = False
+                    try:
+                        async for line in response.content:
+                            if not line.strip():
+                                continue
+                            try:
+                                data = json.loads(line)
+                            except ValueError:
+                                raise bad_response(line)
+                            if data.get("error"):
+                                raise LLMError(f"Ollama API error: {data['error']}", kind="model")
+                            if data.get("response"):
+                                yield data["response"]
+                            if data.get("done"):
+                                finished = True
+                                break
+                    finally:
+                        if not finished:
+                            # Consumer stopped early: dropping the connection
+                            # makes Ollama abort the generation
+                            response.close()
+
+        except asyncio.TimeoutError:
+            logger.error("Ollama stream timed out")
+            raise LLMError("Request to AI model timed out. Please try again.", kind="timeout", retryable=True)
+        except aiohttp.ClientError as e:
+            logger.error(f"Ollama client error: {e}")
+            raise LLMError(f"Could not connect to Ollama: {e}", kind="connection", retryable=True)
+
+    async def health_check(self) -> bool:
+        try:
+            url = f"{self.base_url}/api/tags"
+            async with self._session() as session:
+                async with session.get(url, timeout=self._request_timeout(5)) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        models = data.get("models", [])
+                        model_names = [m.get("name", "") for m in models]
+
+                        # Check if our model is available
+                        return any(self.model in name for name in model_names)
+            return False
+        except Exception as e:
+            logger.error(f"Health check failed: {e}")
+            return False
+
+    async def model_loaded(self) -> Optional[bool]:
+        # /api/ps lists the models currently in memory; Ollama drops a model
+        # from it once keep_alive runs out after its last request
+        try:
+            url = f"{self.base_url}/api/ps"
+            async with self._session() as session:
+                async with session.get(url, timeout=self._request_timeout(5)) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        models = data.get("models", [])
+                        model_names = [m.get("name", "") for m in models]
+                        return any(self.model in name for name in model_names)
+            return None
+        except Exception as e:
+            logger.warning(f"Loaded-model check failed: {e}")
+            return None
+
+    @staticmethod
+    def _to_response(text: str, data: Dict[str, Any]) -> LLMResponse:
+        # Ollama reports durations in nanoseconds
+        return LLMResponse(
+            text=text,
+            prompt_tokens=data.get("prompt_eval_count", 0),
+            completion_tokens=data.get("eval_count", 0),
+            prompt_eval_ms=data.get("prompt_eval_duration", 0) / 1e6,
+            total_ms=data.get("total_duration", 0) / 1e6,
+            raw={k: v for k, v in data.items() if k not in ("response", "context")},
+        )
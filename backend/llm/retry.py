@@ -0,0 +1,105 @@
+"""
+Retry - Request deadlines and jittered exponential backoff for backend calls
+
+A Deadline is created where a request enters the server and handed down to
+every model call it makes, so retries never outlive the caller: each attempt
+gets at most the remaining budget as its timeout, and a retry is only made if
+the backoff sleep still leaves room for a useful attempt.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .base import LLMError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """Point in time (monotonic clock) by which a request must be answered"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, limit: Optional[float] = None) -> float:
+        """Time limit for one call: the remaining budget, capped at limit"""
+        remaining = self.remaining()
+        return remaining if limit is None else min(remaining, limit)
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay_s: float = 0.5
+    max_delay_s: float = 4.0
+    # Don't start an attempt with less budget than this left
+    min_attempt_s: float = 1.0
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter exponential backoff before retry number `retry` (1-based)"""
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** (retry - 1)))
+
+
+async def retry_call(
+    call: Callable[[float], Awaitable[T]],
+    deadline: Deadline,
+    policy: Optional[RetryPolicy] = None,
+    timeout: Optional[float] = None,
+    on_retry: Optional[Callable[[LLMError, int, float], None]] = None
+) -> T:
+    """
+    Await call(timeout_s) until it succeeds, retrying retryable LLMErrors
+
+    Args:
+        call: Makes one attempt with the given timeout in seconds (cancelled
+            once that has passed)
+        deadline: Overall budget; attempts and backoff sleeps stay within it
+        timeout: Per-attempt cap (the remaining budget if None)
+        on_retry: Called with (error, retry number, sleep seconds) before
+            each retry, e.g. to count retries
+
+    Raises:
+        LLMError: The last error once it is not retryable, attempts are used
+            up or the deadline leaves no room for another attempt; kind is
+            "deadline" if the budget ran out before the first attempt
+    """
+    policy = policy or RetryPolicy()
+    attempt = 0
+    while True:
+        if deadline.expired:
+            raise LLMError("Request deadline exceeded before the model could answer", kind="deadline")
+        attempt += 1
+        attempt_timeout = deadline.timeout(timeout)
+        try:
+            # Enforced here, not only handed to the backend: one that ignores
+            # its timeout (the stub) must not overrun the budget either
+            try:
+                return await asyncio.wait_for(call(attempt_timeout), attempt_timeout)
+            except asyncio.TimeoutError:
+                raise LLMError(
+                    f"Model call timed out after {attempt_timeout:.1f}s", kind="timeout", retryable=True
+                ) from None
+        except LLMError as e:
+            if not e.retryable or attempt >= policy.max_attempts:
+                raise
+            delay = policy.backoff(attempt)
+            if deadline.remaining() - delay < policy.min_attempt_s:
+                logger.warning(f"Not retrying ({e.kind}): {deadline.remaining():.1f}s of the deadline left")
+                raise
+            logger.warning(f"Attempt {attempt} failed ({e.kind}), retrying in {delay:.2f}s: {e}")
+            if on_retry:
+                on_retry(e, attempt, delay)
+            await asyncio.sleep(delay)
@@ -0,0 +1,177 @@
+"""
+Stub Backend - Deterministic local LLM for load testing
+
+Returns canned or templated responses with a configurable first-token latency,
+prompt-eval rate and generation rate, so the servers can be driven at full
+concurrency without a real model competing for the CPU being measured.
+
+Responses come from an ordered list of rules; the first rule whose regex
+matches the prompt wins. A rule's response is a string.Template that can use
+the regex's named groups plus $prompt_chars and $prompt_hash.
+
+Like Ollama, the stub keeps the last evaluated prompt and only charges
+prompt-eval time for the part after the prefix it shares with that prompt.
+
+To exercise retries and hedging, a fraction of generations can be made slow
+(slow_rate, slow_factor times the usual duration) or cut off halfway
+(invalid_rate). The draw is random, or fixed by the request's seed option.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from string import Template
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .base import LLMBackend, LLMResponse
+
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "stub_responses.json")
+DEFAULT_RESPONSE = "This is a stub response ($prompt_chars prompt characters, id $prompt_hash)."
+
+_TOKEN_RE = re.compile(r"\s*\S+")
+
+
+def load_rules(path: str = DEFAULT_RULES_PATH) -> List[Dict[str, Any]]:
+    """Load and compile stub response rules from a JSON file"""
+    with open(path, "r", encoding="utf-8") as f:
+        raw_rules = json.load(f)
+    return [
+        {"match": re.compile(rule["match"], re.IGNORECASE | re.DOTALL), "response": Template(rule["response"])}
+        for rule in raw_rules
+    ]
+
+
+def split_tokens(text: str) -> List[str]:
+    """Split text into word-sized pieces that stand in for model tokens"""
+    tokens = _TOKEN_RE.findall(text)
+    tail = text[sum(len(t) for t in tokens):]
+    if tail:
+        tokens.append(tail)
+    return tokens
+
+
+class StubBackend(LLMBackend):
+    def __init__(
+        self,
+        model: str,
+        latency_ms: float = 200.0,
+        tokens_per_s: float = 50.0,
+        prompt_tokens_per_s: float = 2000.0,
+        rules: Optional[List[Dict[str, Any]]] = None,
+        prefix_cache: bool = True,
+        slow_rate: float = 0.0,
+        slow_factor: float = 5.0,
+        invalid_rate: float = 0.0
+    ):
+        super().__init__(model)
+        self.latency_ms = latency_ms
+        self.tokens_per_s = tokens_per_s
+        self.prompt_tokens_per_s = prompt_tokens_per_s
+        self.rules = rules if rules is not None else load_rules()
+        self.prefix_cache = prefix_cache
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.invalid_rate = invalid_rate
+        self._last_prompt = ""
+
+    def render(self, prompt: str) -> str:
+        """Pick the response for a prompt; identical prompts give identical text"""
+        values = {
+            "prompt_chars": str(len(prompt)),
+            "prompt_hash": hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8],
+        }
+        for rule in self.rules:
+            match = rule["match"].search(prompt)
+            if match:
+                groups = {k: (v or "").strip() for k, v in match.groupdict().items()}
+                return rule["response"].safe_substitute({**values, **groups})
+        return Template(DEFAULT_RESPONSE).safe_substitute(values)
+
+    def cached_prefix_chars(self, prompt: str) -> int:
+        """Length of the prefix shared with the previously evaluated prompt"""
+        if not self.prefix_cache:
+            return 0
+        return len(os.path.commonprefix([prompt, self._last_prompt]))
+
+    def prompt_eval_seconds(self, prompt: str, cached_chars: int = 0) -> float:
+        """Simulated time to first token for a prompt"""
+        # Rough 4 characters per token, like most BPE vocabularies on English
+        prompt_tokens = max(1, (len(prompt) - cached_chars) // 4)
+        return self.latency_ms / 1000.0 + prompt_tokens / self.prompt_tokens_per_s
+
+    def _evaluate_prompt(self, prompt: str) -> float:
+        prompt_eval_s = self.prompt_eval_seconds(prompt, self.cached_prefix_chars(prompt))
+        self._last_prompt = prompt
+        return prompt_eval_s
+
+    def _token_delay_s(self) -> float:
+        return 1.0 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+
+    def _faults(self, prompt: str, options: Dict[str, Any]) -> Tuple[float, bool]:
+        """(duration factor, truncate) for one generation"""
+        if not self.slow_rate and not self.invalid_rate:
+            return 1.0, False
+        seed = options.get("seed")
+        rng = random.Random(f"{seed}:{options.get('temperature')}:{prompt}") if seed is not None else random
+        slow = rng.random() < self.slow_rate
+        return (self.slow_factor if slow else 1.0), rng.random() < self.invalid_rate
+
+    def _tokens(self, prompt: str, options: Dict[str, Any], truncate: bool) -> List[str]:
+        tokens = split_tokens(self.render(prompt))
+        if truncate:
+            tokens = tokens[:len(tokens) // 2]
+        # Honour num_predict like Ollama does
+        limit = options.get("num_predict")
+        if limit and limit > 0:
+            tokens = tokens[:limit]
+        return tokens
+
+    async def generate(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **request_fields: Any
+    ) -> LLMResponse:
+        start = time.perf_counter()
+        options = options or {}
+        factor, truncate = self._faults(prompt, options)
+        tokens = self._tokens(prompt, options, truncate)
+
+        prompt_eval_s = self._evaluate_prompt(prompt) * factor
+        await asyncio.sleep(prompt_eval_s + len(tokens) * self._token_delay_s() * factor)
+
+        return LLMResponse(
+            text="".join(tokens),
+            prompt_tokens=max(1, len(prompt) // 4),
+            completion_tokens=len(tokens),
+            prompt_eval_ms=prompt_eval_s * 1000,
+            total_ms=(time.perf_counter() - start) * 1000,
+        )
+
+    async def stream(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **request_fields: Any
+    ) -> AsyncIterator[str]:
+        options = options or {}
+        factor, truncate = self._faults(prompt, options)
+        tokens = self._tokens(prompt, options, truncate)
+
+        await asyncio.sleep(self._evaluate_prompt(prompt) * factor)
+        delay = self._token_delay_s() * factor
+        for token in tokens:
+            await asyncio.sleep(delay)
+            yield token
+
+    async def health_check(self) -> bool:
+        return True
+
+    async def model_loaded(self) -> Optional[bool]:
+        return True
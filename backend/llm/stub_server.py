@@ -0,0 +1,111 @@
+"""
+Stub LLM Server - Ollama-compatible HTTP server backed by StubBackend
+
+Point either backend at it to load-test without a real model:
+
+    cd backend
+    STUB_LATENCY_MS=300 STUB_TOKENS_PER_S=40 uvicorn llm.stub_server:app --port 11435
+    OLLAMA_BASE_URL=http://localhost:11435 uvicorn main_ce:app --port 8000
+
+Implements /api/generate (streaming and non-streaming) and /api/tags.
+Also runnable as `python -m llm.stub_server` (port from STUB_PORT).
+"""
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from .stub_backend import StubBackend, load_rules, DEFAULT_RULES_PATH
+
+
+# ================= CONFIG =================
+STUB_MODELS = os.environ.get("STUB_MODELS", "qwen2.5-coder:7b,mistral").split(",")
+STUB_LATENCY_MS = float(os.environ.get("STUB_LATENCY_MS", "200"))
+STUB_TOKENS_PER_S = float(os.environ.get("STUB_TOKENS_PER_S", "50"))
+STUB_PROMPT_TOKENS_PER_S = float(os.environ.get("STUB_PROMPT_TOKENS_PER_S", "2000"))
+STUB_RESPONSES = os.environ.get("STUB_RESPONSES", DEFAULT_RULES_PATH)
+STUB_PREFIX_CACHE = os.environ.get("STUB_PREFIX_CACHE", "1") == "1"
+STUB_SLOW_RATE = float(os.environ.get("STUB_SLOW_RATE", "0"))
+STUB_SLOW_FACTOR = float(os.environ.get("STUB_SLOW_FACTOR", "5"))
+STUB_INVALID_RATE = float(os.environ.get("STUB_INVALID_RATE", "0"))
+
+app = FastAPI(title="Stub LLM Server")
+
+backend = StubBackend(
+    model=STUB_MODELS[0],
+    latency_ms=STUB_LATENCY_MS,
+    tokens_per_s=STUB_TOKENS_PER_S,
+    prompt_tokens_per_s=STUB_PROMPT_TOKENS_PER_S,
+    rules=load_rules(STUB_RESPONSES),
+    prefix_cache=STUB_PREFIX_CACHE,
+    slow_rate=STUB_SLOW_RATE,
+    slow_factor=STUB_SLOW_FACTOR,
+    invalid_rate=STUB_INVALID_RATE,
+)
+
+
+class GenerateRequest(BaseModel):
+    model: str
+    prompt: str = ""
+    stream: bool = True
+    options: Optional[Dict[str, Any]] = None
+    format: Optional[Any] = None
+    keep_alive: Optional[Any] = None
+    system: Optional[str] = None
+
+
+def _stats(request: GenerateRequest, start: float, prompt_eval_ms: float, eval_count: int) -> Dict[str, Any]:
+    # Same field names and nanosecond units as Ollama
+    return {
+        "model": request.model,
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": int((time.perf_counter() - start) * 1e9),
+        "prompt_eval_count": max(1, len(request.prompt) // 4),
+        "prompt_eval_duration": int(prompt_eval_ms * 1e6),
+        "eval_count": eval_count,
+    }
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": name, "model": name} for name in STUB_MODELS]}
+
+
+@app.post("/api/generate")
+async def generate(request: GenerateRequest):
+    start = time.perf_counter()
+    prompt = (request.system or "") + request.prompt
+
+    # Empty prompt is Ollama's "load the model" call
+    if not request.prompt:
+        return {"model": request.model, "response": "", "done": True, "done_reason": "load"}
+
+    if not request.stream:
+        result = await backend.generate(prompt, request.options)
+        return {
+            "response": result.text,
+            **_stats(request, start, result.prompt_eval_ms, result.completion_tokens),
+        }
+
+    cached_chars = backend.cached_prefix_chars(prompt)
+
+    async def body():
+        count = 0
+        async for token in backend.stream(prompt, request.options):
+            count += 1
+            yield json.dumps({"model": request.model, "response": token, "done": False}) + "\n"
+        prompt_eval_ms = backend.prompt_eval_seconds(prompt, cached_chars) * 1000
+        yield json.dumps({"response": "", **_stats(request, start, prompt_eval_ms, count)}) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get("STUB_PORT", "11435")), log_level="warning")
@@ -2,11 +2,14 @@
 Main FastAPI Server for Experiment Generator
 Entry point of the application
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import logging
 import os
 
@@ -15,6 +18,15 @@ from create_experiment.ollama_client import OllamaClient
 from create_experiment.prompt_engine import PromptEngine
 from create_experiment.validator import ConfigValidator
 from create_experiment.code_generator import CodeGenerator
+from create_experiment.config_cache import ConfigCache
+from create_experiment.fast_path import FastPathParser, FastPathResult
+from create_experiment.experiment_store import ExperimentStore
+from create_experiment.health_monitor import HealthMonitor
+from create_experiment.templates.shared_assets import ASSET_MODES, get_asset, links_assets
+from llm.base import LLMError
+from llm.retry import Deadline, RetryPolicy, retry_call
+from metrics import MetricsRegistry, StageMetrics
+from compression import CompressionMiddleware
 
 # Setup logging
 logging.basicConfig(
@@ -23,11 +35,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled session to Ollama for the whole process, instead of a new
+    # connection per request
+    await ollama_client.start()
+    # Warms the model up in the background and keeps /health's status fresh
+    health_monitor.start()
+    try:
+        yield
+    finally:
+        await health_monitor.stop()
+        await ollama_client.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Experiment Generator API",
     description="Generate interactive simulations from natural language",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -39,27 +67,224 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Config cache: validated configs for repeat prompts. CONFIG_CACHE_DIR enables
+# the on-disk tier that survives restarts.
+CONFIG_CACHE_SIZE = int(os.environ.get("CONFIG_CACHE_SIZE", "512"))
+CONFIG_CACHE_TTL_S = float(os.environ.get("CONFIG_CACHE_TTL_S", "86400"))
+CONFIG_CACHE_DIR = os.environ.get("CONFIG_CACHE_DIR") or None
+
+# Constrain Ollama's output to the template JSON schema (needs Ollama >= 0.5)
+STRUCTURED_OUTPUT = os.environ.get("STRUCTURED_OUTPUT", "1") == "1"
+
+# Stream the generation and stop reading once the config object is complete
+STREAM_EARLY_STOP = os.environ.get("STREAM_EARLY_STOP", "1") == "1"
+
+# Answer fully specified prompts ("network with 10 nodes and grid layout")
+# with a rule-based parser instead of the model
+FAST_PATH = os.environ.get("FAST_PATH", "1") == "1"
+FAST_PATH_MIN_CONFIDENCE = float(os.environ.get("FAST_PATH_MIN_CONFIDENCE", "1.0"))
+
+# Few-shot selection: "relevant" (detected template + closest examples within
+# the token budget) or "all" (full prompt with every template and example)
+PROMPT_FEW_SHOT = os.environ.get("PROMPT_FEW_SHOT", "relevant")
+PROMPT_EXAMPLE_TOKENS = int(os.environ.get("PROMPT_EXAMPLE_TOKENS", "300"))
+
+# Generated experiments are stored under a hash of their config and served
+# from there by /preview/{id}; the content never changes for an id
+EXPERIMENT_STORE_DIR = os.environ.get("EXPERIMENT_STORE_DIR", "data/experiments")
+PREVIEW_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# "inline" embeds the shared CSS/runtime in every experiment; "linked" loads
+# them from /assets/ (versioned, immutable) so previews only ship the
+# experiment-specific part. Downloads are always self-contained. Use an
+# absolute EXPERIMENT_ASSET_BASE_URL when the HTML is shown via srcdoc.
+EXPERIMENT_ASSETS = os.environ.get("EXPERIMENT_ASSETS", "inline")
+if EXPERIMENT_ASSETS not in ASSET_MODES:
+    raise ValueError(f"EXPERIMENT_ASSETS must be one of {ASSET_MODES}, got '{EXPERIMENT_ASSETS}'")
+EXPERIMENT_ASSET_BASE_URL = os.environ.get("EXPERIMENT_ASSET_BASE_URL", "/assets")
+
+# Strip indentation/comments from rendered HTML, CSS and JS
+MINIFY_HTML = os.environ.get("MINIFY_HTML", "1") == "1"
+
+# Hedged generation: with HEDGE_ATTEMPTS > 1 another generation (new seed,
+# temperature + HEDGE_TEMPERATURE_STEP) starts whenever no valid config has
+# arrived within HEDGE_DELAY_S (0 = all at once) or an attempt comes back
+# invalid; the first valid config wins and the other requests are cancelled
+HEDGE_ATTEMPTS = int(os.environ.get("HEDGE_ATTEMPTS", "1"))
+HEDGE_DELAY_S = float(os.environ.get("HEDGE_DELAY_S", "2.0"))
+HEDGE_TEMPERATURE_STEP = float(os.environ.get("HEDGE_TEMPERATURE_STEP", "0.1"))
+
+# Repair model configs that fail validation (clamp numbers, default bad
+# options) instead of rejecting them; the repaired config is re-validated.
+# Off by default; configs sent by clients are always validated strictly.
+SANITIZE_CONFIGS = os.environ.get("SANITIZE_CONFIGS", "0") == "1"
+
+# Responses at least this large are sent br/gzip compressed when accepted
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+
+# Rendered HTML kept per (template version, asset mode, canonical config)
+RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", "256"))
+
+# /generate/batch: prompts per batch and how many run at once
+BATCH_MAX_PROMPTS = int(os.environ.get("BATCH_MAX_PROMPTS", "50"))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "4"))
+
+# Time limit for one model call of a /generate request
+GENERATE_TIMEOUT_S = float(os.environ.get("GENERATE_TIMEOUT_S", "60"))
+
+# Total budget of a /generate request, model retries included (callers can
+# lower it with an X-Request-Timeout header). Timeouts, connection errors and
+# overloaded-server responses are retried up to GENERATE_ATTEMPTS times with
+# jittered exponential backoff, as long as the budget allows another attempt.
+GENERATE_DEADLINE_S = float(os.environ.get("GENERATE_DEADLINE_S", "90"))
+GENERATE_ATTEMPTS = int(os.environ.get("GENERATE_ATTEMPTS", "3"))
+GENERATE_RETRY_BASE_DELAY_S = float(os.environ.get("GENERATE_RETRY_BASE_DELAY_S", "0.5"))
+GENERATE_RETRY_MAX_DELAY_S = float(os.environ.get("GENERATE_RETRY_MAX_DELAY_S", "4"))
+
+# Load the model (and evaluate the shared prompt prefix) at startup and after
+# Ollama restarts, so the first /generate does not pay the cold start; it then
+# stays loaded for EXPERIMENT_KEEP_ALIVE ("30m", -1 = for good) after each call.
+# /health reports (model_warm) whether it still is, without reloading it.
+# /health serves a status refreshed every HEALTH_REFRESH_S in the background.
+WARM_UP = os.environ.get("WARM_UP", "1") == "1"
+WARM_UP_TIMEOUT_S = float(os.environ.get("WARM_UP_TIMEOUT_S", "300"))
+HEALTH_REFRESH_S = float(os.environ.get("HEALTH_REFRESH_S", "15"))
+
+# /generate/stream sends an SSE comment when no event has gone out for this
+# long (prompt evaluation), so proxies do not drop the idle connection
+SSE_HEARTBEAT_S = float(os.environ.get("SSE_HEARTBEAT_S", "15"))
+
+# Compression for JSON payloads (html_code), templates and shared assets;
+# streamed and precompressed responses pass through as they are
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
 # Initialize services
 ollama_client = OllamaClient()
-prompt_engine = PromptEngine()
+prompt_engine = PromptEngine(few_shot=PROMPT_FEW_SHOT, example_token_budget=PROMPT_EXAMPLE_TOKENS)
 validator = ConfigValidator()
-code_generator = CodeGenerator()
+code_generator = CodeGenerator(
+    cache_size=RENDER_CACHE_SIZE,
+    on_cache_lookup=lambda result: render_cache_lookups.inc(result=result),
+    asset_base_url=EXPERIMENT_ASSET_BASE_URL,
+    minify=MINIFY_HTML
+)
+config_cache = ConfigCache(CONFIG_CACHE_SIZE, CONFIG_CACHE_TTL_S, CONFIG_CACHE_DIR)
+fast_path = FastPathParser(prompt_engine, FAST_PATH_MIN_CONFIDENCE)
+experiment_store = ExperimentStore(EXPERIMENT_STORE_DIR)
+health_monitor = HealthMonitor(
+    ollama_client,
+    interval_s=HEALTH_REFRESH_S,
+    warm_up=WARM_UP,
+    warm_up_prompt=prompt_engine.prompt_prefix,
+    warm_up_timeout_s=WARM_UP_TIMEOUT_S,
+    on_warm_up=lambda result, seconds: model_warm_ups.observe(seconds, result=result)
+)
+retry_policy = RetryPolicy(
+    max_attempts=GENERATE_ATTEMPTS,
+    base_delay_s=GENERATE_RETRY_BASE_DELAY_S,
+    max_delay_s=GENERATE_RETRY_MAX_DELAY_S
+)
+
+# Metrics: per-stage latency for the /generate pipeline plus request outcomes
+metrics_registry = MetricsRegistry()
+stages = StageMetrics(metrics_registry, "experiment")
+generate_results = metrics_registry.counter(
+    "experiment_generate_total",
+    "Completed /generate requests by result",
+    ("result",),
+)
+stream_early_stops = metrics_registry.counter(
+    "experiment_stream_early_stop_total",
+    "Streamed generations cut off once the JSON config was complete",
+)
+config_cache_lookups = metrics_registry.counter(
+    "experiment_config_cache_total",
+    "Config cache lookups by result",
+    ("result",),
+)
+prompt_eval_seconds = metrics_registry.histogram(
+    "experiment_prompt_eval_seconds",
+    "Model prompt evaluation time per /generate call (time to first token when streaming)",
+)
+preview_requests = metrics_registry.counter(
+    "experiment_preview_total",
+    "/preview requests by result (ok, not_modified, not_found) and encoding",
+    ("result", "encoding"),
+)
+render_cache_lookups = metrics_registry.counter(
+    "experiment_render_cache_total",
+    "Rendered-HTML cache lookups by result",
+    ("result",),
+)
+fast_path_lookups = metrics_registry.counter(
+    "experiment_fast_path_total",
+    "Rule-based fast path attempts by result (hit/fallback) and fallback reason",
+    ("result", "reason"),
+)
+model_retries = metrics_registry.counter(
+    "experiment_model_retries_total",
+    "Model calls retried by the error that triggered the retry",
+    ("reason",),
+)
+model_failures = metrics_registry.counter(
+    "experiment_model_failures_total",
+    "Model calls given up on (not retryable, out of attempts or past the deadline) by last error",
+    ("reason",),
+)
+refine_results = metrics_registry.counter(
+    "experiment_refine_total",
+    "Completed /refine requests by result",
+    ("result",),
+)
+model_warm_ups = metrics_registry.histogram(
+    "experiment_model_warm_up_seconds",
+    "Model warm-up (load + shared prompt prefix) time by result",
+    ("result",),
+)
+hedged_generations = metrics_registry.counter(
+    "experiment_hedged_generations_total",
+    "Hedged model calls by winning attempt (0 = original, none = no valid config) and attempts started",
+    ("winner", "launched"),
+)
 
 
 # Request/Response Models
 class GenerateRequest(BaseModel):
     prompt: str = Field(..., min_length=5, max_length=500, description="Natural language description")
     template_hint: Optional[str] = Field(None, description="Suggest a specific template")
+    bypass_cache: bool = Field(False, description="Always call the model, ignoring cached configs")
+    include_html: bool = Field(True, description="Inline html_code in the response (otherwise use preview_url)")
+
+
+class BatchGenerateRequest(BaseModel):
+    prompts: List[str] = Field(..., description="Natural language descriptions, one per experiment")
+    template_hint: Optional[str] = Field(None, description="Suggest a specific template for every prompt")
+    bypass_cache: bool = Field(False, description="Always call the model, ignoring cached configs")
+    include_html: bool = Field(False, description="Inline html_code in each result (otherwise use preview_url)")
+    concurrency: Optional[int] = Field(None, ge=1, description="Max prompts in flight (capped by the server)")
 
 
 class GenerateResponse(BaseModel):
     success: bool
     config: Optional[Dict[str, Any]] = None
     html_code: Optional[str] = None
+    experiment_id: Optional[str] = None
+    preview_url: Optional[str] = None
     error: Optional[str] = None
     suggestions: Optional[List[str]] = None
 
 
+class RefineRequest(BaseModel):
+    config: Dict[str, Any] = Field(..., description="Current experiment config, as returned by /generate")
+    request: str = Field(..., min_length=3, max_length=500, description="What to change, e.g. 'more nodes'")
+    include_html: bool = Field(True, description="Inline html_code in the response (otherwise use preview_url)")
+
+
+class RefineResponse(GenerateResponse):
+    patch: Optional[Dict[str, Any]] = None  # what the model changed
+    usage: Optional[Dict[str, int]] = None  # prompt/completion tokens of the model call
+
+
 class TemplateInfo(BaseModel):
     id: str
     name: str
@@ -79,28 +304,30 @@ async def root():
             "health": "/health",
             "templates": "/templates",
             "generate": "/generate",
-            "preview": "/preview/{experiment_id}"
+            "generate_batch": "/generate/batch",
+            "generate_stream": "/generate/stream",
+            "refine": "/refine",
+            "preview": "/preview/{experiment_id}",
+            "download": "/download/{experiment_id}",
+            "assets": "/assets/{filename}",
+            "metrics": "/metrics"
         }
     }
 
 
 @app.get("/health")
 async def health_check():
-    """Check system health and Ollama status"""
-    try:
-        ollama_status = await ollama_client.health_check()
-        return {
-            "status": "healthy" if ollama_status else "degraded",
-            "ollama_running": ollama_status,
-            "model": "qwen2.5-coder:7b",
-            "templates_available": len(code_generator.get_available_templates())
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {
-            "status": "unhealthy",
-            "error": str(e)
-        }
+    """System health and Ollama status, as of the last background refresh"""
+    return {
+        **health_monitor.status,
+        "templates_available": len(code_generator.get_available_templates())
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms and counters in Prometheus text format"""
+    return Response(content=metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
 
 
 @app.get("/templates", response_model=List[TemplateInfo])
@@ -114,10 +341,131 @@ async def list_templates():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def success_response(config: Dict[str, Any], html_code: str, include_html: bool = True) -> GenerateResponse:
+    """Persist the experiment in the store and build the /generate response"""
+    with stages.track("store"):
+        # Hashing, compression and file writes stay off the event loop
+        experiment_id = await asyncio.to_thread(
+            experiment_store.put, config, html_code, code_generator.render_key(config, EXPERIMENT_ASSETS)
+        )
+    return GenerateResponse(
+        success=True,
+        config=config,
+        html_code=html_code if include_html else None,
+        experiment_id=experiment_id,
+        preview_url=f"/preview/{experiment_id}"
+    )
+
+
+async def config_cache_call(method: Callable[..., Any], *args: Any) -> Any:
+    """Run a config cache get/put, in a worker thread when it reads and writes files"""
+    if config_cache.disk_dir:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+def validated_config(config: Dict[str, Any]) -> Tuple[Dict[str, Any], bool, str]:
+    """
+    Validate a model config, repairing it first when SANITIZE_CONFIGS is set;
+    never for client input, which validator.validate checks as it is
+    """
+    is_valid, error_msg = validator.validate(config)
+    if not is_valid and SANITIZE_CONFIGS:
+        sanitized = validator.sanitize(config)
+        if validator.validate(sanitized)[0]:
+            logger.warning(f"Repaired invalid config: {error_msg}")
+            return sanitized, True, error_msg
+    return config, is_valid, error_msg
+
+
+def accepted_config(text: str) -> Optional[Dict[str, Any]]:
+    """The config in a model response if it parses and validates (hedging)"""
+    config = prompt_engine.extract_json(text)
+    if not config:
+        return None
+    config, is_valid, _ = validated_config(config)
+    return config if is_valid else None
+
+
+def request_deadline(http_request: Request) -> Deadline:
+    """GENERATE_DEADLINE_S, shortened to the caller's X-Request-Timeout (seconds)"""
+    seconds = GENERATE_DEADLINE_S
+    header = http_request.headers.get("x-request-timeout")
+    if header:
+        try:
+            seconds = min(seconds, max(0.0, float(header)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid X-Request-Timeout: {header!r}")
+    return Deadline(seconds)
+
+
 @app.post("/generate", response_model=GenerateResponse)
-async def generate_experiment(request: GenerateRequest):
+async def generate_experiment(request: GenerateRequest, http_request: Request):
     """
     Generate experiment from natural language prompt
+    """
+    return await run_generation(request, request_deadline(http_request))
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/generate/stream")
+async def generate_experiment_stream(request: GenerateRequest, http_request: Request):
+    """
+    /generate with live progress, as Server-Sent Events
+    
+    Stages are reported as they happen: prompt_built, token (each model
+    output fragment; after a retry event the tokens start over), parsed,
+    validated and rendered, or cache_hit / fast_path when no model call is
+    needed. The last event is result, carrying the GenerateResponse.
+    Disconnecting cancels the generation, Ollama request included.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(run_generation(
+        request, request_deadline(http_request),
+        progress=lambda event, data: events.put_nowait((event, data))
+    ))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    
+    async def stream():
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(events.get(), SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield sse_event(*item)
+            yield sse_event("result", task.result().model_dump(exclude_none=True))
+        finally:
+            if not task.done():
+                logger.info("Client disconnected, cancelling generation")
+                task.cancel()
+                generate_results.inc(result="cancelled")
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def run_generation(
+    request: GenerateRequest,
+    deadline: Optional[Deadline] = None,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> GenerateResponse:
+    """
+    Full generation pipeline for one prompt, shared by /generate,
+    /generate/stream and /generate/batch
+    
+    Model calls (and their retries) stay within `deadline`; without one the
+    request gets GENERATE_DEADLINE_S from the time the model is first called.
+    `progress(event, data)` is told about each stage as it completes.
     
     Process:
     1. Build AI prompt with context
@@ -126,9 +474,33 @@ async def generate_experiment(request: GenerateRequest):
     4. Generate HTML/JS code
     5. Return complete working code
     """
+    def emit(event: str, **data: Any):
+        if progress:
+            progress(event, data)
+    
     try:
         logger.info(f"Received generation request: '{request.prompt}'")
         
+        # Repeat prompts are answered from the config cache without calling Ollama
+        cache_key = config_cache.make_key(
+            request.prompt, request.template_hint, ollama_client.model, PromptEngine.VERSION
+        )
+        if request.bypass_cache:
+            config_cache_lookups.inc(result="bypass")
+        else:
+            cached_config = await config_cache_call(config_cache.get, cache_key)
+            if cached_config:
+                config_cache_lookups.inc(result="hit")
+                with stages.track("generate_html"):
+                    html_code = code_generator.generate_html(cached_config, assets=EXPERIMENT_ASSETS)
+                if html_code:
+                    logger.info("Served experiment from config cache")
+                    emit("cache_hit", template=cached_config.get("template"))
+                    generate_results.inc(result="cache_hit")
+                    return await success_response(cached_config, html_code, request.include_html)
+            else:
+                config_cache_lookups.inc(result="miss")
+        
         # Step 1: Build enhanced prompt
         # Try to extract title and description from prompt if they're in "Title: X\nDescription: Y" format
         title = None
@@ -149,63 +521,156 @@ async def generate_experiment(request: GenerateRequest):
                 # If nothing left, combine title and description
                 prompt_text = f"{title}. {description}" if title and description else (title or description or request.prompt)
         
-        ai_prompt = prompt_engine.build_prompt(
-            user_prompt=prompt_text,
-            template_hint=request.template_hint,
-            title=title,
-            description=description
-        )
+        # Fully specified prompts skip the model; anything uncertain falls through
+        if FAST_PATH:
+            with stages.track("fast_path"):
+                fast = fast_path.parse(prompt_text, request.template_hint, title, description)
+                if fast.hit:
+                    is_valid, error_msg = validator.validate(fast.config)
+                    if not is_valid:
+                        logger.warning(f"Fast path config rejected: {error_msg}")
+                        fast = FastPathResult(fast.template, reason="invalid", params=fast.params)
+            if fast.hit:
+                with stages.track("generate_html"):
+                    html_code = code_generator.generate_html(fast.config, assets=EXPERIMENT_ASSETS)
+                if html_code:
+                    fast_path_lookups.inc(result="hit", reason="ok")
+                    emit("fast_path", template=fast.template)
+                    generate_results.inc(result="fast_path")
+                    await config_cache_call(config_cache.put, cache_key, fast.config)
+                    return await success_response(fast.config, html_code, request.include_html)
+                fast_path_lookups.inc(result="fallback", reason="render_error")
+            else:
+                fast_path_lookups.inc(result="fallback", reason=fast.reason)
+        
+        with stages.track("prompt_build"):
+            ai_prompt = prompt_engine.build_prompt(
+                user_prompt=prompt_text,
+                template_hint=request.template_hint,
+                title=title,
+                description=description
+            )
+        emit("prompt_built", prompt_tokens=prompt_engine.estimate_tokens(ai_prompt))
         
         # Step 2: Generate config using AI
         logger.info("Calling Ollama AI...")
-        raw_response = await ollama_client.generate(ai_prompt)
+        generate_kwargs = {}
+        if STRUCTURED_OUTPUT:
+            output_schema, max_tokens = prompt_engine.build_output_format(
+                prompt_text, request.template_hint, title=title, description=description
+            )
+            generate_kwargs.update(format=output_schema, max_tokens=max_tokens)
         
-        # Step 3: Extract JSON config
-        config_dict = prompt_engine.extract_json(raw_response)
+        on_token = (lambda piece: emit("token", text=piece)) if progress else None
         
-        if not config_dict:
-            return GenerateResponse(
-                success=False,
-                error="Could not parse valid configuration from AI response",
-                suggestions=[
-                    "Try being more specific in your prompt",
-                    "Include keywords like 'network', 'particles', or 'waves'",
-                    "Example: 'Create a network with 10 nodes and fast routing'"
-                ]
-            )
+        def on_retry(error: LLMError, retry: int, delay: float):
+            model_retries.inc(reason=error.kind)
+            emit("retry", reason=error.kind, attempt=retry + 1, delay_s=round(delay, 2))
         
-        # Step 4: Validate configuration
-        is_valid, error_msg = validator.validate(config_dict)
+        async def call_model(timeout: float) -> Tuple[str, Optional[Dict[str, Any]]]:
+            """The response text, plus the config a hedged attempt was accepted with"""
+            # Live tokens come from a single generation, so progress requests are not hedged
+            if HEDGE_ATTEMPTS > 1 and not progress:
+                hedged = await ollama_client.generate_hedged(
+                    ai_prompt, accepted_config,
+                    attempts=HEDGE_ATTEMPTS,
+                    delay_s=HEDGE_DELAY_S,
+                    temperature_step=HEDGE_TEMPERATURE_STEP,
+                    stream=STREAM_EARLY_STOP,
+                    timeout=timeout,
+                    **generate_kwargs
+                )
+                winner = "none" if hedged.attempt is None else str(hedged.attempt)
+                hedged_generations.inc(winner=winner, launched=str(hedged.launched))
+                return hedged.response.text, hedged.value
+            if STREAM_EARLY_STOP or progress:
+                streamed = await ollama_client.generate_until_json(
+                    ai_prompt, timeout=timeout, on_token=on_token, **generate_kwargs
+                )
+                if streamed.stopped_early:
+                    stream_early_stops.inc()
+                if streamed.first_token_ms is not None:
+                    prompt_eval_seconds.observe(streamed.first_token_ms / 1000)
+                return streamed.text, None
+            result = await ollama_client.generate_response(ai_prompt, timeout=timeout, **generate_kwargs)
+            prompt_eval_seconds.observe(result.prompt_eval_ms / 1000)
+            return result.text, None
         
-        if not is_valid:
-            logger.warning(f"Invalid config: {error_msg}")
-            return GenerateResponse(
-                success=False,
-                error=f"Invalid configuration: {error_msg}",
-                suggestions=["Please rephrase your request and try again"]
-            )
+        with stages.track("ollama_call"):
+            try:
+                raw_response, accepted = await retry_call(
+                    call_model, deadline or Deadline(GENERATE_DEADLINE_S), retry_policy,
+                    timeout=GENERATE_TIMEOUT_S,
+                    on_retry=on_retry
+                )
+            except LLMError as e:
+                model_failures.inc(reason=e.kind)
+                generate_results.inc(result="model_error")
+                return GenerateResponse(
+                    success=False,
+                    error=str(e),
+                    suggestions=["The AI model is busy or unavailable, please try again shortly"]
+                )
+        
+        if accepted is not None:
+            # The winning hedged attempt was already parsed and validated
+            config_dict = accepted
+            emit("parsed", template=config_dict.get("template"))
+        else:
+            # Step 3: Extract JSON config
+            with stages.track("extract_json"):
+                config_dict = prompt_engine.extract_json(raw_response)
+            
+            if not config_dict:
+                generate_results.inc(result="parse_error")
+                return GenerateResponse(
+                    success=False,
+                    error="Could not parse valid configuration from AI response",
+                    suggestions=[
+                        "Try being more specific in your prompt",
+                        "Include keywords like 'network', 'particles', or 'waves'",
+                        "Example: 'Create a network with 10 nodes and fast routing'"
+                    ]
+                )
+            emit("parsed", template=config_dict.get("template"))
+            
+            # Step 4: Validate configuration
+            with stages.track("validation"):
+                config_dict, is_valid, error_msg = validated_config(config_dict)
+            
+            if not is_valid:
+                logger.warning(f"Invalid config: {error_msg}")
+                generate_results.inc(result="invalid_config")
+                return GenerateResponse(
+                    success=False,
+                    error=f"Invalid configuration: {error_msg}",
+                    suggestions=["Please rephrase your request and try again"]
+                )
+        emit("validated", template=config_dict["template"])
         
         # Step 5: Generate HTML code
         logger.info(f"Generating code for template: {config_dict['template']}")
-        html_code = code_generator.generate_html(config_dict)
+        with stages.track("generate_html"):
+            html_code = code_generator.generate_html(config_dict, assets=EXPERIMENT_ASSETS)
         
         if not html_code:
+            generate_results.inc(result="render_error")
             return GenerateResponse(
                 success=False,
                 error="Failed to generate experiment code",
                 suggestions=["The selected template might not be fully implemented"]
             )
         
+        emit("rendered", html_bytes=len(html_code))
         logger.info("Successfully generated experiment!")
+        generate_results.inc(result="success")
+        await config_cache_call(config_cache.put, cache_key, config_dict)
         
-        return GenerateResponse(
-            success=True,
-            config=config_dict,
-            html_code=html_code
-        )
+        return await success_response(config_dict, html_code, request.include_html)
         
     except Exception as e:
         logger.error(f"Error in generate_experiment: {e}", exc_info=True)
+        generate_results.inc(result="error")
         return GenerateResponse(
             success=False,
             error=f"Internal error: {str(e)}",
@@ -213,26 +678,232 @@ async def generate_experiment(request: GenerateRequest):
         )
 
 
+@app.post("/refine", response_model=RefineResponse)
+async def refine_experiment(request: RefineRequest, http_request: Request):
+    """
+    Apply a change request ("more nodes", "make it blue") to an existing
+    experiment
+    
+    The model only sees the current config and the request and answers with
+    a patch of the changed params, which is merged, validated and rendered -
+    a fraction of the prompt and completion tokens of a full /generate.
+    """
+    try:
+        current = dict(request.config)
+        is_valid, error_msg = validator.validate(current)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=f"Invalid configuration: {error_msg}")
+        
+        with stages.track("refine_prompt_build"):
+            ai_prompt = prompt_engine.build_refinement_prompt(current, request.request)
+            generate_kwargs = {}
+            if STRUCTURED_OUTPUT:
+                patch_schema, max_tokens = prompt_engine.build_refinement_format(current["template"])
+                generate_kwargs.update(format=patch_schema, max_tokens=max_tokens)
+        
+        with stages.track("refine_ollama_call"):
+            try:
+                result = await retry_call(
+                    lambda timeout: ollama_client.generate_response(ai_prompt, timeout=timeout, **generate_kwargs),
+                    request_deadline(http_request), retry_policy,
+                    timeout=GENERATE_TIMEOUT_S,
+                    on_retry=lambda error, retry, delay: model_retries.inc(reason=error.kind)
+                )
+            except LLMError as e:
+                model_failures.inc(reason=e.kind)
+                refine_results.inc(result="model_error")
+                return RefineResponse(
+                    success=False,
+                    error=str(e),
+                    suggestions=["The AI model is busy or unavailable, please try again shortly"]
+                )
+        usage = {"prompt_tokens": result.prompt_tokens, "completion_tokens": result.completion_tokens}
+        
+        patch = prompt_engine.extract_json(result.text)
+        if not patch:
+            refine_results.inc(result="parse_error")
+            return RefineResponse(
+                success=False,
+                error="Could not parse the change from AI response",
+                usage=usage,
+                suggestions=["Name the parameter to change, e.g. 'set the node count to 10'"]
+            )
+        
+        with stages.track("validation"):
+            refined, is_valid, error_msg = validated_config(prompt_engine.apply_refinement(current, patch))
+        if not is_valid:
+            logger.warning(f"Invalid refined config: {error_msg}")
+            refine_results.inc(result="invalid_config")
+            return RefineResponse(
+                success=False,
+                error=f"Invalid configuration: {error_msg}",
+                patch=patch,
+                usage=usage,
+                suggestions=["Please rephrase your request and try again"]
+            )
+        
+        with stages.track("generate_html"):
+            html_code = code_generator.generate_html(refined, assets=EXPERIMENT_ASSETS)
+        if not html_code:
+            refine_results.inc(result="render_error")
+            return RefineResponse(success=False, error="Failed to generate experiment code", patch=patch, usage=usage)
+        
+        logger.info(f"Refined {refined['template']} experiment ({usage['prompt_tokens']}+{usage['completion_tokens']} tokens)")
+        refine_results.inc(result="success")
+        response = await success_response(refined, html_code, request.include_html)
+        return RefineResponse(**response.model_dump(), patch=patch, usage=usage)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in refine_experiment: {e}", exc_info=True)
+        refine_results.inc(result="error")
+        return RefineResponse(success=False, error=f"Internal error: {str(e)}")
+
+
+@app.post("/generate/batch")
+async def generate_batch(request: BatchGenerateRequest):
+    """
+    Generate experiments for many prompts at once
+    
+    Identical prompts (after normalization) are generated once. Results are
+    streamed as NDJSON, one line per input prompt as soon as it completes:
+    {"index": i, "prompt": ..., "duplicate_of": j or null, "result": GenerateResponse},
+    followed by a final {"done": true, ...} summary line.
+    """
+    if not request.prompts:
+        raise HTTPException(status_code=400, detail="prompts must not be empty")
+    if len(request.prompts) > BATCH_MAX_PROMPTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_PROMPTS} prompts per batch")
+    
+    # Map each normalized prompt to the indices that asked for it
+    groups: Dict[str, List[int]] = {}
+    for index, prompt in enumerate(request.prompts):
+        groups.setdefault(config_cache.normalize_prompt(prompt), []).append(index)
+    
+    concurrency = min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(concurrency)
+    logger.info(f"Batch of {len(request.prompts)} prompts ({len(groups)} unique), concurrency {concurrency}")
+    
+    async def generate_one(indices: List[int]):
+        async with semaphore:
+            try:
+                item = GenerateRequest(
+                    prompt=request.prompts[indices[0]],
+                    template_hint=request.template_hint,
+                    bypass_cache=request.bypass_cache,
+                    include_html=request.include_html
+                )
+            except ValueError as e:
+                return indices, GenerateResponse(success=False, error=f"Invalid prompt: {e}")
+            return indices, await run_generation(item)
+    
+    async def results():
+        tasks = [asyncio.create_task(generate_one(indices)) for indices in groups.values()]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, response = await next_done
+                result = response.model_dump(exclude_none=True)
+                for index in indices:
+                    succeeded += response.success
+                    yield json.dumps({
+                        "index": index,
+                        "prompt": request.prompts[index],
+                        "duplicate_of": indices[0] if index != indices[0] else None,
+                        "result": result,
+                    }) + "\n"
+            yield json.dumps({
+                "done": True,
+                "total": len(request.prompts),
+                "unique": len(groups),
+                "succeeded": succeeded,
+            }) + "\n"
+        finally:
+            # Client went away or generation failed: stop outstanding work
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @app.get("/preview/{experiment_id}", response_class=HTMLResponse)
-async def preview_experiment(experiment_id: str):
+async def preview_experiment(experiment_id: str, request: Request):
+    """
+    Serve a stored experiment's HTML
+    
+    Content never changes for an id, so responses are immutable and
+    revalidation via If-None-Match costs no body. The body is sent
+    precompressed (br/gzip) when the client accepts it.
+    """
+    etag = await asyncio.to_thread(experiment_store.get_etag, experiment_id)
+    if etag is None:
+        preview_requests.inc(result="not_found", encoding="none")
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    
+    cache_headers = {"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        preview_requests.inc(result="not_modified", encoding="none")
+        return Response(status_code=304, headers=cache_headers)
+    
+    stored = await asyncio.to_thread(
+        experiment_store.get_body, experiment_id, request.headers.get("accept-encoding", "")
+    )
+    if stored is None:
+        preview_requests.inc(result="not_found", encoding="none")
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    
+    headers = dict(cache_headers)
+    if stored.encoding != "identity":
+        headers["Content-Encoding"] = stored.encoding
+    preview_requests.inc(result="ok", encoding=stored.encoding)
+    return Response(content=stored.body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+@app.get("/download/{experiment_id}")
+async def download_stored_experiment(experiment_id: str):
     """
-    Preview a generated experiment
-    (In production, you'd store experiments in DB and retrieve by ID)
+    Return a stored experiment as a downloadable HTML file
     """
-    # For now, return a placeholder
-    return """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Experiment Preview</title>
-    </head>
-    <body>
-        <h1>Experiment Preview</h1>
-        <p>Experiment ID: {}</p>
-        <p>Use the /generate endpoint to create new experiments</p>
-    </body>
-    </html>
-    """.format(experiment_id)
+    stored = await asyncio.to_thread(experiment_store.get_body, experiment_id)
+    config = await asyncio.to_thread(experiment_store.get_config, experiment_id)
+    if stored is None or config is None:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    
+    headers = {"Content-Disposition": f"attachment; filename={config['template']}_experiment.html"}
+    # Judge the stored document itself: it may have been rendered under
+    # another EXPERIMENT_ASSETS mode than the current one
+    if not links_assets(stored.body):
+        headers["ETag"] = stored.etag
+        return Response(content=stored.body, media_type="text/html", headers=headers)
+    
+    # Linked documents need /assets; downloads must work offline
+    html_code = await asyncio.to_thread(code_generator.generate_html, config, "inline")
+    if not html_code:
+        raise HTTPException(status_code=500, detail="Failed to generate HTML")
+    return Response(content=html_code, media_type="text/html", headers=headers)
+
+
+@app.get("/assets/{filename}")
+async def shared_asset(filename: str, request: Request):
+    """
+    Serve a shared experiment stylesheet/runtime
+    
+    File names carry a content hash, so a response never changes and can be
+    cached for good; linked-mode experiments load these instead of
+    inlining them.
+    """
+    asset = get_asset(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    body, media_type = asset
+    etag = f'"{filename}"'
+    headers = {"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL}
+    if request.headers.get("if-none-match", "").strip() in (etag, "*"):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
 
 
 @app.post("/download")
@@ -246,8 +917,8 @@ async def download_experiment(config: Dict[str, Any]):
         if not is_valid:
             raise HTTPException(status_code=400, detail=error_msg)
         
-        # Generate HTML
-        html_code = code_generator.generate_html(config)
+        # Generate HTML (self-contained, independent of EXPERIMENT_ASSETS)
+        html_code = code_generator.generate_html(config, assets="inline")
         
         if not html_code:
             raise HTTPException(status_code=500, detail="Failed to generate HTML")
@@ -1,26 +1,72 @@
+import asyncio
+import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from typing import Optional
 
+import aiohttp
 from fastapi import FastAPI, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel
 
 # Your existing modules
 from chat_with_notes.data_extraction import process_pdf
-from chat_with_notes.rag_query import ask as rag_ask
+from chat_with_notes import rag_query as rag
+from llm.base import LLMBackend
+from llm.factory import create_backend
+from metrics import MetricsRegistry, StageMetrics
 
-import requests
+logger = logging.getLogger(__name__)
 
 # ================= CONFIG =================
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "mistral"
+# Backend (Ollama or the load-test stub) is chosen by LLM_BACKEND / OLLAMA_BASE_URL
+CHAT_MODEL = os.environ.get("CHAT_MODEL", "mistral")
+
+# Concurrency limits. Query-side CPU work (embedding, FAISS search, rerank)
+# and ingest work (OCR, chunk embedding, index build) each get their own
+# pool; LLM calls are awaited and capped by LLM_CONCURRENCY.
+CPU_WORKERS = int(os.environ.get("CHAT_CPU_WORKERS", "4"))
+INGEST_WORKERS = int(os.environ.get("CHAT_INGEST_WORKERS", "1"))
+LLM_CONCURRENCY = int(os.environ.get("CHAT_LLM_CONCURRENCY", "8"))
+LLM_TIMEOUT_S = float(os.environ.get("CHAT_LLM_TIMEOUT_S", "120"))
+
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="chat-cpu")
+ingest_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="chat-ingest")
+llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+http_session: Optional[aiohttp.ClientSession] = None
+llm: Optional[LLMBackend] = None
+
+# Per-stage latency: query_embed, faiss_search, rerank, llm_call for /chat and
+# ocr, chunk_embed, index_build for /upload-pdf
+metrics_registry = MetricsRegistry()
+stages = StageMetrics(metrics_registry, "chat")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_session, llm
+    http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=LLM_CONCURRENCY),
+        timeout=aiohttp.ClientTimeout(total=LLM_TIMEOUT_S),
+    )
+    llm = create_backend(CHAT_MODEL, session=http_session)
+    try:
+        yield
+    finally:
+        await llm.close()
+        await http_session.close()
+        cpu_executor.shutdown(wait=False)
+        ingest_executor.shutdown(wait=True)
+
 
 # ================= FASTAPI APP =================
-app = FastAPI(title="PDF Chat Backend")
+app = FastAPI(title="PDF Chat Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,29 +82,37 @@ class ChatRequest(BaseModel):
     use_pdf: bool = False
 
 # ================= HELPERS =================
-def call_general_llm(prompt: str) -> str:
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False,
-    }
-    res = requests.post(OLLAMA_URL, json=payload)
-    res.raise_for_status()
-    return res.json()["response"]
+async def run_in(executor: ThreadPoolExecutor, fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, fn, *args)
+
+
+async def call_general_llm(prompt: str) -> str:
+    async with llm_semaphore:
+        with stages.track("llm_call"):
+            result = await llm.generate(prompt)
+    return result.text
+
+
+def save_upload(upload: UploadFile, pdf_path: str):
+    with open(pdf_path, "wb") as f:
+        shutil.copyfileobj(upload.file, f)
 
 # ================= ROUTES =================
 @app.get("/")
-def health():
+async def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms and counters in Prometheus text format"""
+    return Response(content=metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
 @app.post("/upload-pdf")
-def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(file: UploadFile = File(...)):
     """
     Upload PDF and build FAISS index
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     if not file.filename.lower().endswith(".pdf"):
         return {"error": "Only PDF files are supported"}
 
@@ -67,14 +121,14 @@ def upload_pdf(file: UploadFile = File(...)):
         
         logger.info(f"Uploading PDF: {file.filename}")
         
-        with open(pdf_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        await run_in(cpu_executor, save_upload, file, pdf_path)
         
         logger.info(f"PDF saved, starting processing...")
         
         # Process PDF → embeddings → FAISS
-        # This can take time for large PDFs
-        process_pdf(pdf_path)
+        # This can take time for large PDFs; it runs on the ingest pool so
+        # chat requests keep being served meanwhile
+        await run_in(ingest_executor, process_pdf, pdf_path, stages.track)
         
         logger.info(f"PDF processing complete: {file.filename}")
         
@@ -90,19 +144,18 @@ def upload_pdf(file: UploadFile = File(...)):
         }
 
 @app.post("/chat")
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     """
     Chat endpoint:
     - If use_pdf = True → RAG over PDF
     - If use_pdf = False → general LLM
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     if request.use_pdf:
         try:
             logger.info(f"Using RAG for question: {request.message[:100]}...")
-            answer = rag_ask(request.message)
+            chunks = await run_in(cpu_executor, rag.retrieve, request.message, stages.track)
+            prompt = rag.build_prompt(chunks, request.message)
+            answer = await call_general_llm(prompt)
             logger.info("RAG answer generated successfully")
             return {
                 "answer": answer,
@@ -124,7 +177,7 @@ def chat(request: ChatRequest):
     # General chat
     logger.info(f"Using general LLM for question: {request.message[:100]}...")
     try:
-        answer = call_general_llm(request.message)
+        answer = await call_general_llm(request.message)
         return {
             "answer": answer,
             "source": "general",
@@ -0,0 +1,39 @@
+"""
+Fast path regression tests
+
+    cd backend
+    python -m pytest tests
+"""
+import pytest
+
+from create_experiment.fast_path import FastPathParser
+from create_experiment.prompt_engine import PromptEngine
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return FastPathParser(PromptEngine())
+
+
+@pytest.mark.parametrize("prompt", [
+    "network with -5 nodes",
+    "network with nodes: -5",
+    "network with nodes -5",
+    "particles with gravity -0.5",
+])
+def test_negative_numbers_fall_back(parser, prompt):
+    result = parser.parse(prompt)
+    assert not result.hit
+    assert result.reason == "out_of_range"
+
+
+def test_number_range_is_not_read_as_one_number(parser):
+    result = parser.parse("network with 5-10 nodes")
+    assert not result.hit
+    assert result.reason == "unknown_number"
+
+
+def test_positive_numbers_still_hit(parser):
+    result = parser.parse("network with 10 nodes and grid layout")
+    assert result.hit
+    assert result.params == {"nodeCount": 10, "layout": "grid"}
@@ -0,0 +1,37 @@
+"""
+JSON scanner regression tests
+
+    cd backend
+    python -m pytest tests
+"""
+import time
+
+import pytest
+
+from create_experiment.json_stream import find_json_object
+
+_CONFIG = '{"template": "network", "params": {"nodeCount": 8}, "title": "Net", "description": "A small network"}'
+
+# About a million characters; the scan took 1.7-2.4 s on these before the
+# span decode budget and takes ~0.15 s with it
+SIZE = 1_000_000
+TIME_LIMIT_S = 1.0
+
+
+@pytest.mark.parametrize("unit", [
+    '{"a": 1 x ',
+    '{"s": "" x "n": ',
+])
+def test_nested_invalid_spans_stay_fast(unit):
+    count = SIZE // len(unit)
+    text = unit * count + "}" * count
+    start = time.perf_counter()
+    assert find_json_object(text) is None
+    assert time.perf_counter() - start < TIME_LIMIT_S
+
+
+def test_config_after_json_like_noise_is_found():
+    text = '{"a" x} ' * 10_000 + _CONFIG
+    found = find_json_object(text)
+    assert found is not None
+    assert found[0]["template"] == "network"